@@ -0,0 +1,136 @@
+# FILE: actor_scheduler.py
+
+# Number of slots of the timing wheels; events further ahead wrap around and wait for their round
+WHEEL_SLOTS = 64
+
+class TimingWheel:
+    """
+    Hashed timing wheel: an event for tick t lives in slot t % slots, so scheduling
+    is O(1) and pop(t) only looks at the events sharing that slot. Events due on
+    the same tick come out in the order they were scheduled.
+    """
+    def __init__(self, slots=WHEEL_SLOTS):
+        self.slots = [[] for _ in range(slots)]
+        self.size = 0
+
+    def schedule(self, tick, item):
+        self.slots[tick % len(self.slots)].append((tick, item))
+        self.size += 1
+
+    def pop(self, tick):
+        """Removes and returns the items due at 'tick'."""
+        index = tick % len(self.slots)
+        slot = self.slots[index]
+        if not slot:
+            return []
+        due = [item for t, item in slot if t == tick]
+        if due:
+            self.slots[index] = [(t, item) for t, item in slot if t != tick]
+            self.size -= len(due)
+        return due
+
+    def peek(self, tick):
+        """The items due at 'tick', without removing them."""
+        return [item for t, item in self.slots[tick % len(self.slots)] if t == tick]
+
+    def next_tick(self):
+        """Earliest scheduled tick, or None when the wheel is empty."""
+        return min((t for slot in self.slots for t, _ in slot), default=None)
+
+class ActorScheduler:
+    """
+    Decides which actors the engine has to touch on a tick.
+
+    - Drones: only 'awake' drones are updated, in fleet order (the order matters,
+      scans draw from the shared RNG). A drone goes to sleep once it has no pending
+      work (DroneAgent.has_pending_work) and is woken by the engine whenever it
+      gets a command, is retargeted by a hunt or pays for a report. Recharging
+      drones stay awake: their battery changes every tick, and they fall asleep on
+      the tick the battery is full.
+    - Moving enemies: each enemy's next move tick is on a timing wheel.
+    - Missiles: the tick on which a missile is intercepted or arrives is computed
+      at launch from its path and the (static) HSS sites and put on a timing wheel;
+      in between, the missile only advances along its path.
+    """
+    def __init__(self, registry, drones, moving_enemies, current_tick=0):
+        self.registry = registry
+        self.drones = drones
+        self._drone_index = {d.id: i for i, d in enumerate(drones)}
+        self.awake = set(range(len(drones)))
+        self.enemy_moves = TimingWheel()
+        self.missile_events = TimingWheel()
+        for enemy in moving_enemies:
+            self._schedule_enemy(enemy, current_tick)
+
+    # --- Drones ---
+
+    def wake(self, drone):
+        self.awake.add(self._drone_index[drone.id])
+
+    def wake_all(self):
+        self.awake.update(self._drone_index[drone_id] for drone_id in self.registry.active_drones)
+
+    def update_drones(self, tick):
+        """Updates the awake drones and returns them."""
+        updated = [self.drones[index] for index in sorted(self.awake)]
+        for drone in updated:
+            drone.update(tick)
+            if drone.status == 'DESTROYED':
+                self.registry.drone_destroyed(drone)
+            if not drone.has_pending_work():
+                self.awake.discard(self._drone_index[drone.id])
+        return updated
+
+    def only_recharging(self):
+        """True if no awake drone has work other than recharging at base."""
+        for index in self.awake:
+            drone = self.drones[index]
+            if drone.has_pending_work() and (drone.current_command.get('command_type') != 'STANDBY' or drone.battery <= 0):
+                return False
+        return True
+
+    # --- Moving enemies ---
+
+    def _schedule_enemy(self, enemy, after_tick):
+        next_tick = enemy.next_move_tick(after_tick)
+        if next_tick is not None:
+            self.enemy_moves.schedule(next_tick, enemy)
+
+    def move_enemies(self, tick):
+        """Moves the enemies due on this tick and returns them."""
+        moved = []
+        for enemy in self.enemy_moves.pop(tick):
+            if enemy.status != 'ACTIVE':
+                continue  # destroyed since it was scheduled
+            enemy.move()
+            self._schedule_enemy(enemy, tick)
+            moved.append(enemy)
+        return moved
+
+    # --- Missiles ---
+
+    def schedule_missile(self, missile, launch_tick):
+        """
+        Works out when the missile resolves. After k updates it has taken
+        min(k * speed, len(path)) steps; it arrives when the path is used up and is
+        otherwise intercepted if it ends the update inside an HSS kill zone.
+        """
+        path = missile.path
+        speed = max(missile.speed, 1)
+        k = 1
+        while True:
+            steps = min(k * speed, len(path))
+            if steps == len(path):
+                self.missile_events.schedule(launch_tick + k, (missile, None))
+                return
+            position = path[steps - 1]
+            for hss_tile in self.registry.hss_sites:
+                dist_sq = (position['x'] - hss_tile.x) ** 2 + (position['y'] - hss_tile.y) ** 2
+                if dist_sq <= hss_tile.properties['kill_zone_radius'] ** 2:
+                    self.missile_events.schedule(launch_tick + k, (missile, hss_tile))
+                    return
+            k += 1
+
+    def missile_events_due(self, tick):
+        """[(missile, intercepting HSS tile or None)] resolving on 'tick'."""
+        return self.missile_events.pop(tick)
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# FILE: benchmark.py
+"""
+Benchmark suite for the simulation hot paths.
+
+Every sweep point runs in a fresh process (settings such as GRID_WIDTH are read
+once at import time): a seeded, headless scenario without network calls is
+played for --ticks ticks, timing every SimulationEngine.tick, and the
+micro-benchmarks then run on the state the scenario left behind:
+  grid_visible_tiles    Grid.get_visible_tiles at random positions
+  drone_pathfind        DroneAgent._bfs_pathfind_avoid_hss between random empty tiles
+  missile_pathfind      MissileSystem._find_path_on_known_map from the launch site
+  check_hss_threats     SimulationEngine.check_hss_threats
+  logger_tick_state     SimulationLogger.log_tick_state with the scenario's history
+  visualizer_draw       Visualizer.draw after each tick (SDL dummy video driver)
+  engine_tick           SimulationEngine.tick over the whole scenario
+
+Sweeps vary one axis at a time around the baseline (50x50 grid, 10 drones,
+2+2 enemies, scan radius 5):
+    python benchmark.py run --grid 40,50,100 --drones 5,10,20 --enemies 1,2,4 --scan-radius 3,5,8
+    python benchmark.py plot logs/benchmarks/bench-20260101-120000.json
+
+With --memory each scenario is played a second time under tracemalloc (see
+memory_profiler.py) to record peak memory by subsystem; --baseline compares the
+peaks with an earlier results file and exits with status 1 on a regression.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+# Grid places HSS sites at least 15 tiles from every edge; smaller maps leave no room for them
+MIN_GRID = 35
+BASELINE = {"grid": 50, "drones": 10, "enemies": 2, "scan_radius": 5}
+AXES = ("grid", "drones", "enemies", "scan_radius")
+AXIS_LABELS = {"grid": "grid size (tiles per side)", "drones": "drones",
+               "enemies": "stationary + moving enemies (each)", "scan_radius": "scan radius (tiles)"}
+BENCHMARKS = ("grid_visible_tiles", "drone_pathfind", "missile_pathfind", "check_hss_threats",
+              "logger_tick_state", "visualizer_draw", "engine_tick")
+
+def point_environment(point, strategist):
+    """Settings for one sweep point, as environment variables for the worker process."""
+    env = {
+        "GRID_WIDTH": str(point["grid"]), "GRID_HEIGHT": str(point["grid"]),
+        "NUM_DRONES": str(point["drones"]),
+        "NUM_STATIONARY_ENEMIES": str(point["enemies"]), "NUM_MOVING_ENEMIES": str(point["enemies"]),
+        "DRONE_SCAN_RADIUS": str(point["scan_radius"]),
+        # Visualization is imported so Visualizer.draw can be measured; the engine itself runs headless
+        "ENABLE_VISUALIZATION": "true", "SDL_VIDEODRIVER": "dummy", "SDL_AUDIODRIVER": "dummy",
+        "LIVE_VIEW": "false", "LLM_CACHE_MODE": "off", "FAST_FORWARD": "false", "HYBRID_PLANNING": "false",
+        "API_KEY": os.environ.get("API_KEY") or "unused",
+    }
+    if strategist == "mock":
+        env.update({"STRATEGIST_BACKEND": "llm", "MOCK_LLM_RESPONSE": "true"})
+    else:
+        env.update({"STRATEGIST_BACKEND": "local", "MOCK_LLM_RESPONSE": "false"})
+    return env
+
+def sweep_points(axes):
+    """Unique points of the one-axis-at-a-time sweeps; the baseline is shared by all axes."""
+    points = [dict(BASELINE)]
+    for axis, values in axes.items():
+        for value in values:
+            point = dict(BASELINE, **{axis: value})
+            if point not in points:
+                points.append(point)
+    return points
+
+# --- Measurement (worker process) ---------------------------------------------
+
+def _percentile(values, q):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+def _summarize(samples):
+    """Per-call statistics in microseconds."""
+    if not samples:
+        return {"calls": 0}
+    return {
+        "calls": len(samples),
+        "mean_us": sum(samples) / len(samples) * 1e6,
+        "p50_us": _percentile(samples, 0.5) * 1e6, "p95_us": _percentile(samples, 0.95) * 1e6,
+        "p99_us": _percentile(samples, 0.99) * 1e6,
+    }
+
+def _measure(call, inputs, min_seconds, max_calls):
+    """Times call(*args) over 'inputs' (cycled) until min_seconds have been spent or max_calls made."""
+    samples = []
+    spent = 0.0
+    while len(samples) < max_calls and (spent < min_seconds or len(samples) < 5):
+        args = inputs[len(samples) % len(inputs)]
+        start = time.perf_counter()
+        call(*args)
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed)
+        spent += elapsed
+    return _summarize(samples)
+
+def _run_point(job):
+    """Worker process: plays the scenario for one sweep point and runs the micro-benchmarks."""
+    point, options = job
+    sys.stdout = open(os.devnull, 'w')  # the simulation is chatty
+    from config import DRONE_SCAN_RADIUS
+    from simulation_logger import SimulationLogger
+
+    log_dir = tempfile.mkdtemp(prefix="bench-")
+    engine = _start_scenario(options["seed"], os.path.join(log_dir, "scenario.json"))
+    tick_samples = []
+    while engine.current_tick < options["ticks"] and not engine.game_over:
+        start = time.perf_counter()
+        engine.tick()
+        tick_samples.append(time.perf_counter() - start)
+        engine.check_game_over()
+    scenario = {
+        "ticks": engine.current_tick, "seconds": sum(tick_samples),
+        "ticks_per_second": len(tick_samples) / sum(tick_samples) if tick_samples else None,
+        "result": engine.game_over_message or "RUNNING",
+        "coverage": engine.central_strategist.known_map.coverage_ratio(),
+        "active_drones": engine.registry.active_drone_count,
+        "peak_rss_kib": _peak_rss_kib(),
+    }
+
+    # Inputs are drawn from a separate stream so every point sees the same kind of queries
+    rng = random.Random(options["seed"])
+    grid = engine.grid
+    open_tiles = [(t.x, t.y) for column in grid.tiles for t in column if t.type in ('EMPTY', 'BASE')]
+    positions = [rng.choice(open_tiles) for _ in range(64)]
+    pairs = [(rng.choice(open_tiles), rng.choice(open_tiles)) for _ in range(64)]
+    known_tiles = engine.central_strategist.world_model['known_tiles']
+    targets = [{'x': x, 'y': y} for x, y in (rng.sample(sorted(known_tiles), min(64, len(known_tiles)))
+                                             if known_tiles else positions)]
+    min_seconds, max_calls = options["min_seconds"], options["max_calls"]
+
+    micro = {}
+    micro["grid_visible_tiles"] = _measure(lambda x, y: grid.get_visible_tiles(x, y, DRONE_SCAN_RADIUS),
+                                           positions, min_seconds, max_calls)
+
+    drone = engine.drones[0]
+    saved_position = drone.position
+
+    def pathfind(start, target):
+        drone.position = {'x': start[0], 'y': start[1]}
+        drone._bfs_pathfind_avoid_hss(*target)
+    micro["drone_pathfind"] = _measure(pathfind, pairs, min_seconds, max_calls)
+    drone.position = saved_position
+
+    launch_site = {'x': 5, 'y': 5}
+    micro["missile_pathfind"] = _measure(
+        lambda target: engine.missile_system._find_path_on_known_map(launch_site, target, known_tiles),
+        [(t,) for t in targets], min_seconds, max_calls)
+
+    micro["check_hss_threats"] = _measure(engine.check_hss_threats, [()], min_seconds, max_calls)
+
+    logger = engine.logger
+    micro["logger_tick_state"] = _measure(
+        lambda: logger.log_tick_state(engine.current_tick, engine.drones, engine.moving_enemies, engine.active_missiles),
+        [()], min_seconds, max_calls)
+    micro["logger_tick_state"]["history_ticks"] = len(logger.log_data["tick_data"])
+
+    try:
+        from visualizer import Visualizer
+        visualizer = Visualizer(engine)
+        visualizer.draw()  # first frame renders the static layer
+        draw_samples = []
+        engine.logger = SimulationLogger(None)
+        while len(draw_samples) < options["draw_frames"]:
+            if not engine.game_over:  # a finished run keeps redrawing its last state
+                engine.tick()
+                engine.check_game_over()
+            start = time.perf_counter()
+            visualizer.draw()
+            draw_samples.append(time.perf_counter() - start)
+        micro["visualizer_draw"] = _summarize(draw_samples)
+        # SDL catches SIGTERM while initialized, which would keep the pool from stopping this worker
+        import pygame
+        pygame.quit()
+    except Exception as e:  # no pygame / SDL on this machine
+        micro["visualizer_draw"] = {"skipped": str(e)}
+
+    micro["engine_tick"] = _summarize(tick_samples)
+    engine.close()
+    result = {"point": point, "scenario": scenario, "micro": micro}
+    if options["memory"]:
+        result["memory"] = _memory_pass(options, os.path.join(log_dir, "memory.json"))
+    shutil.rmtree(log_dir, ignore_errors=True)
+    return result
+
+def _start_scenario(seed, log_file):
+    """A new seeded engine, logged and with its first orders, as SimulationEngine.run starts it."""
+    from simulation_engine import SimulationEngine
+    random.seed(seed)
+    engine = SimulationEngine(log_file=log_file, headless=True)
+    engine.logger.log_initial_state(engine.grid)
+    engine.logger.log_tick_state(0, engine.drones, engine.moving_enemies, engine.active_missiles)
+    engine._distribute_commands()
+    return engine
+
+def _memory_pass(options, log_file):
+    """Plays the scenario again under tracemalloc and returns the memory profile summary."""
+    from memory_profiler import MemoryProfiler
+    profiler = MemoryProfiler(interval=max(1, options["ticks"] // 4))
+    profiler.start()
+    engine = _start_scenario(options["seed"], log_file)
+    profiler.sample(0)
+    while engine.current_tick < options["ticks"] and not engine.game_over:
+        engine.tick()
+        engine.check_game_over()
+        profiler.sample(engine.current_tick)
+    profiler.sample(engine.current_tick, force=True)
+    engine.close()
+    profiler.stop()
+    return profiler.summary()
+
+def _peak_rss_kib():
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+# --- Runner ----------------------------------------------------------------------
+
+def run_suite(args):
+    axes = {axis: values for axis, values in (("grid", args.grid), ("drones", args.drones),
+                                              ("enemies", args.enemies), ("scan_radius", args.scan_radius)) if values}
+    points = sweep_points(axes)
+    options = {"seed": args.seed, "ticks": args.ticks, "min_seconds": args.min_seconds,
+               "max_calls": args.max_calls, "draw_frames": args.draw_frames,
+               "memory": args.memory or bool(args.baseline)}
+    print(f"Running {len(points)} sweep points ({args.strategist} strategist, seed {args.seed}, {args.ticks} ticks each).")
+
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for point in points:
+        # The spawned worker inherits this environment and imports config afresh
+        saved = dict(os.environ)
+        os.environ.update(point_environment(point, args.strategist))
+        os.environ.update(kv.split('=', 1) for kv in args.env)
+        try:
+            with context.Pool(1) as pool:
+                result = pool.apply(_run_point, ((point, options),))
+        finally:
+            os.environ.clear()
+            os.environ.update(saved)
+        results.append(result)
+        print_point(result)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "options": dict(options, strategist=args.strategist, env=args.env),
+        "baseline": BASELINE, "axes": axes, "results": results,
+    }
+    path = args.json or os.path.join("logs", "benchmarks", time.strftime("bench-%Y%m%d-%H%M%S.json"))
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to '{path}'. Plot with: python benchmark.py plot {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if check_memory(report, baseline, args.memory_tolerance):
+            sys.exit(1)
+
+def check_memory(report, baseline, tolerance):
+    """Compares traced peak memory with a baseline results file; returns the points that regressed."""
+    previous = {json.dumps(r["point"], sort_keys=True): r["memory"] for r in baseline["results"] if "memory" in r}
+    regressions = []
+    print(f"\nPeak memory against baseline (tolerance {tolerance:.0%}):")
+    for result in report["results"]:
+        before = previous.get(json.dumps(result["point"], sort_keys=True))
+        if before is None:
+            print(f"  {result['point']}: not in baseline")
+            continue
+        old, new = before["peak_bytes"], result["memory"]["peak_bytes"]
+        change = new / old - 1 if old else 0.0
+        regressed = new > old * (1 + tolerance)
+        print(f"  {result['point']}: {old / 2**20:.2f} -> {new / 2**20:.2f} MiB ({change:+.1%})"
+              + ("  REGRESSION" if regressed else ""))
+        if regressed:
+            regressions.append(result["point"])
+    if regressions:
+        print(f"MEMORY REGRESSION at {len(regressions)} point(s).")
+    return regressions
+
+def print_point(result):
+    point, scenario = result["point"], result["scenario"]
+    print(f"\n{point}  {scenario['ticks']} ticks, {scenario['ticks_per_second'] or 0:.0f} ticks/s, "
+          f"coverage {scenario['coverage']:.0%}, {scenario['result']}")
+    print(f"  {'benchmark':<20} {'calls':>6} {'mean us':>10} {'p50 us':>10} {'p95 us':>10}")
+    for name in BENCHMARKS:
+        stats = result["micro"][name]
+        if "skipped" in stats or not stats["calls"]:
+            print(f"  {name:<20} skipped: {stats.get('skipped', 'no calls')}")
+            continue
+        print(f"  {name:<20} {stats['calls']:>6} {stats['mean_us']:>10.1f} {stats['p50_us']:>10.1f} {stats['p95_us']:>10.1f}")
+    if "memory" in result:
+        memory = result["memory"]
+        print(f"  memory: peak {memory['peak_bytes'] / 2**20:.2f} MiB traced; KiB at tick {memory['final_tick']}: "
+              + ", ".join(f"{name} {size / 1024:.0f}" for name, size in memory["final_bytes"].items()))
+
+def axis_series(report, axis, benchmark, statistic="mean_us"):
+    """[(axis value, statistic)] for one benchmark along one sweep axis, in axis order."""
+    series = []
+    for value in sorted(set(report["axes"].get(axis, [])) | {report["baseline"][axis]}):
+        point = dict(report["baseline"], **{axis: value})
+        for result in report["results"]:
+            stats = result["micro"][benchmark]
+            if result["point"] == point and statistic in stats:
+                series.append((value, stats[statistic]))
+    return series
+
+def plot_report(args):
+    with open(args.results, encoding='utf-8') as f:
+        report = json.load(f)
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("Plotting needs matplotlib (pip install matplotlib). Scaling tables:")
+        for axis in report["axes"]:
+            print(f"\n{AXIS_LABELS[axis]}")
+            for benchmark in BENCHMARKS:
+                series = axis_series(report, axis, benchmark)
+                print(f"  {benchmark:<20} " + "  ".join(f"{v}: {us:.1f}us" for v, us in series))
+        return
+
+    out_dir = args.out_dir or os.path.splitext(args.results)[0]
+    os.makedirs(out_dir, exist_ok=True)
+    for axis in report["axes"]:
+        fig, ax = plt.subplots(figsize=(8, 5))
+        for benchmark in BENCHMARKS:
+            series = axis_series(report, axis, benchmark)
+            if series:
+                ax.plot([v for v, _ in series], [us for _, us in series], marker='o', label=benchmark)
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel(AXIS_LABELS[axis])
+        ax.set_ylabel("mean time per call (us)")
+        ax.set_title(f"Scaling with {AXIS_LABELS[axis]}")
+        ax.grid(True, which='both', alpha=0.3)
+        ax.legend(fontsize=8)
+        path = os.path.join(out_dir, f"scaling_{axis}.png")
+        fig.tight_layout()
+        fig.savefig(path, dpi=120)
+        plt.close(fig)
+        print(f"Wrote '{path}'.")
+
+# --- CLI ---------------------------------------------------------------------
+
+def _int_list(text):
+    return [int(v) for v in text.split(',') if v]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite for the simulation hot paths.")
+    sub = parser.add_subparsers(dest="mode", required=True)
+    run = sub.add_parser("run", help="Run the scenario and micro-benchmarks over the sweeps")
+    run.add_argument("--grid", type=_int_list, default=[], help=f"Grid sizes to sweep (>= {MIN_GRID}), e.g. 40,50,100")
+    run.add_argument("--drones", type=_int_list, default=[], help="Drone counts to sweep")
+    run.add_argument("--enemies", type=_int_list, default=[], help="Stationary and moving enemy counts (each) to sweep")
+    run.add_argument("--scan-radius", type=_int_list, default=[], help="Scan radii to sweep")
+    run.add_argument("--ticks", type=int, default=200, help="Scenario length per point")
+    run.add_argument("--seed", type=int, default=1)
+    run.add_argument("--strategist", choices=["local", "mock"], default="local",
+                     help="local: deterministic frontier planner; mock: MOCK_LLM_RESPONSE through the LLM pipeline")
+    run.add_argument("--min-seconds", type=float, default=0.2, help="Minimum time spent per micro-benchmark")
+    run.add_argument("--max-calls", type=int, default=2000, help="Maximum calls per micro-benchmark")
+    run.add_argument("--draw-frames", type=int, default=50, help="Frames drawn for visualizer_draw")
+    run.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                     help="Extra settings for every point, e.g. --env REPORT_DEDUP=off")
+    run.add_argument("--memory", action="store_true",
+                     help="Replay each scenario under tracemalloc and record peak memory by subsystem (slow)")
+    run.add_argument("--baseline", help="Earlier results file; fail if peak memory grew beyond --memory-tolerance (implies --memory)")
+    run.add_argument("--memory-tolerance", type=float, default=0.10, help="Allowed peak memory growth (0.10 = 10%%)")
+    run.add_argument("--json", help="Results file (default: logs/benchmarks/bench-<timestamp>.json)")
+    plot = sub.add_parser("plot", help="Draw scaling plots from a results file")
+    plot.add_argument("results")
+    plot.add_argument("--out-dir", help="Folder for the PNGs (default: next to the results file)")
+    args = parser.parse_args()
+
+    if args.mode == "run":
+        if any(size < MIN_GRID for size in args.grid):
+            parser.error(f"grid sizes below {MIN_GRID} leave no room for the HSS sites")
+        run_suite(args)
+    else:
+        plot_report(args)
+
+if __name__ == '__main__':
+    main()
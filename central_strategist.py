@@ -1,16 +1,26 @@
 # FILE: central_strategist.py
-import openai
 import json
-import threading
 import time
 from config import *
+from frontier_planner import FrontierPlanner
+from intel_store import IntelligenceStore
+from known_map import KnownMap
+from llm_cache import LLMResponseCache, request_key
+from llm_pipeline import AsyncLLMPipeline
+from prompt_encoding import PromptEncoder
 
 class CentralStrategist:
     """Collects information, makes plans with GPT-4o and sends commands."""
     def __init__(self, grid):
         self.llm_api_key = API_KEY
         self.llm_model = LLM_MODEL
-        self.client = openai.OpenAI(api_key=self.llm_api_key)
+        # Tüm LLM istekleri tek bir event loop ve ortak bağlantı havuzu üzerinden yürür
+        self.llm = AsyncLLMPipeline(self.llm_api_key)
+        # Kayıt/oynatma önbelleği: aynı istem için iki kez ödeme yapma, kayıtlı oturumları çevrimdışı tekrar oynat
+        self.llm_cache = LLMResponseCache(LLM_CACHE_PATH, LLM_CACHE_MODE, LLM_CACHE_NEAR_MISS)
+        self._offline_results = []
+        # 'compact': küçültülmüş, tablo halinde ve son plandan beri değişenleri öne çıkaran istem
+        self.prompt_encoder = PromptEncoder() if PROMPT_FORMAT == 'compact' else None
         self.grid = grid
         self.world_model = {
             "grid_size": {"width": GRID_WIDTH, "height": GRID_HEIGHT},
@@ -20,15 +30,24 @@ class CentralStrategist:
             "known_moving_enemies": {},
             "potential_threat_zones": []
         }
+        # Bilinen harita için yoğun raster ve artımlı özetler (sayılar, sınırlar, bölge kapsamı, engeller)
+        self.known_map = KnownMap(grid.width, grid.height)
+        # Drone'larla paylaşılan tek, sürümlü istihbarat kopyası (engeller ve tehdit bölgeleri)
+        self.intel = IntelligenceStore(self.known_map.types)
+        # LLM'siz, deterministik sınır (frontier) tabanlı planlayıcı: hızlı temel çizgi ve LLM yedeği
+        self.local_planner = FrontierPlanner(self.known_map)
+        self._fleet = None
         self.current_tick = 0
         # DRONE'LARIN SON GÖREVLERİNİ TAKİP ETMEK İÇİN YENİ BİR YAPI
         self.drone_last_command_tick = {}
         
-        # Threading support for non-blocking LLM calls
-        self.llm_thread = None
-        self.llm_result = None
-        self.llm_in_progress = False
-        self.llm_lock = threading.Lock()
+        # In-flight LLM requests: drone group id -> tick the request was started
+        self.pending_requests = {}
+        self.last_llm_latency = None
+
+    @property
+    def llm_in_progress(self):
+        return bool(self.pending_requests)
 
 
     def collect_reports(self, reports, current_tick):
@@ -37,11 +56,20 @@ class CentralStrategist:
         for report in reports:
             if not report: continue
             
-            # Process tile scan results
+            # Process tile scan results; tiles already known as reported cost one raster lookup
+            known_map = self.known_map
             for tile_data in report['scan_results']:
                 x, y = tile_data['position']['x'], tile_data['position']['y']
+                learned = known_map.integrate(x, y, tile_data['type'])
+                if not learned:
+                    continue
                 self.world_model['known_tiles'][(x,y)] = tile_data
-                self.grid.get_tile(x, y).is_known_by_strategist = True
+                if learned == 'new':
+                    self.grid.tiles[x][y].is_known_by_strategist = True
+                if tile_data['type'] == 'OBSTACLE':
+                    self.intel.add_obstacle(x, y)
+                elif learned == 'changed':
+                    self.intel.remove_obstacle(x, y)
 
                 if tile_data['type'] == 'STATIONARY_ENEMY':
                     enemy_id = tile_data['properties']['enemy_id']
@@ -60,6 +88,7 @@ class CentralStrategist:
                     "position": enemy_data['position'],
                     "last_seen_tick": self.current_tick
                 }
+        self.intel.publish()
 
     def add_threat_zone(self, drone_position):
         """Identifies HSS location and radius when a drone is destroyed."""
@@ -73,26 +102,36 @@ class CentralStrategist:
                     if dist_sq <= hss_radius**2:
                         is_known = any(z.get('hss_location') == {'x': x, 'y': y} for z in self.world_model['potential_threat_zones'])
                         if not is_known:
-                            self.world_model['potential_threat_zones'].append({
-                                "hss_location": {"x": x, "y": y}, "radius": hss_radius, "confidence": "CONFIRMED"
-                            })
+                            zone = {"hss_location": {"x": x, "y": y}, "radius": hss_radius, "confidence": "CONFIRMED"}
+                            self.world_model['potential_threat_zones'].append(zone)
+                            self.intel.add_threat_zone(zone)
+                            self.intel.publish()
                             print(f"STRATEGIST: HSS DISCOVERED! Location: ({x},{y}), Radius: {hss_radius}")
                         return
         print(f"STRATEGIST: Warning - Drone lost but no HSS found at {drone_position}")
 
-    def _format_state_for_llm(self, tick, drones, missile_system, moving_enemies, active_missiles):
-        """Converts current world model to JSON for the LLM."""
-        known_obstacles = [{'x': x, 'y': y} for (x,y), tile in self.world_model['known_tiles'].items() if tile['type'] == 'OBSTACLE']
+    def _format_state_for_llm(self, tick, drones, missile_system, moving_enemies, active_missiles, lookahead=0):
+        """
+        Converts current world model to JSON for the LLM. With 'lookahead' > 0 the state is
+        predicted that many ticks ahead: drones are advanced along their planned paths.
+        """
+        tick += lookahead
         known_stationary_list = [{"id": eid, **edata} for eid, edata in self.world_model['known_stationary_enemies'].items()]
         known_moving_list = [{"id": eid, **edata} for eid, edata in self.world_model['known_moving_enemies'].items()]
         
         drones_state = []
         for d in drones:
+            position, battery = d.position, d.battery
+            if lookahead and d.status == 'ACTIVE' and d.path:
+                steps = min(lookahead, len(d.path))
+                position, battery = d.path[steps - 1], battery - steps * COST_MOVE
             state = {
                 "id": d.id, 
                 "status": d.status, 
-                "battery": round(d.battery, 2), 
-                "position": d.position,
+                "battery": round(battery, 2), 
+                "position": position,
+                "target_position": d.target_position,
+                "scan_mode": d.scan_mode,
                 # LLM'e hangi drone'un ne kadar süredir boşta olduğunu söyleyelim
                 "ticks_since_last_command": tick - self.drone_last_command_tick.get(d.id, 0)
             }
@@ -108,15 +147,8 @@ class CentralStrategist:
                     "eta_ticks": len(missile.path) // missile.speed + (1 if len(missile.path) % missile.speed else 0)
                 })
 
-        # BİLİNEN DÜNYANIN SINIRLARINI HESAPLAYALIM
-        known_x = [pos[0] for pos in self.world_model['known_tiles'].keys()]
-        known_y = [pos[1] for pos in self.world_model['known_tiles'].keys()]
-        map_boundaries = {
-            "min_x": min(known_x) if known_x else 0,
-            "max_x": max(known_x) if known_x else 0,
-            "min_y": min(known_y) if known_y else 0,
-            "max_y": max(known_y) if known_y else 0,
-        }
+        # BİLİNEN DÜNYANIN SINIRLARI (known_map içinde artımlı olarak tutulur)
+        map_boundaries = self.known_map.explored_bounds()
 
         return {
             "tick": tick,
@@ -128,41 +160,109 @@ class CentralStrategist:
                 "grid_size": self.world_model['grid_size'],
                 "base_location": self.world_model['base_location'],
                 "map_boundaries_explored": map_boundaries, # LLM'E YENİ BİLGİ
-                "known_obstacles_count": len(known_obstacles), # Detay yerine özet verelim
+                "known_obstacles_count": self.known_map.count('OBSTACLE'), # Detay yerine özet verelim
                 "known_stationary_enemies": known_stationary_list,
                 "known_moving_enemies": known_moving_list,
                 "potential_threat_zones": self.world_model['potential_threat_zones']
             }
         }
 
-    def plan_next_moves(self, current_tick, drones, missile_system, moving_enemies, active_missiles):
+    def plan_next_moves(self, current_tick, drones, missile_system, moving_enemies, active_missiles, lookahead=0):
         """
-        Plans next moves using LLM. Uses threading to avoid blocking the main simulation loop.
-        Returns immediately with cached results or None if LLM is still processing.
+        Plans next moves using LLM. Starts a request for every drone group that has none
+        in flight (requests run concurrently on the async LLM pipeline) and returns the
+        plans that already arrived, merged, or None if nothing is ready yet.
+        With STRATEGIST_BACKEND=local the frontier planner answers immediately instead.
+        'lookahead' plans for the state predicted that many ticks ahead (speculative requests).
         """
+        if STRATEGIST_BACKEND == 'local':
+            self.current_tick = current_tick
+            return self.local_plan(drones, missile_system, active_missiles)
+
+        self._fleet = (drones, missile_system, active_missiles)
+        ready_plan = self.poll_ready_plans(current_tick)
+
+        full_state = None
+        for group_id, group_drones, sector in self._drone_groups(drones):
+            if group_id in self.pending_requests:
+                continue
+            if full_state is None:
+                full_state = self._format_state_for_llm(current_tick, drones, missile_system, moving_enemies, active_missiles, lookahead)
+            world_state = full_state
+            if sector:
+                group_ids = {d.id for d in group_drones}
+                world_state = dict(full_state, assigned_sector=sector,
+                                   drones=[d for d in full_state["drones"] if d["id"] in group_ids])
+            self._start_llm_call_async(group_id, world_state)
+
+        return ready_plan
+
+    def poll_ready_plans(self, current_tick):
+        """Returns the merged plans that finished since the last call, or None. Never blocks."""
         self.current_tick = current_tick
-        
-        # Check if we have a completed LLM result
-        with self.llm_lock:
-            if self.llm_result is not None:
-                result = self.llm_result
-                self.llm_result = None
-                self.llm_in_progress = False
-                return result
-        
-        # If no LLM call is in progress, start a new one
-        if not self.llm_in_progress:
-            world_state = self._format_state_for_llm(current_tick, drones, missile_system, moving_enemies, active_missiles)
-            self._start_llm_call_async(world_state)
-        
-        # Return None while LLM is processing (simulation continues with existing commands)
-        return None
+        finished = self.llm.drain()
+        if self._offline_results:
+            finished.extend(self._offline_results)
+            self._offline_results = []
+        if not finished:
+            return None
+
+        reasoning, commands = [], []
+        llm_failed = False
+        requested_tick = self.current_tick
+        for group_id, response_json, latency in finished:
+            requested_tick = min(requested_tick, self.pending_requests.pop(group_id, self.current_tick))
+            self.last_llm_latency = latency
+            if response_json is None:
+                llm_failed = True
+                continue
+            if response_json.get('reasoning'):
+                reasoning.append(response_json['reasoning'] if len(finished) == 1 else f"[{group_id}] {response_json['reasoning']}")
+            commands.extend(response_json.get('commands', []))
+
+        if llm_failed and self._fleet:
+            # Failed or timed out LLM calls: the local planner covers idle and low-battery drones
+            local = self.local_plan(*self._fleet)
+            reasoning.append(f"LLM request failed. {local['reasoning']}")
+            commands.extend(local['commands'])
+
+        # Update command tick tracking
+        for cmd in commands:
+            if 'drone_id' in cmd:
+                self.drone_last_command_tick[cmd['drone_id']] = self.current_tick
+        return {"reasoning": "\n".join(reasoning), "commands": commands, "requested_tick": requested_tick}
+
+    def has_ready_plans(self):
+        """True if poll_ready_plans would return something now."""
+        return bool(self._offline_results) or self.llm.has_results()
+
+    def local_plan(self, drones, missile_system, active_missiles):
+        """Plans with the frontier planner; same output format as the LLM."""
+        plan = self.local_planner.plan(drones, self.world_model, missile_system.missile_count, active_missiles)
+        for cmd in plan['commands']:
+            if 'drone_id' in cmd:
+                self.drone_last_command_tick[cmd['drone_id']] = self.current_tick
+        return plan
+
+    def _drone_groups(self, drones):
+        """
+        Splits the fleet for concurrent sub-strategists. With STRATEGIST_SECTORS > 1 every
+        group gets its own vertical map sector; otherwise a single group plans for everyone.
+        """
+        if STRATEGIST_SECTORS <= 1:
+            return [("main", drones, None)]
+        sector_width = self.grid.width / STRATEGIST_SECTORS
+        groups = []
+        for k in range(STRATEGIST_SECTORS):
+            members = [d for i, d in enumerate(drones) if i % STRATEGIST_SECTORS == k]
+            if members:
+                sector = {"x_range": [int(k * sector_width), int((k + 1) * sector_width) - 1],
+                          "y_range": [0, self.grid.height - 1]}
+                groups.append((f"sector-{k + 1}", members, sector))
+        return groups
     
-    def _start_llm_call_async(self, world_state):
-        """Starts an LLM call in a background thread."""
-        with self.llm_lock:
-            self.llm_in_progress = True
-        
+    def _start_llm_call_async(self, group_id, world_state):
+        """Submits an LLM planning request for one drone group to the async pipeline."""
         # =================================================================
         # YENİ VE GÜÇLENDİRİLMİŞ SYSTEM PROMPT
         # =================================================================
@@ -211,54 +311,60 @@ Ana hedefin: Tüm düşmanları en az drone kaybıyla yok etmek. Öncelikli gör
 - Cevabın TEK BİR GEÇERLİ JSON objesi olmalıdır. Her aktif ve görevi olmayan drone için komut oluştur.
 """
 
-        # Start the LLM call in a background thread
-        self.llm_thread = threading.Thread(target=self._llm_worker_thread, args=(system_prompt, world_state))
-        self.llm_thread.daemon = True
-        self.llm_thread.start()
-    
-    def _llm_worker_thread(self, system_prompt, world_state):
-        """Worker thread that makes the LLM API call."""
-        try:
-            # Make the LLM call
-            if not MOCK_LLM_RESPONSE:
-                response_json = self._get_llm_response(system_prompt, world_state)
-            else:
-                response_json = {"reasoning": "Mock: Sending D-1 to explore NE, D-2 to explore SW.",
-                                 "commands": [
-                                     {"command_type": "MOVE_DRONE", "drone_id": "D-1", "target_position": {"x": 45, "y": 45}},
-                                     {"command_type": "MOVE_DRONE", "drone_id": "D-2", "target_position": {"x": 5, "y": 35}}
-                                 ]}
-            
-            # Update command tick tracking
-            if response_json and 'commands' in response_json:
-                for cmd in response_json['commands']:
-                    if 'drone_id' in cmd:
-                        self.drone_last_command_tick[cmd['drone_id']] = self.current_tick
-            
-            # Store the result safely
-            with self.llm_lock:
-                self.llm_result = response_json
-                
-        except Exception as e:
-            print(f"LLM Worker Thread Error: {e}")
-            # Store error result
-            with self.llm_lock:
-                self.llm_result = {"reasoning": "API error occurred, all units on standby.", "commands": []}
-
-    def _get_llm_response(self, system_prompt, world_state):
+        if 'assigned_sector' in world_state:
+            system_prompt += """
+# BÖLÜM 6: SEKTÖR ALT-STRATEJİSTİ
+- Sen filonun bir bölümünü yöneten bir alt-stratejistsin. SADECE `drones` listesindeki drone'lara komut ver.
+- Keşif hedeflerini `assigned_sector` sınırları içinde seç. Diğer sektörlere başka alt-stratejistler bakıyor.
+"""
+
+        if self.prompt_encoder:
+            system_prompt += self.prompt_encoder.static_context(world_state)
+            user_content = self.prompt_encoder.encode(group_id, world_state)
+        else:
+            user_content = json.dumps(world_state, indent=2)
+
+        # Anahtar gönderilen metinden şimdi hesaplanır: world_state canlı nesnelere referans tutar (ör. hareketli
+        # düşman pozisyonları) ve istek döngü thread'inde işlenene kadar değişebilir
+        cache_key = request_key(system_prompt, user_content) if self.llm_cache.enabled else None
+
+        self.pending_requests[group_id] = self.current_tick
+        # Mock and replay need no network: the plan is ready on the next poll, so runs are repeatable
+        # (and do not depend on how fast the event loop thread or the rate limiter answers)
+        if MOCK_LLM_RESPONSE:
+            self._offline_results.append((group_id, self._mock_plan(world_state), 0.0))
+            return
+        if self.llm_cache.offline:
+            response_json = self.llm_cache.lookup(cache_key, system_prompt, world_state)
+            self._offline_results.append((group_id, response_json, 0.0))
+            return
+        # On error/timeout the pipeline delivers None and poll_ready_plans falls back to the local planner
+        self.llm.submit(group_id, lambda: self._get_llm_response(system_prompt, world_state, user_content, cache_key), None)
+
+    @staticmethod
+    def _mock_plan(world_state):
+        """Fixed test plan used with MOCK_LLM_RESPONSE."""
+        response_json = {"reasoning": "Mock: Sending D-1 to explore NE, D-2 to explore SW.",
+                         "commands": [
+                             {"command_type": "MOVE_DRONE", "drone_id": "D-1", "target_position": {"x": 45, "y": 45}},
+                             {"command_type": "MOVE_DRONE", "drone_id": "D-2", "target_position": {"x": 5, "y": 35}}
+                         ]}
+        # Sub-strategists only command their own drones
+        group_ids = {d['id'] for d in world_state['drones']}
+        response_json['commands'] = [cmd for cmd in response_json['commands'] if cmd['drone_id'] in group_ids]
+        return response_json
+
+    async def _get_llm_response(self, system_prompt, world_state, user_content, cache_key=None):
+        if cache_key:
+            cached_json = self.llm_cache.lookup(cache_key, system_prompt, world_state)
+            if cached_json is not None:
+                print("Strategist answered from LLM cache.")
+                return cached_json
+
         print("Strategist thinking... (Making LLM API call)")
-        try:
-            response = self.client.chat.completions.create(
-                model=self.llm_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": json.dumps(world_state, indent=2)}
-                ],
-                response_format={"type": "json_object"}
-            )
-            llm_output = response.choices[0].message.content
-            print("Response from Strategist:", llm_output)
-            return json.loads(llm_output)
-        except Exception as e:
-            print(f"LLM API Error: {e}")
-            return {"reasoning": "API error occurred, all units on standby.", "commands": []}
\ No newline at end of file
+        start_time = time.time()
+        response_json = await self.llm.chat_json(self.llm_model, system_prompt, user_content)
+        print("Response from Strategist:", json.dumps(response_json, ensure_ascii=False))
+        if cache_key:
+            self.llm_cache.record(cache_key, system_prompt, world_state, response_json, time.time() - start_time)
+        return response_json
@@ -6,6 +6,8 @@ load_dotenv()
 
 # API Configuration
 API_KEY = os.getenv("API_KEY")
+# OpenAI-compatible endpoint, e.g. http://127.0.0.1:8089/v1 for llm_stub_server.py (default: OpenAI)
+LLM_BASE_URL = os.getenv("LLM_BASE_URL") or None
 
 # Simulation Settings (can be overridden by environment variables)
 GRID_WIDTH = int(os.getenv("GRID_WIDTH", 50))
@@ -32,11 +34,37 @@ LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o")
 MOCK_LLM_RESPONSE = os.getenv("MOCK_LLM_RESPONSE", "false").lower() == "true"
 # How often (in ticks) the strategist calls the LLM for new commands
 LLM_CALL_FREQUENCY = int(os.getenv("LLM_CALL_FREQUENCY", 10))
+# Async LLM pipeline: concurrent requests, request rate limit and per-request timeout
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 4))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", 60))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 60))
+# Strategist backend: 'llm' (LLM plans, local planner covers failed/timed out calls) or 'local' (frontier planner only)
+STRATEGIST_BACKEND = os.getenv("STRATEGIST_BACKEND", "llm").lower()
+# Hybrid planning: speculative LLM requests, per-round deadlines with local stopgap commands
+# and a call interval that follows measured LLM latency (in ticks)
+HYBRID_PLANNING = os.getenv("HYBRID_PLANNING", "false").lower() == "true"
+PLAN_DEADLINE_TICKS = int(os.getenv("PLAN_DEADLINE_TICKS", max(1, LLM_CALL_FREQUENCY // 2)))
+PLAN_MIN_INTERVAL = int(os.getenv("PLAN_MIN_INTERVAL", max(2, LLM_CALL_FREQUENCY // 2)))
+PLAN_MAX_INTERVAL = int(os.getenv("PLAN_MAX_INTERVAL", LLM_CALL_FREQUENCY * 6))
+# Number of concurrent sector sub-strategists (1 = a single strategist plans for all drones)
+STRATEGIST_SECTORS = int(os.getenv("STRATEGIST_SECTORS", 1))
+# Prompt state format: 'compact' (minified tables, unchanged drones reduced) or 'full' (pretty-printed JSON)
+PROMPT_FORMAT = os.getenv("PROMPT_FORMAT", "compact").lower()
+# Approximate token budget for the compact state; low-priority sections are summarized above it (0 = no limit)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 1500))
+# LLM response cache: 'off', 'record' (call the API, save responses) or 'replay' (serve recordings, no network)
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "off").lower()
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "logs/llm_cache.jsonl")
+# Replay policy for requests that were never recorded: 'nearest', 'standby' or 'error'
+LLM_CACHE_NEAR_MISS = os.getenv("LLM_CACHE_NEAR_MISS", "nearest").lower()
 
 # Drone Settings
 DRONE_BATTERY_MAX = 500.0
-DRONE_SCAN_RADIUS = 5
+DRONE_SCAN_RADIUS = int(os.getenv("DRONE_SCAN_RADIUS", 5))
 DRONE_SPEED = 1.0 # tiles per tick
+# Scan report deduplication: 'drone' (skip tiles this drone already reported with the same type),
+# 'fleet' (also skip tiles the strategist already knows) or 'off' (report every visible tile)
+REPORT_DEDUP = os.getenv("REPORT_DEDUP", "drone").lower()
 COST_MOVE = 1.0
 COST_SCAN = 5.0
 COST_REPORT = 2.0
@@ -46,10 +74,51 @@ BASE_RECHARGE_RATE = 50.0
 MOVING_ENEMY_SPEED = 0.5 # tiles per tick (moves every 2 ticks)
 MISSILE_SPEED = 3.0 # tiles per tick
 
+# Fast-forward: run quiet stretches (no drone moving, no missile in flight, nothing for the
+# strategist to do) without full ticks, logging each stretch as one run-length record
+FAST_FORWARD = os.getenv("FAST_FORWARD", "false").lower() == "true"
+FAST_FORWARD_MAX_TICKS = int(os.getenv("FAST_FORWARD_MAX_TICKS", 500))  # Longest single stretch
+
 # Visualization Settings (Pygame)
 ENABLE_VISUALIZATION = os.getenv("ENABLE_VISUALIZATION", "true").lower() == "true"
 CELL_SIZE = int(os.getenv("CELL_SIZE", 16))
 FPS = int(os.getenv("FPS", 10))  # Controls simulation speed
+# Render on the main thread from published snapshots while the simulation ticks at full speed
+DECOUPLED_RENDERING = os.getenv("DECOUPLED_RENDERING", "false").lower() == "true"
+
+# Live View Settings
+# Publish every tick to a memory-mapped ring buffer that live_viewer.py can attach to
+LIVE_VIEW = os.getenv("LIVE_VIEW", "false").lower() == "true"
+LIVE_VIEW_PATH = os.getenv("LIVE_VIEW_PATH", "logs/live_view.bin")
+LIVE_VIEW_SLOTS = int(os.getenv("LIVE_VIEW_SLOTS", 1024))  # Ticks of history kept for viewers
+
+# Replay Settings
+# Number of decoded ticks kept in memory around the replay playhead
+REPLAY_CACHE_SIZE = int(os.getenv("REPLAY_CACHE_SIZE", 64))
+# Playback speed in ticks per second (independent of FPS, which only sets the redraw rate)
+REPLAY_SPEED = float(os.getenv("REPLAY_SPEED", FPS))
+REPLAY_MAX_SPEED = 1000.0
+
+# Logging
+LOG_FILE = os.getenv("LOG_FILE", "logs/simulation_log.json")
+
+# Results Store
+# SQLite database that every run appends its settings, outcome and downsampled metrics to (empty: off)
+RESULTS_DB = os.getenv("RESULTS_DB", "")
+RESULTS_METRICS_INTERVAL = int(os.getenv("RESULTS_METRICS_INTERVAL", 10))
+# Label stored with the run, to tell sweeps apart in queries
+RESULTS_EXPERIMENT = os.getenv("RESULTS_EXPERIMENT", "")
+# Seeds the simulation's random number generator (empty: not seeded)
+SIMULATION_SEED = int(os.getenv("SIMULATION_SEED")) if os.getenv("SIMULATION_SEED") else None
+
+# Memory Profiling
+# tracemalloc snapshots every MEMORY_PROFILE_INTERVAL ticks, attributed to grid, drones, strategist,
+# logger and pathfinding, with a report at the end of the run (slows the simulation down)
+MEMORY_PROFILE = os.getenv("MEMORY_PROFILE", "false").lower() == "true"
+MEMORY_PROFILE_INTERVAL = int(os.getenv("MEMORY_PROFILE_INTERVAL", 50))
+# Stack frames kept per allocation: deeper stacks attribute allocations made inside library code
+# (json, copy) to the right subsystem, but slow tracing down further
+MEMORY_PROFILE_FRAMES = int(os.getenv("MEMORY_PROFILE_FRAMES", 4))
 
 # Colors
 COLOR_BG = (10, 10, 20)
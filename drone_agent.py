@@ -4,13 +4,14 @@ import json
 import random
 from collections import deque
 from config import *
+from known_map import TYPE_CODES
 
 class DroneAgent:
     """
     Individual unit that moves on the map, collects sensor data, and executes long-term missions.
     It has its own pathfinding and can dynamically replan if it encounters obstacles.
     """
-    def __init__(self, drone_id, grid):
+    def __init__(self, drone_id, grid, intel=None):
         self.id = drone_id
         self.grid = grid
         self.position = {'x': random.randint(1, 9), 'y': random.randint(1, 9)}
@@ -27,8 +28,20 @@ class DroneAgent:
         self.scan_mode = 'PASSIVE'  # 'ACTIVE' or 'PASSIVE'
         self.known_tiles = {}       # Drone's personal map of known obstacles/tiles
         self.threat_zones = []      # Known HSS danger zones from strategist
+        self.intel = intel          # Shared IntelligenceStore of the strategist (read through, never copied)
+        self.intel_version = 0      # Latest store version this drone has been told about
+        # Type code of what this drone last reported per tile (0 = never), so reports carry only news
+        self.reported_types = bytearray(grid.width * grid.height) if REPORT_DEDUP != 'off' else None
+        self.scan_stats = {"seen": 0, "reported": 0}
 
-        self.client = openai.OpenAI(api_key=API_KEY)
+        self._client = None
+
+    @property
+    def client(self):
+        """OpenAI client, created on first use (building one loads the SSL trust store, ~50 ms)."""
+        if self._client is None:
+            self._client = openai.OpenAI(api_key=API_KEY)
+        return self._client
 
 
     def set_command(self, command):
@@ -55,6 +68,9 @@ class DroneAgent:
                 print(f"{self.id} scan mode set to {self.scan_mode}")
 
         # Update intelligence from the strategist
+        if 'intel_version' in command and self.intel is not None:
+            self.intel_version = max(self.intel_version, command['intel_version'])
+            self.threat_zones = self.intel.threat_zones
         if 'known_tiles' in command:
             self.known_tiles.update(command['known_tiles'])
         if 'threat_zones' in command:
@@ -89,6 +105,25 @@ class DroneAgent:
             if tile and tile.type == 'BASE' and self.battery < DRONE_BATTERY_MAX:
                 self.recharge()
 
+    def has_pending_work(self):
+        """
+        True if update() would change this drone on the next tick; mirrors
+        update() and process_mission(). Idle drones can be skipped until woken.
+        """
+        if self.status != 'ACTIVE':
+            return False
+        if self.battery <= 0:
+            return True
+        cmd_type = self.current_command.get('command_type')
+        if cmd_type == 'MOVE_DRONE':
+            return bool(self.target_position)
+        if cmd_type == 'SCAN_AREA':
+            return True
+        if cmd_type == 'STANDBY' and self.battery < DRONE_BATTERY_MAX:
+            tile = self.grid.get_tile(self.position['x'], self.position['y'])
+            return bool(tile and tile.type == 'BASE')
+        return False
+
 
     def move(self):
         """
@@ -182,7 +217,9 @@ class DroneAgent:
     def _is_known_obstacle(self, x, y):
         """Checks drone's personal map for obstacles."""
         tile_data = self.known_tiles.get((x, y))
-        return tile_data and tile_data.get('type') == 'OBSTACLE'
+        if tile_data:
+            return tile_data.get('type') == 'OBSTACLE'
+        return self.intel is not None and self.intel.is_obstacle(x, y, self.intel_version)
 
 
     def _is_in_hss_danger_zone(self, x, y):
@@ -204,20 +241,34 @@ class DroneAgent:
         # Get visible tiles from the grid simulation
         visible_tiles = self.grid.get_visible_tiles(self.position['x'], self.position['y'], DRONE_SCAN_RADIUS)
         
+        reported = self.reported_types
+        fleet_known = self.intel.known_types if REPORT_DEDUP == 'fleet' and self.intel is not None else None
+        height = self.grid.height
+        self.scan_stats["seen"] += len(visible_tiles)
+
         # Process and store scan results for the next report
         for tile in visible_tiles:
             tile_type = 'EMPTY' if tile.type == 'HSS' else tile.type
             tile_data = {"type": tile_type, "position": {"x": tile.x, "y": tile.y}}
             if tile.type == 'STATIONARY_ENEMY':
                 tile_data["properties"] = tile.properties
-            
-            # Add to scan_results to be sent in the report
-            self.scan_results.append(tile_data)
-            
+
             # Update the drone's personal knowledge base immediately
             if tile.type == 'OBSTACLE':
                 self.known_tiles[(tile.x, tile.y)] = tile_data
 
+            # Skip tiles already reported (by this drone, or known fleet-wide) with the same type
+            if reported is not None:
+                index = tile.x * height + tile.y
+                code = TYPE_CODES[tile_type]
+                if reported[index] == code or (fleet_known is not None and fleet_known[index] == code):
+                    continue
+                reported[index] = code
+
+            # Add to scan_results to be sent in the report
+            self.scan_results.append(tile_data)
+            self.scan_stats["reported"] += 1
+
 
     def recharge(self):
         """Recharges the drone's battery when at base."""
@@ -26,6 +26,12 @@ class MovingEnemy:
         if current_tick % self._move_tick_interval == 0:
             self.move()
 
+    def next_move_tick(self, after_tick):
+        """First tick after 'after_tick' on which the enemy moves, or None if it never moves."""
+        if self._move_tick_interval == float('inf'):
+            return None
+        return (after_tick // self._move_tick_interval + 1) * self._move_tick_interval
+
     def move(self):
         """Moves randomly by one tile, avoiding obstacles and the base."""
         directions = [(0, 1), (1, 0), (0, -1), (-1, 0)] # 4 directions for simpler movement
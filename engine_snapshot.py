@@ -0,0 +1,226 @@
+# FILE: engine_snapshot.py
+import pickle
+import random
+import struct
+import zlib
+from array import array
+from known_map import TILE_TYPES, TYPE_CODES, OBSTACLE, UNKNOWN
+from missile_system import Missile
+from entity_registry import EntityRegistry
+from actor_scheduler import ActorScheduler
+
+# File layout (little endian): header | zlib-compressed pickle of the state dict.
+# Rasters (grid, known map, per-drone report dedup) are stored as raw bytes and paths
+# as packed coordinate arrays, so the state holds no per-tile Python objects.
+MAGIC = b'SIMS'
+VERSION = 1
+_HEADER = struct.Struct('<4sII')  # magic, version, uncompressed length
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot cannot be decoded or does not fit the engine."""
+
+def _pack_path(path):
+    return array('H', [c for p in path for c in (p['x'], p['y'])]).tobytes()
+
+def _unpack_path(data):
+    coords = array('H')
+    coords.frombytes(data)
+    return [{'x': coords[i], 'y': coords[i + 1]} for i in range(0, len(coords), 2)]
+
+def capture(engine):
+    """
+    Returns the full engine state as bytes: grid, drones (with paths and scan
+    buffers), moving enemies, missiles, missile inventory, strategist world model,
+    known map and intelligence store, scheduler and planner state, and the RNG.
+
+    The live objects are collected into one structure and serialized in a single
+    pickle call, which copies them and keeps shared references shared (e.g. the
+    threat zone list every drone reads, or enemy positions the world model tracks).
+    In-flight LLM requests cannot be captured; restored engines start without them.
+    """
+    grid = engine.grid
+    strategist = engine.central_strategist
+    known_map = strategist.known_map
+    intel = strategist.intel
+    planner = engine.planner
+
+    types = bytearray(grid.width * grid.height)
+    properties = {}
+    for column in grid.tiles:
+        for tile in column:
+            index = tile.x * grid.height + tile.y
+            types[index] = TYPE_CODES[tile.type]
+            if tile.properties:
+                properties[index] = tile.properties
+
+    state = {
+        "tick": engine.current_tick,
+        "game_over": engine.game_over,
+        "game_over_message": engine.game_over_message,
+        "fast_forward_stats": engine.fast_forward_stats,
+        "rng": random.getstate(),
+        "grid": {"width": grid.width, "height": grid.height, "types": bytes(types), "properties": properties},
+        "drones": [{
+            "id": d.id, "position": d.position, "battery": d.battery, "status": d.status,
+            "current_command": d.current_command, "target_position": d.target_position,
+            "path": _pack_path(d.path), "scan_results": d.scan_results, "scan_mode": d.scan_mode,
+            "known_tiles": d.known_tiles, "threat_zones": d.threat_zones, "intel_version": d.intel_version,
+            "reported_types": bytes(d.reported_types) if d.reported_types is not None else None,
+            "scan_stats": d.scan_stats,
+        } for d in engine.drones],
+        "moving_enemies": [{"id": e.id, "position": e.position, "status": e.status} for e in engine.moving_enemies],
+        "missiles": [{
+            "target_position": m.target_position, "current_position": m.current_position,
+            "path": _pack_path(m.path), "status": m.status, "speed": m.speed,
+        } for m in engine.active_missiles],
+        "missile_count": engine.missile_system.missile_count,
+        "strategist": {
+            "world_model": strategist.world_model,
+            "known_map": {
+                "types": bytes(known_map.types), "type_counts": known_map.type_counts,
+                "bounds": known_map.bounds, "region_known": known_map.region_known,
+                "frontier": array('I', [x * known_map.height + y for tiles in known_map.frontier.values()
+                                        for x, y in tiles]).tobytes(),
+            },
+            "intel": {"version": intel.version, "obstacle_versions": intel._obstacle_versions,
+                      "threat_zones": intel.threat_zones, "dirty": intel._dirty},
+            "current_tick": strategist.current_tick,
+            "drone_last_command_tick": strategist.drone_last_command_tick,
+            "last_llm_latency": strategist.last_llm_latency,
+            "offline_results": strategist._offline_results,
+            "prompt_last_sent": strategist.prompt_encoder._last_sent if strategist.prompt_encoder else None,
+            "has_fleet": strategist._fleet is not None,
+        },
+        "awake": sorted(engine.scheduler.awake),
+        "planner": {
+            "interval": planner.interval, "lead": planner.lead, "next_due": planner.next_due,
+            "round": planner.round, "latency_ticks": planner.latency_ticks, "stats": planner.stats,
+        } if planner else None,
+    }
+    body = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    return _HEADER.pack(MAGIC, VERSION, len(body)) + zlib.compress(body, 1)
+
+def decode(data):
+    """Returns the state dict stored in a snapshot."""
+    if len(data) < _HEADER.size:
+        raise SnapshotError("Snapshot is truncated.")
+    magic, version, length = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise SnapshotError(f"Not a version {VERSION} simulation snapshot.")
+    try:
+        body = zlib.decompress(data[_HEADER.size:])
+    except zlib.error as e:
+        raise SnapshotError(f"Corrupted snapshot: {e}")
+    if len(body) != length:
+        raise SnapshotError("Snapshot is truncated.")
+    return pickle.loads(body)
+
+def restore(engine, data):
+    """
+    Puts the engine into the state stored in 'data' (from capture). The engine must
+    have the same grid size, drones and moving enemies. Objects other components
+    hold references to (the known map raster, the actor lists) are updated in place.
+    Returns (tick, RNG state); installing the RNG state is left to the caller.
+    """
+    state = decode(data)
+    grid = engine.grid
+    if (state["grid"]["width"], state["grid"]["height"]) != (grid.width, grid.height):
+        raise SnapshotError("Snapshot grid size does not match this engine.")
+    if [d["id"] for d in state["drones"]] != [d.id for d in engine.drones]:
+        raise SnapshotError("Snapshot drones do not match this engine.")
+    if [e["id"] for e in state["moving_enemies"]] != [e.id for e in engine.moving_enemies]:
+        raise SnapshotError("Snapshot moving enemies do not match this engine.")
+
+    # Grid
+    types, properties = state["grid"]["types"], state["grid"]["properties"]
+    known_types = state["strategist"]["known_map"]["types"]
+    for column in grid.tiles:
+        for tile in column:
+            index = tile.x * grid.height + tile.y
+            tile.type = TILE_TYPES[types[index]]
+            tile.properties = properties.get(index, {})
+            tile.is_known_by_strategist = known_types[index] != UNKNOWN
+
+    # Strategist
+    strategist = engine.central_strategist
+    s = state["strategist"]
+    known_map = strategist.known_map
+    known_map.types[:] = known_types  # shared with the intelligence store and the drones
+    known_map.type_counts = s["known_map"]["type_counts"]
+    known_map.bounds = s["known_map"]["bounds"]
+    known_map.region_known = s["known_map"]["region_known"]
+    known_map.obstacles = {(i // known_map.height, i % known_map.height)
+                           for i, code in enumerate(known_types) if code == OBSTACLE}
+    known_map.frontier = {}
+    frontier = array('I')
+    frontier.frombytes(s["known_map"]["frontier"])
+    for index in frontier:
+        x, y = divmod(index, known_map.height)
+        known_map.frontier.setdefault(known_map._region_index(x, y), set()).add((x, y))
+    intel = strategist.intel
+    intel.version = s["intel"]["version"]
+    intel._obstacle_versions = s["intel"]["obstacle_versions"]
+    intel.threat_zones = s["intel"]["threat_zones"]
+    intel._dirty = s["intel"]["dirty"]
+    strategist.world_model = s["world_model"]
+    strategist.current_tick = s["current_tick"]
+    strategist.drone_last_command_tick = s["drone_last_command_tick"]
+    strategist.last_llm_latency = s["last_llm_latency"]
+    strategist._offline_results = s["offline_results"]
+    if strategist.prompt_encoder and s["prompt_last_sent"] is not None:
+        strategist.prompt_encoder._last_sent = s["prompt_last_sent"]
+    strategist.pending_requests = {}
+
+    # Actors
+    for drone, d in zip(engine.drones, state["drones"]):
+        drone.position = d["position"]
+        drone.battery = d["battery"]
+        drone.status = d["status"]
+        drone.current_command = d["current_command"]
+        drone.target_position = d["target_position"]
+        drone.path = _unpack_path(d["path"])
+        drone.scan_results = d["scan_results"]
+        drone.scan_mode = d["scan_mode"]
+        drone.known_tiles = d["known_tiles"]
+        drone.threat_zones = d["threat_zones"]
+        drone.intel_version = d["intel_version"]
+        if d["reported_types"] is not None:
+            drone.reported_types = bytearray(d["reported_types"])
+        drone.scan_stats = d["scan_stats"]
+    for enemy, e in zip(engine.moving_enemies, state["moving_enemies"]):
+        enemy.position = e["position"]
+        enemy.status = e["status"]
+    missiles = []
+    for m in state["missiles"]:
+        missile = Missile(m["target_position"], _unpack_path(m["path"]))
+        missile.current_position = m["current_position"]
+        missile.status = m["status"]
+        missile.speed = m["speed"]
+        missiles.append(missile)
+    engine.missile_system.missile_count = state["missile_count"]
+
+    # Indexes and schedules are derived from the restored state
+    engine.current_tick = state["tick"]
+    engine.registry = EntityRegistry(grid, engine.drones, engine.moving_enemies)
+    engine.active_missiles = engine.registry.missiles
+    engine.scheduler = ActorScheduler(engine.registry, engine.drones, engine.moving_enemies, engine.current_tick)
+    engine.scheduler.awake = set(state["awake"])
+    for missile in missiles:
+        engine.registry.missile_launched(missile)
+        engine.scheduler.schedule_missile(missile, engine.current_tick)
+    if s["has_fleet"]:
+        strategist._fleet = (engine.drones, engine.missile_system, engine.active_missiles)
+
+    if engine.planner and state["planner"]:
+        p = state["planner"]
+        planner = engine.planner
+        planner.interval, planner.lead, planner.next_due = p["interval"], p["lead"], p["next_due"]
+        planner.latency_ticks, planner.stats = p["latency_ticks"], p["stats"]
+        # The round's LLM request did not survive the snapshot; start a new one when due
+        planner.round = None
+        planner._last_tick_time = None
+
+    engine.game_over = state["game_over"]
+    engine.game_over_message = state["game_over_message"]
+    engine.fast_forward_stats = state["fast_forward_stats"]
+    return state["tick"], state["rng"]
@@ -0,0 +1,76 @@
+# FILE: entity_registry.py
+
+class EntityRegistry:
+    """
+    Index of the simulation's entities, kept up to date on state transitions so the
+    engine never has to scan actor lists or the grid to answer a query.
+
+    - drones / moving_enemies: id -> object, for every entity ever created.
+    - active_drones / active_moving_enemies: id -> object of those still ACTIVE,
+      in creation order (iteration order matches the original lists).
+    - stationary_enemies: enemy_id -> tile of the live stationary enemies.
+    - hss_sites: HSS tiles, in grid order. They are never destroyed.
+    - missiles: missiles in flight (the engine's active_missiles list);
+      missiles_by_target indexes them by (x, y) target for the lock check.
+
+    Every count below is O(1). The engine reports transitions through the
+    *_destroyed / missile_* methods.
+    """
+    def __init__(self, grid, drones, moving_enemies):
+        self.drones = {d.id: d for d in drones}
+        self.active_drones = {d.id: d for d in drones if d.status == 'ACTIVE'}
+        self.moving_enemies = {e.id: e for e in moving_enemies}
+        self.active_moving_enemies = {e.id: e for e in moving_enemies if e.status == 'ACTIVE'}
+        self.stationary_enemies = {}
+        self.hss_sites = []
+        for row in grid.tiles:
+            for tile in row:
+                if tile.type == 'STATIONARY_ENEMY':
+                    self.stationary_enemies[tile.properties['enemy_id']] = tile
+                elif tile.type == 'HSS':
+                    self.hss_sites.append(tile)
+        self.missiles = []
+        self.missiles_by_target = {}
+
+    # --- Transitions ---
+
+    def drone_destroyed(self, drone):
+        self.active_drones.pop(drone.id, None)
+
+    def moving_enemy_destroyed(self, enemy):
+        self.active_moving_enemies.pop(enemy.id, None)
+
+    def stationary_enemy_destroyed(self, enemy_id):
+        self.stationary_enemies.pop(enemy_id, None)
+
+    def missile_launched(self, missile):
+        self.missiles.append(missile)
+        self.missiles_by_target[(missile.target_position['x'], missile.target_position['y'])] = missile
+
+    def missile_finished(self, missile):
+        """A missile detonated at its target or was intercepted."""
+        self.missiles.remove(missile)
+        target = (missile.target_position['x'], missile.target_position['y'])
+        if self.missiles_by_target.get(target) is missile:
+            del self.missiles_by_target[target]
+
+    # --- Queries ---
+
+    def is_target_locked(self, x, y):
+        return (x, y) in self.missiles_by_target
+
+    @property
+    def active_drone_count(self):
+        return len(self.active_drones)
+
+    @property
+    def live_stationary_enemy_count(self):
+        return len(self.stationary_enemies)
+
+    @property
+    def active_moving_enemy_count(self):
+        return len(self.active_moving_enemies)
+
+    @property
+    def missiles_in_flight(self):
+        return len(self.missiles)
@@ -0,0 +1,139 @@
+# FILE: frontier_planner.py
+from config import *
+
+BASE_POSITION = {'x': 5, 'y': 5}
+# Expected battery per step of an exploration leg: the move plus a 50% chance of an ACTIVE scan
+EXPLORE_COST_PER_STEP = COST_MOVE + 0.5 * COST_SCAN
+# Battery kept in hand on top of the estimated trip cost
+BATTERY_RESERVE = DRONE_BATTERY_MAX * 0.1
+# An idle drone at base waits to recharge until it has this much battery
+DISPATCH_BATTERY = DRONE_BATTERY_MAX * 0.6
+
+def _distance(ax, ay, bx, by):
+    """Drones move in 8 directions, so the step count is the Chebyshev distance."""
+    return max(abs(ax - bx), abs(ay - by))
+
+def _in_threat_zone(x, y, threat_zones):
+    for zone in threat_zones:
+        if 'hss_location' in zone:
+            hx, hy = zone['hss_location']['x'], zone['hss_location']['y']
+            if (x - hx) ** 2 + (y - hy) ** 2 <= zone['radius'] ** 2:
+                return True
+    return False
+
+class FrontierPlanner:
+    """
+    Deterministic, non-LLM strategist backend with the plan_next_moves output format.
+
+    - Frontier: read from the strategist's KnownMap, which maintains it incrementally.
+    - Clustering: frontier tiles are grouped by KnownMap region; each cluster is
+      represented by its frontier tile closest to the cluster mean (outside known
+      threat zones) and weighted by its size. With no frontier yet (nothing known),
+      the least covered regions are used instead.
+    - Assignment: greedy on a score of cluster size / (1 + distance), scaled by the
+      drone's battery ratio; a pair is only feasible if the drone can reach the
+      target scanning and fly home with a reserve. Clusters already targeted by a
+      busy drone are skipped while others remain.
+    - Missiles: one per confirmed stationary enemy that has no missile in flight.
+    - Recall: drones that need their battery to get home are sent to base (PASSIVE);
+      idle drones at base wait in STANDBY (recharging) until DISPATCH_BATTERY.
+    """
+    def __init__(self, known_map):
+        self.known_map = known_map
+
+    def plan(self, drones, world_model, missile_count, active_missiles):
+        commands, notes = [], []
+        threat_zones = world_model['potential_threat_zones']
+
+        # 1) Missiles at confirmed stationary enemies
+        locked = {(m.target_position['x'], m.target_position['y']) for m in active_missiles}
+        for enemy_id, enemy in world_model['known_stationary_enemies'].items():
+            if missile_count <= 0:
+                break
+            target = (enemy['position']['x'], enemy['position']['y'])
+            if target not in locked:
+                commands.append({"command_type": "FIRE_MISSILE", "target_position": dict(enemy['position'])})
+                locked.add(target)
+                missile_count -= 1
+                notes.append(f"fire at {enemy_id}")
+
+        # 2) Recall drones that need what is left of their battery to get home
+        idle = []
+        for d in drones:
+            if d.status != 'ACTIVE' or d.current_command.get('is_hunting'):
+                continue
+            x, y = d.position['x'], d.position['y']
+            home = _distance(x, y, BASE_POSITION['x'], BASE_POSITION['y'])
+            heading_home = d.target_position == BASE_POSITION
+            if home > 0 and not heading_home and d.battery < home * COST_MOVE * 1.5 + BATTERY_RESERVE:
+                commands.append({"command_type": "SET_SCAN_MODE", "drone_id": d.id, "scan_mode": "PASSIVE"})
+                commands.append({"command_type": "MOVE_DRONE", "drone_id": d.id, "target_position": dict(BASE_POSITION)})
+                notes.append(f"recall {d.id}")
+            elif not d.target_position:
+                idle.append(d)
+
+        # 3) Send idle drones to frontier clusters
+        clusters = self._clusters(threat_zones)
+        busy_regions = {self.known_map.region_of(d.target_position['x'], d.target_position['y'])
+                        for d in drones if d.status == 'ACTIVE' and d.target_position}
+        candidates = []
+        for d in idle:
+            x, y = d.position['x'], d.position['y']
+            if d.battery < DISPATCH_BATTERY and self._at_base(x, y):
+                continue  # keep recharging
+            battery_ratio = d.battery / DRONE_BATTERY_MAX
+            for i, (region, (tx, ty), size) in enumerate(clusters):
+                trip = _distance(x, y, tx, ty)
+                needed = trip * EXPLORE_COST_PER_STEP + _distance(tx, ty, BASE_POSITION['x'], BASE_POSITION['y']) * COST_MOVE
+                if trip == 0 or needed + BATTERY_RESERVE > d.battery:
+                    continue
+                score = size / (1.0 + trip) * battery_ratio
+                if region in busy_regions:
+                    score *= 0.1
+                candidates.append((-score, d.id, i, d))
+
+        assigned_drones, used_clusters = set(), set()
+        for _, drone_id, i, d in sorted(candidates, key=lambda c: (c[0], c[1], c[2])):
+            if drone_id in assigned_drones or i in used_clusters:
+                continue
+            assigned_drones.add(drone_id)
+            used_clusters.add(i)
+            tx, ty = clusters[i][1]
+            if d.scan_mode != 'ACTIVE':
+                commands.append({"command_type": "SET_SCAN_MODE", "drone_id": drone_id, "scan_mode": "ACTIVE"})
+            commands.append({"command_type": "MOVE_DRONE", "drone_id": drone_id, "target_position": {"x": tx, "y": ty}})
+            notes.append(f"{drone_id} -> ({tx},{ty})")
+
+        reasoning = "Local planner: " + (", ".join(notes) if notes else "no changes")
+        return {"reasoning": reasoning, "commands": commands}
+
+    def _at_base(self, x, y):
+        return x <= 10 and y <= 10
+
+    def _clusters(self, threat_zones):
+        """Returns [(region, (x, y) representative, weight)] sorted by region for determinism."""
+        known_map = self.known_map
+        clusters = []
+        for region in sorted(known_map.frontier):
+            tiles = known_map.frontier[region]
+            mean_x = sum(t[0] for t in tiles) / len(tiles)
+            mean_y = sum(t[1] for t in tiles) / len(tiles)
+            safe = [t for t in tiles if not _in_threat_zone(t[0], t[1], threat_zones)]
+            if not safe:
+                continue
+            representative = min(safe, key=lambda t: ((t[0] - mean_x) ** 2 + (t[1] - mean_y) ** 2, t))
+            clusters.append((known_map.region_of(*representative), representative, len(safe)))
+        if clusters:
+            return clusters
+
+        # Nothing known yet: head for the centres of the least covered regions
+        size = known_map.region_size
+        for rx in range(known_map.regions_x):
+            for ry in range(known_map.regions_y):
+                coverage = known_map.region_coverage(rx, ry)
+                if coverage < 1.0:
+                    cx = min(rx * size + size // 2, known_map.width - 1)
+                    cy = min(ry * size + size // 2, known_map.height - 1)
+                    if not _in_threat_zone(cx, cy, threat_zones):
+                        clusters.append(((rx, ry), (cx, cy), size * size * (1.0 - coverage)))
+        return clusters
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+# FILE: golden.py
+"""
+Performance regression gate on pinned-seed golden scenarios.
+
+Each scenario pins a seed, a map/fleet size and every behaviour-relevant
+setting, and replays strategist responses recorded in golden/<name>.jsonl, so a
+run is fully deterministic and needs no network. A check replays every scenario
+in a fresh process and compares it with golden/baselines.json:
+  - outcome: hash of the complete simulation log, which must be bit-identical
+    (on a mismatch the first diverging tick is reported),
+  - every strategist request must be answered by its own recording (the
+    responses are keyed on the exact prompt; a miss fails the check),
+  - ticks/s, p99 tick latency and peak RSS, each within a tolerance. Timings
+    are scaled by a fixed calibration loop run next to the scenario, so a
+    loaded or slower host does not show up as a regression.
+On a performance regression the per-phase timing (ms per tick for enemies,
+missiles, drones, HSS checks, reports, strategist, logging, ...) is printed
+next to the baseline's.
+
+    python golden.py record            # record responses from the stub LLM, then write baselines
+    python golden.py baseline medium   # re-measure baselines (new machine, intended behaviour change)
+    python golden.py check [--repeat 5]
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import time
+
+GOLDEN_DIR = "golden"
+BASELINES_PATH = os.path.join(GOLDEN_DIR, "baselines.json")
+
+# Settings every golden run pins, so .env or shell overrides cannot change the outcome
+PINNED_ENV = {
+    "STRATEGIST_BACKEND": "llm", "MOCK_LLM_RESPONSE": "false", "LLM_CACHE_MODE": "replay",
+    "LLM_CACHE_NEAR_MISS": "error", "LLM_MODEL": "gpt-4o", "LLM_CALL_FREQUENCY": "10",
+    "LLM_REQUESTS_PER_MINUTE": "0", "PROMPT_FORMAT": "compact", "PROMPT_TOKEN_BUDGET": "1500",
+    "STRATEGIST_SECTORS": "1", "HYBRID_PLANNING": "false", "REPORT_DEDUP": "drone",
+    "FAST_FORWARD": "false", "INITIAL_MISSILES": "5", "DRONE_SCAN_RADIUS": "5",
+    "ENABLE_VISUALIZATION": "false", "LIVE_VIEW": "false", "MEMORY_PROFILE": "false",
+    "RESULTS_DB": "", "API_KEY": "golden", "LLM_BASE_URL": "",
+}
+
+GOLDEN_SCENARIOS = {
+    "small": {"seed": 101, "ticks": 200, "env": {
+        "GRID_WIDTH": "40", "GRID_HEIGHT": "40", "NUM_DRONES": "5",
+        "NUM_STATIONARY_ENEMIES": "1", "NUM_MOVING_ENEMIES": "1", "NUM_HSS": "2"}},
+    "medium": {"seed": 202, "ticks": 300, "env": {
+        "GRID_WIDTH": "50", "GRID_HEIGHT": "50", "NUM_DRONES": "10",
+        "NUM_STATIONARY_ENEMIES": "2", "NUM_MOVING_ENEMIES": "2", "NUM_HSS": "4"}},
+    "large": {"seed": 303, "ticks": 200, "env": {
+        "GRID_WIDTH": "100", "GRID_HEIGHT": "100", "NUM_DRONES": "25",
+        "NUM_STATIONARY_ENEMIES": "4", "NUM_MOVING_ENEMIES": "4", "NUM_HSS": "8"}},
+}
+
+# (phase, owner, method): engine methods timed per phase; 'other' is the rest of the tick
+PHASES = (
+    ("enemies", "scheduler", "move_enemies"),
+    ("missiles", "engine", "_update_missiles_and_threats"),
+    ("drones", "scheduler", "update_drones"),
+    ("hunts", "engine", "check_and_initiate_hunts"),
+    ("kamikaze", "engine", "check_kamikaze_attacks"),
+    ("hss_threats", "engine", "check_hss_threats"),
+    ("reports", "engine", "collect_reports"),
+    ("strategist", "engine", "_distribute_commands"),
+    ("strategist", "strategist", "poll_ready_plans"),
+    ("commands", "engine", "_apply_commands"),
+    ("logging", "logger", "log_tick_state"),
+)
+
+def responses_path(name):
+    return os.path.join(GOLDEN_DIR, f"{name}.jsonl")
+
+def scenario_environment(name, mode="replay"):
+    env = dict(PINNED_ENV, LLM_CACHE_MODE=mode, LLM_CACHE_PATH=responses_path(name))
+    env.update(GOLDEN_SCENARIOS[name]["env"])
+    return env
+
+# --- Scenario run (worker process) ------------------------------------------------
+
+def _percentile(values, q):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+CALIBRATION_EVERY = 5  # ticks between calibration samples
+
+def _calibrate(samples=1):
+    """Seconds for a fixed pure-Python workload (dict/list churn, like a tick), one per sample."""
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        counts, queue = {}, []
+        for i in range(25000):
+            key = (i * 7919) & 1023
+            counts[key] = counts.get(key, 0) + 1
+            queue.append(key)
+            if len(queue) > 64:
+                queue.pop(0)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def _timed(method, phase, totals):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            totals[phase] += time.perf_counter() - start
+    return wrapper
+
+def _run_scenario(job):
+    """Worker process: plays one golden scenario and returns its outcome and timings."""
+    name, stub_port = job
+    sys.stdout = open(os.devnull, 'w')  # the simulation is chatty
+    if stub_port:
+        # Recording: this process answers its own LLM requests, with its own map settings
+        from llm_stub_server import start_server, make_generator
+        server = start_server("127.0.0.1", stub_port, make_generator("rule"), latency="fixed:0")
+    import resource
+    from simulation_engine import SimulationEngine
+
+    scenario = GOLDEN_SCENARIOS[name]
+    log_dir = tempfile.mkdtemp(prefix="golden-")
+    random.seed(scenario["seed"])
+    engine = SimulationEngine(log_file=os.path.join(log_dir, "golden.json"), headless=True)
+    owners = {"engine": engine, "scheduler": engine.scheduler,
+              "strategist": engine.central_strategist, "logger": engine.logger}
+    totals = {phase: 0.0 for phase, _, _ in PHASES}
+    for phase, owner, method in PHASES:
+        setattr(owners[owner], method, _timed(getattr(owners[owner], method), phase, totals))
+
+    calibration = _calibrate(10)
+    engine.logger.log_initial_state(engine.grid)
+    engine.logger.log_tick_state(0, engine.drones, engine.moving_enemies, engine.active_missiles)
+    engine._distribute_commands()
+    for phase in totals:
+        totals[phase] = 0.0
+    tick_samples = []
+    strategist = engine.central_strategist
+    while engine.current_tick < scenario["ticks"] and not engine.game_over:
+        # Replay answers on the next poll; recording waits for the stub so it sees the same ticks
+        while stub_port and strategist.llm_in_progress and not strategist.has_ready_plans():
+            time.sleep(0.001)
+        start = time.perf_counter()
+        engine.tick()
+        tick_samples.append(time.perf_counter() - start)
+        engine.check_game_over()
+        if engine.current_tick % CALIBRATION_EVERY == 0:
+            # Sampled all through the run, so load that comes and goes scales both sides alike
+            calibration += _calibrate()
+    engine.close()
+    calibration += _calibrate(10)
+    if stub_port:
+        server.shutdown()
+
+    log_data = engine.logger.log_data
+    tick_hashes = [hashlib.sha256(json.dumps(entry, sort_keys=True).encode()).hexdigest()[:12]
+                   for entry in log_data["tick_data"]]
+    digest = hashlib.sha256(json.dumps(log_data["initial_state"], sort_keys=True).encode())
+    for tick_hash in tick_hashes:
+        digest.update(tick_hash.encode())
+    digest.update(engine.game_over_message.encode())
+    shutil.rmtree(log_dir, ignore_errors=True)
+
+    ticks = len(tick_samples)
+    elapsed = sum(tick_samples)
+    phases = {phase: seconds * 1000 / max(ticks, 1) for phase, seconds in totals.items()}
+    phases["other"] = max(0.0, elapsed * 1000 / max(ticks, 1) - sum(phases.values()))
+    return {
+        "outcome": {
+            "hash": digest.hexdigest(), "ticks": engine.current_tick,
+            "result": engine.game_over_message or "RUNNING",
+            "active_drones": engine.registry.active_drone_count,
+            "missiles_left": engine.missile_system.missile_count,
+            "known_tiles": strategist.known_map.known_count,
+            "tick_hashes": tick_hashes,
+        },
+        "perf": {
+            "ticks_per_second": ticks / elapsed if elapsed else 0.0,
+            "p99_tick_ms": _percentile(tick_samples, 0.99) * 1000,
+            "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "phases_ms_per_tick": phases,
+            "calibration_ms": _percentile(calibration, 0.5) * 1000,
+        },
+        "llm_cache": dict(strategist.llm_cache.stats),
+    }
+
+def run_scenario(name, mode="replay"):
+    """Runs a scenario in a fresh spawned process (settings are read once at import time)."""
+    stub_port = None
+    env = scenario_environment(name, mode)
+    if mode == "record":
+        with socket.socket() as s:  # a free port for the worker's stub server
+            s.bind(("127.0.0.1", 0))
+            stub_port = s.getsockname()[1]
+        env["LLM_BASE_URL"] = f"http://127.0.0.1:{stub_port}/v1"
+    saved = dict(os.environ)
+    os.environ.update(env)
+    try:
+        with multiprocessing.get_context('spawn').Pool(1) as pool:
+            return pool.apply(_run_scenario, ((name, stub_port),))
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+def run_scenarios(name, repeat):
+    """Repeated replays of a scenario, or the LLMCacheMiss raised for a request that was never recorded."""
+    from llm_cache import LLMCacheMiss
+    try:
+        return [run_scenario(name) for _ in range(repeat)], None
+    except LLMCacheMiss as e:
+        return None, e
+
+def best_of(runs):
+    """Best throughput, best p99 and lowest RSS over repeated runs; phases of the fastest run."""
+    fastest = max(runs, key=lambda r: r["perf"]["ticks_per_second"])
+    perf = dict(fastest["perf"])
+    perf["p99_tick_ms"] = min(r["perf"]["p99_tick_ms"] for r in runs)
+    perf["peak_rss_kib"] = min(r["perf"]["peak_rss_kib"] for r in runs)
+    return dict(fastest, perf=perf)
+
+# --- Commands ----------------------------------------------------------------------
+
+def load_baselines():
+    if not os.path.exists(BASELINES_PATH):
+        return {}
+    with open(BASELINES_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_baselines(baselines):
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    with open(BASELINES_PATH, 'w', encoding='utf-8') as f:
+        json.dump(baselines, f, indent=1, sort_keys=True)
+        f.write('\n')
+
+def write_baselines(names, repeat):
+    baselines = load_baselines()
+    for name in names:
+        runs, miss = run_scenarios(name, repeat)
+        if miss:
+            print(f"{name}: {miss}; re-record with 'python golden.py record {name}'. Baseline not written.")
+            continue
+        hashes = {r["outcome"]["hash"] for r in runs}
+        if len(hashes) > 1:
+            print(f"{name}: runs are not deterministic ({len(hashes)} different outcomes); baseline not written.")
+            continue
+        result = best_of(runs)
+        result["machine"] = {"python": platform.python_version(), "platform": platform.platform(),
+                             "processor": platform.processor() or platform.machine()}
+        result["recorded"] = time.strftime("%Y-%m-%d")
+        baselines[name] = result
+        outcome, perf = result["outcome"], result["perf"]
+        print(f"{name}: {outcome['ticks']} ticks, {outcome['result']}, {perf['ticks_per_second']:.1f} ticks/s, "
+              f"p99 {perf['p99_tick_ms']:.1f} ms, peak RSS {perf['peak_rss_kib'] / 1024:.0f} MiB, "
+              f"LLM cache {result['llm_cache']}")
+    save_baselines(baselines)
+    print(f"Baselines written to '{BASELINES_PATH}'.")
+
+def record(names, repeat):
+    for name in names:
+        path = responses_path(name)
+        if os.path.exists(path):
+            os.remove(path)
+        print(f"{name}: recording strategist responses from the stub LLM into '{path}'...")
+        result = run_scenario(name, mode="record")
+        print(f"{name}: {result['llm_cache']['recorded']} responses recorded over {result['outcome']['ticks']} ticks.")
+    write_baselines(names, repeat)
+
+def check(names, repeat, tolerances):
+    baselines = load_baselines()
+    failures = 0
+    for name in names:
+        baseline = baselines.get(name)
+        if baseline is None:
+            print(f"{name}: no baseline, run 'python golden.py record {name}' first.")
+            failures += 1
+            continue
+        runs, miss = run_scenarios(name, repeat)
+        if miss:
+            print(f"{name:<8} FAIL  - {miss}; the recording no longer matches the strategist's prompts")
+            failures += 1
+            continue
+        result = best_of(runs)
+        problems = []
+
+        expected = baseline["outcome"]
+        for run in runs:
+            outcome = run["outcome"]
+            if outcome["hash"] != expected["hash"]:
+                diverged = next((i for i, (a, b) in enumerate(zip(outcome["tick_hashes"], expected["tick_hashes"])) if a != b),
+                                min(len(outcome["tick_hashes"]), len(expected["tick_hashes"])))
+                problems.append(f"outcome differs from the baseline, first at tick {diverged} "
+                                f"({outcome['result']} after {outcome['ticks']} ticks, baseline "
+                                f"{expected['result']} after {expected['ticks']} ticks)")
+                break
+
+        perf, base = result["perf"], baseline["perf"]
+        # > 1 when this host is slower now than when the baseline was measured
+        host = perf["calibration_ms"] / base["calibration_ms"] if base.get("calibration_ms") else 1.0
+        expected_tps, expected_p99 = base["ticks_per_second"] / host, base["p99_tick_ms"] * host
+        slow = False
+        if perf["ticks_per_second"] < expected_tps * (1 - tolerances["tps"]):
+            problems.append(f"ticks/s {perf['ticks_per_second']:.1f} < host-adjusted baseline {expected_tps:.1f} "
+                            f"- {tolerances['tps']:.0%}")
+            slow = True
+        if perf["p99_tick_ms"] > expected_p99 * (1 + tolerances["p99"]):
+            problems.append(f"p99 tick {perf['p99_tick_ms']:.1f} ms > host-adjusted baseline {expected_p99:.1f} ms "
+                            f"+ {tolerances['p99']:.0%}")
+            slow = True
+        if perf["peak_rss_kib"] > base["peak_rss_kib"] * (1 + tolerances["rss"]):
+            problems.append(f"peak RSS {perf['peak_rss_kib'] / 1024:.1f} MiB > baseline "
+                            f"{base['peak_rss_kib'] / 1024:.1f} MiB + {tolerances['rss']:.0%}")
+
+        status = "FAIL" if problems else "ok"
+        print(f"{name:<8} {status:<5} {perf['ticks_per_second']:>8.1f} ticks/s ({_change(perf['ticks_per_second'], expected_tps)}), "
+              f"p99 {perf['p99_tick_ms']:.1f} ms ({_change(perf['p99_tick_ms'], expected_p99)}), "
+              f"peak RSS {perf['peak_rss_kib'] / 1024:.0f} MiB ({_change(perf['peak_rss_kib'], base['peak_rss_kib'])}), "
+              f"host speed x{1 / host:.2f}")
+        for problem in problems:
+            print(f"         - {problem}")
+        if slow or (problems and tolerances["verbose"]):
+            print_phase_diff(perf["phases_ms_per_tick"], {phase: ms * host for phase, ms in base["phases_ms_per_tick"].items()})
+        failures += bool(problems)
+
+    if failures:
+        print(f"\nGOLDEN CHECK FAILED: {failures} of {len(names)} scenario(s).")
+        sys.exit(1)
+    print(f"\nGolden check passed ({len(names)} scenario(s)).")
+
+def _change(value, baseline):
+    return f"{value / baseline - 1:+.1%}" if baseline else "n/a"
+
+def print_phase_diff(phases, baseline_phases):
+    print(f"         {'phase':<12} {'baseline ms':>12} {'now ms':>9} {'change':>8}")
+    for phase in sorted(set(phases) | set(baseline_phases), key=lambda p: -phases.get(p, 0.0)):
+        now, before = phases.get(phase, 0.0), baseline_phases.get(phase, 0.0)
+        print(f"         {phase:<12} {before:>12.3f} {now:>9.3f} {_change(now, before) if before > 0.0005 else '':>8}")
+
+# --- CLI ---------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Performance regression gate on pinned-seed golden scenarios.")
+    sub = parser.add_subparsers(dest="mode", required=True)
+    commands = {
+        "record": sub.add_parser("record", help="Record strategist responses from the stub LLM and write baselines"),
+        "baseline": sub.add_parser("baseline", help="Re-measure baselines from the recorded responses"),
+        "check": sub.add_parser("check", help="Compare outcomes and performance with the baselines"),
+    }
+    for command in commands.values():
+        command.add_argument("scenarios", nargs="*", choices=[[]] + list(GOLDEN_SCENARIOS),
+                             help="Scenarios to run (default: all)")
+        command.add_argument("--repeat", type=int, default=3, help="Runs per scenario; the best timings count")
+    check_parser = commands["check"]
+    check_parser.add_argument("--tps-tolerance", type=float, default=0.20, help="Allowed ticks/s drop (0.20 = 20%%)")
+    check_parser.add_argument("--p99-tolerance", type=float, default=0.30, help="Allowed p99 tick latency growth")
+    check_parser.add_argument("--rss-tolerance", type=float, default=0.15, help="Allowed peak RSS growth")
+    check_parser.add_argument("--verbose", action="store_true", help="Print phase timings for every failed scenario")
+    args = parser.parse_args()
+
+    names = args.scenarios or list(GOLDEN_SCENARIOS)
+    if args.mode == "record":
+        record(names, args.repeat)
+    elif args.mode == "baseline":
+        write_baselines(names, args.repeat)
+    else:
+        check(names, args.repeat, {"tps": args.tps_tolerance, "p99": args.p99_tolerance,
+                                   "rss": args.rss_tolerance, "verbose": args.verbose})
+
+if __name__ == '__main__':
+    main()
@@ -13,11 +13,13 @@ class Tile:
 
 class Grid:
     """Manages the game area and static objects on it."""
-    def __init__(self, width, height):
+    def __init__(self, width, height, generate=True):
+        # generate=False: all tiles EMPTY, e.g. when a snapshot fills the map in right after
         self.width = width
         self.height = height
         self.tiles = [[Tile(x, y) for y in range(height)] for x in range(width)]
-        self._generate_map()
+        if generate:
+            self._generate_map()
 
     def _generate_map(self):
         # Base Area
@@ -0,0 +1,49 @@
+# FILE: intel_store.py
+
+class IntelligenceStore:
+    """
+    Versioned store of the intelligence the strategist shares with its drones
+    (known obstacles and HSS threat zones). There is exactly one copy; drones keep
+    a reference and the version they were last told about, and read through it.
+
+    Obstacles are stamped with the next version and become visible to a drone once
+    the store is published and the drone is handed that version with a command, so
+    catching up costs nothing and no map is copied. Threat zones are safety
+    critical and shared as a single live list, as before.
+    """
+    def __init__(self, known_types=None):
+        self.version = 0
+        # Strategist's known-type raster (KnownMap.types), read by drones for fleet-wide report dedup
+        self.known_types = known_types
+        self._obstacle_versions = {}  # (x, y) -> version in which it became known
+        self.threat_zones = []        # append-only, shared with every drone
+        self._dirty = False
+
+    def add_obstacle(self, x, y):
+        if (x, y) not in self._obstacle_versions:
+            self._obstacle_versions[(x, y)] = self.version + 1
+            self._dirty = True
+
+    def remove_obstacle(self, x, y):
+        if self._obstacle_versions.pop((x, y), None) is not None:
+            self._dirty = True
+
+    def add_threat_zone(self, zone):
+        self.threat_zones.append(zone)
+        self._dirty = True
+
+    def publish(self):
+        """Makes all changes recorded since the last publish visible as a new version."""
+        if self._dirty:
+            self.version += 1
+            self._dirty = False
+        return self.version
+
+    def is_obstacle(self, x, y, version):
+        """True if (x, y) was a known obstacle as of 'version'."""
+        known_in = self._obstacle_versions.get((x, y))
+        return known_in is not None and known_in <= version
+
+    @property
+    def obstacle_count(self):
+        return len(self._obstacle_versions)
@@ -0,0 +1,130 @@
+# FILE: known_map.py
+TILE_TYPES = ('UNKNOWN', 'EMPTY', 'OBSTACLE', 'BASE', 'STATIONARY_ENEMY', 'HSS')
+TYPE_CODES = {tile_type: code for code, tile_type in enumerate(TILE_TYPES)}
+UNKNOWN = 0
+OBSTACLE = TYPE_CODES['OBSTACLE']
+# Side length (in tiles) of the square regions used for coverage bookkeeping
+REGION_SIZE = 10
+
+class KnownMap:
+    """
+    Dense raster of what the strategist knows, with aggregates kept up to date as
+    tiles are integrated. One byte per tile holds the known type (0 = unknown).
+
+    integrate() costs O(1) per reported tile and does nothing for tiles that are
+    already known with the same content; every query below is O(1).
+
+    The exploration frontier (known, passable tiles next to an unknown tile) is kept
+    per region, so planners can cluster it without scanning the map.
+    """
+    def __init__(self, width, height, region_size=REGION_SIZE):
+        self.width = width
+        self.height = height
+        self.region_size = region_size
+        self.types = bytearray(width * height)
+        self.type_counts = [0] * len(TILE_TYPES)
+        self.type_counts[UNKNOWN] = width * height
+        self.obstacles = set()
+        self.bounds = None  # {"min_x", "max_x", "min_y", "max_y"} of known tiles
+        self.regions_x = -(-width // region_size)
+        self.regions_y = -(-height // region_size)
+        self.region_known = [0] * (self.regions_x * self.regions_y)
+        self.region_area = [
+            (min(region_size, width - rx * region_size)) * (min(region_size, height - ry * region_size))
+            for rx in range(self.regions_x) for ry in range(self.regions_y)
+        ]
+        self.frontier = {}  # region index -> set of (x, y) frontier tiles
+
+    def integrate(self, x, y, tile_type):
+        """
+        Records a reported tile. Returns 'new' for a previously unknown tile, 'changed'
+        when its type changed and None when nothing was learned.
+        """
+        index = x * self.height + y
+        old_code = self.types[index]
+        new_code = TYPE_CODES[tile_type]
+        if old_code == new_code:
+            return None
+        self.types[index] = new_code
+        self.type_counts[old_code] -= 1
+        self.type_counts[new_code] += 1
+
+        if old_code == OBSTACLE:
+            self.obstacles.discard((x, y))
+            self._update_frontier(x, y)
+        elif new_code == OBSTACLE:
+            self.obstacles.add((x, y))
+            self._discard_frontier(x, y)
+
+        if old_code != UNKNOWN:
+            return 'changed'
+        self._update_frontier(x, y)
+        for nx, ny in self._neighbours(x, y):
+            if self.types[nx * self.height + ny] != UNKNOWN:
+                self._update_frontier(nx, ny)
+        self.region_known[self._region_index(x, y)] += 1
+        bounds = self.bounds
+        if bounds is None:
+            self.bounds = {"min_x": x, "max_x": x, "min_y": y, "max_y": y}
+        else:
+            if x < bounds['min_x']: bounds['min_x'] = x
+            elif x > bounds['max_x']: bounds['max_x'] = x
+            if y < bounds['min_y']: bounds['min_y'] = y
+            elif y > bounds['max_y']: bounds['max_y'] = y
+        return 'new'
+
+    def _neighbours(self, x, y):
+        if x > 0: yield x - 1, y
+        if x < self.width - 1: yield x + 1, y
+        if y > 0: yield x, y - 1
+        if y < self.height - 1: yield x, y + 1
+
+    def _region_index(self, x, y):
+        return (x // self.region_size) * self.regions_y + y // self.region_size
+
+    def _update_frontier(self, x, y):
+        """Re-evaluates whether a known tile belongs to the frontier."""
+        code = self.types[x * self.height + y]
+        is_frontier = code != UNKNOWN and code != OBSTACLE and any(
+            self.types[nx * self.height + ny] == UNKNOWN for nx, ny in self._neighbours(x, y))
+        if is_frontier:
+            self.frontier.setdefault(self._region_index(x, y), set()).add((x, y))
+        else:
+            self._discard_frontier(x, y)
+
+    def _discard_frontier(self, x, y):
+        region = self.frontier.get(self._region_index(x, y))
+        if region and (x, y) in region:
+            region.discard((x, y))
+            if not region:
+                del self.frontier[self._region_index(x, y)]
+
+    def frontier_count(self):
+        return sum(len(tiles) for tiles in self.frontier.values())
+
+    def is_known(self, x, y):
+        return self.types[x * self.height + y] != UNKNOWN
+
+    def tile_type(self, x, y):
+        return TILE_TYPES[self.types[x * self.height + y]]
+
+    @property
+    def known_count(self):
+        return self.width * self.height - self.type_counts[UNKNOWN]
+
+    def count(self, tile_type):
+        return self.type_counts[TYPE_CODES[tile_type]]
+
+    def coverage_ratio(self):
+        return self.known_count / (self.width * self.height)
+
+    def region_of(self, x, y):
+        return x // self.region_size, y // self.region_size
+
+    def region_coverage(self, rx, ry):
+        """Share of known tiles in region (rx, ry)."""
+        index = rx * self.regions_y + ry
+        return self.region_known[index] / self.region_area[index]
+
+    def explored_bounds(self):
+        return dict(self.bounds) if self.bounds else {"min_x": 0, "max_x": 0, "min_y": 0, "max_y": 0}
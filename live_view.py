@@ -0,0 +1,194 @@
+# FILE: live_view.py
+import json
+import mmap
+import os
+import random
+import struct
+from config import INITIAL_MISSILES, LIVE_VIEW_SLOTS
+from simulation_logger import SimulationLogger
+
+# File layout (little endian):
+#   header (64 bytes) | static map JSON | ring of fixed-size tick slots
+# Each slot is 'seq, payload_len, payload'. The single writer clears seq, writes the
+# payload and then stores the new seq (seqlock), so readers can detect torn slots
+# without any locking and any number of viewers can attach or detach at will.
+MAGIC = b'DRONELV1'
+VERSION = 1
+HEADER_SIZE = 64
+_HEADER = struct.Struct('<8sIIIIII')   # magic, version, width, height, slots, slot_size, static_len
+_RUN_ID = struct.Struct('<Q')          # @32
+_WRITE_SEQ = struct.Struct('<Q')       # @40, sequence number of the last complete slot
+_FINISHED = struct.Struct('<I')        # @48
+RUN_ID_OFFSET, WRITE_SEQ_OFFSET, FINISHED_OFFSET = 32, 40, 48
+
+_SLOT_HEADER = struct.Struct('<QI4x')
+_TICK = struct.Struct('<IHHHHH')       # tick, missiles_left, drones, moving enemies, missiles, SE mask bytes
+_DRONE = struct.Struct('<HHBf')        # x, y, status, battery
+_ENEMY = struct.Struct('<HHB')         # x, y, status
+_MISSILE = struct.Struct('<HHHHH')     # current x/y, target x/y, remaining path length
+
+STATUS_CODES = ('ACTIVE', 'RECHARGING', 'DESTROYED', 'IN_FLIGHT', 'DETONATED')
+_STATUS_INDEX = {status: i for i, status in enumerate(STATUS_CODES)}
+
+
+class LiveStateWriter:
+    """
+    Publishes a compact copy of every tick into a memory-mapped ring buffer file
+    so external viewers (live_viewer.py) can watch a headless run.
+
+    The cost per tick is a fixed number of struct.pack_into calls straight into the
+    mapping; it does not depend on whether, or how many, viewers are attached.
+    """
+    def __init__(self, grid, drones, moving_enemies, path, slots=LIVE_VIEW_SLOTS):
+        self.path = path
+        self.slots = slots
+        initial_state = SimulationLogger.describe_initial_state(grid)
+        self._stationary_enemy_tiles = [grid.get_tile(se['position']['x'], se['position']['y'])
+                                        for se in initial_state['stationary_enemies']]
+        static_data = json.dumps({
+            "initial_state": initial_state,
+            "drone_ids": [d.id for d in drones],
+            "moving_enemy_ids": [e.id for e in moving_enemies],
+        }, separators=(',', ':')).encode('utf-8')
+
+        self._se_mask_bytes = (len(self._stationary_enemy_tiles) + 7) // 8
+        self.slot_size = (_SLOT_HEADER.size + _TICK.size + len(drones) * _DRONE.size
+                          + len(moving_enemies) * _ENEMY.size + INITIAL_MISSILES * _MISSILE.size + self._se_mask_bytes)
+        self.slot_size = (self.slot_size + 7) // 8 * 8
+        self._slots_offset = (HEADER_SIZE + len(static_data) + 7) // 8 * 8
+        total_size = self._slots_offset + slots * self.slot_size
+
+        # Build the file under a temporary name and swap it in, so viewers still mapped
+        # to a previous run keep a valid mapping and notice the new inode.
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.truncate(total_size)
+        self._file = open(tmp_path, 'r+b')
+        self._mm = mmap.mmap(self._file.fileno(), total_size)
+        _HEADER.pack_into(self._mm, 0, MAGIC, VERSION, grid.width, grid.height, slots, self.slot_size, len(static_data))
+        _RUN_ID.pack_into(self._mm, RUN_ID_OFFSET, random.getrandbits(64))
+        self._mm[HEADER_SIZE:HEADER_SIZE + len(static_data)] = static_data
+        os.replace(tmp_path, path)
+        self.seq = 0
+        print(f"Live view enabled. Viewers can attach to '{path}'.")
+
+    def write_tick(self, tick, drones, moving_enemies, active_missiles, missile_count):
+        seq = self.seq + 1
+        offset = self._slots_offset + ((seq - 1) % self.slots) * self.slot_size
+        mm = self._mm
+        _SLOT_HEADER.pack_into(mm, offset, 0, 0)  # invalidate while writing
+
+        pos = offset + _SLOT_HEADER.size
+        missiles = active_missiles[:INITIAL_MISSILES]
+        _TICK.pack_into(mm, pos, tick, missile_count, len(drones), len(moving_enemies), len(missiles), self._se_mask_bytes)
+        pos += _TICK.size
+        for d in drones:
+            _DRONE.pack_into(mm, pos, d.position['x'], d.position['y'], _STATUS_INDEX.get(d.status, 0), d.battery)
+            pos += _DRONE.size
+        for e in moving_enemies:
+            _ENEMY.pack_into(mm, pos, e.position['x'], e.position['y'], _STATUS_INDEX.get(e.status, 0))
+            pos += _ENEMY.size
+        for m in missiles:
+            _MISSILE.pack_into(mm, pos, m.current_position['x'], m.current_position['y'],
+                               m.target_position['x'], m.target_position['y'], len(m.path))
+            pos += _MISSILE.size
+        mask = 0
+        for i, tile in enumerate(self._stationary_enemy_tiles):
+            if tile.type == 'STATIONARY_ENEMY':
+                mask |= 1 << i
+        mm[pos:pos + self._se_mask_bytes] = mask.to_bytes(self._se_mask_bytes, 'little')
+        pos += self._se_mask_bytes
+
+        _SLOT_HEADER.pack_into(mm, offset, seq, pos - offset - _SLOT_HEADER.size)
+        _WRITE_SEQ.pack_into(mm, WRITE_SEQ_OFFSET, seq)
+        self.seq = seq
+
+    def close(self):
+        """Marks the run as finished; attached viewers keep showing the last ticks."""
+        _FINISHED.pack_into(self._mm, FINISHED_OFFSET, 1)
+        self._mm.flush()
+        self._mm.close()
+        self._file.close()
+
+
+class LiveStateReader:
+    """Read-only attachment to a LiveStateWriter ring buffer. Decodes slots into log-format tick dicts."""
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Live view file '{path}' is empty.")
+        self._inode = os.fstat(self._file.fileno()).st_ino
+
+        magic, version, self.grid_width, self.grid_height, self.slots, self.slot_size, static_len = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"'{path}' is not a live view file.")
+        self.run_id = _RUN_ID.unpack_from(self._mm, RUN_ID_OFFSET)[0]
+        static_data = json.loads(self._mm[HEADER_SIZE:HEADER_SIZE + static_len].decode('utf-8'))
+        self.initial_state = static_data['initial_state']
+        self.drone_ids = static_data['drone_ids']
+        self.moving_enemy_ids = static_data['moving_enemy_ids']
+        self._slots_offset = (HEADER_SIZE + static_len + 7) // 8 * 8
+
+    def latest_seq(self):
+        return _WRITE_SEQ.unpack_from(self._mm, WRITE_SEQ_OFFSET)[0]
+
+    def oldest_seq(self):
+        """Oldest sequence number that is still held by the ring."""
+        return max(1, self.latest_seq() - self.slots + 1)
+
+    def is_finished(self):
+        return _FINISHED.unpack_from(self._mm, FINISHED_OFFSET)[0] == 1
+
+    def is_replaced(self):
+        """True when a new simulation run has replaced the file this reader is attached to."""
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return False
+
+    def read(self, seq):
+        """Returns (tick_data, destroyed_se_ids) for a sequence number, or None if it is not available."""
+        if seq < 1:
+            return None
+        offset = self._slots_offset + ((seq - 1) % self.slots) * self.slot_size
+        for _ in range(3):
+            slot_seq, length = _SLOT_HEADER.unpack_from(self._mm, offset)
+            if slot_seq != seq:
+                return None  # not written yet or already overwritten
+            payload = self._mm[offset + _SLOT_HEADER.size:offset + _SLOT_HEADER.size + length]
+            if _SLOT_HEADER.unpack_from(self._mm, offset)[0] == seq:
+                return self._decode(payload)
+        return None
+
+    def _decode(self, payload):
+        tick, missiles_left, n_drones, n_enemies, n_missiles, mask_bytes = _TICK.unpack_from(payload, 0)
+        pos = _TICK.size
+        tick_data = {"tick": tick, "missiles_left": missiles_left, "drones": [], "moving_enemies": [], "missiles": []}
+        for i in range(n_drones):
+            x, y, status, battery = _DRONE.unpack_from(payload, pos)
+            pos += _DRONE.size
+            tick_data["drones"].append({"id": self.drone_ids[i], "position": {"x": x, "y": y},
+                                        "battery": round(battery, 2), "status": STATUS_CODES[status]})
+        for i in range(n_enemies):
+            x, y, status = _ENEMY.unpack_from(payload, pos)
+            pos += _ENEMY.size
+            tick_data["moving_enemies"].append({"id": self.moving_enemy_ids[i], "position": {"x": x, "y": y},
+                                                "status": STATUS_CODES[status]})
+        for _ in range(n_missiles):
+            cx, cy, tx, ty, path_length = _MISSILE.unpack_from(payload, pos)
+            pos += _MISSILE.size
+            tick_data["missiles"].append({"current_position": {"x": cx, "y": cy}, "target_position": {"x": tx, "y": ty},
+                                          "status": "IN_FLIGHT", "path_length": path_length})
+        mask = int.from_bytes(payload[pos:pos + mask_bytes], 'little')
+        destroyed_se_ids = {se['id'] for i, se in enumerate(self.initial_state['stationary_enemies']) if not mask >> i & 1}
+        return tick_data, destroyed_se_ids
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
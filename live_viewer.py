@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# FILE: live_viewer.py
+import pygame
+import sys
+import time
+from config import * # Renkler, FPS ve CELL_SIZE gibi ayarlar için
+from live_view import LiveStateReader
+from replay_simulation import ReplayEngine
+
+class LiveViewer(ReplayEngine):
+    """
+    Çalışan (headless olabilir) bir simülasyonun canlı görünüm dosyasına bağlanır ve
+    son tick'leri izler. ReplayEngine'in çizim kodunu kullanır; simülasyonun kendisine
+    hiçbir yük bindirmez. Aynı anda istenildiği kadar görüntüleyici bağlanabilir.
+    """
+    def __init__(self, live_path):
+        print("Initializing Live Viewer...")
+        self.live_path = live_path
+        self.waiting_reported = False
+        # Pencere açmak için harita boyutu gerekir: ilk bağlantı beklenir (Ctrl+C ile iptal edilebilir)
+        self.reader = self._try_attach()
+        while not self.reader:
+            time.sleep(0.5)
+            self.reader = self._try_attach()
+        self.initial_state = self.reader.initial_state
+        self._init_display(self.initial_state, f"Live View: {self.live_path}")
+        self.following = True  # En son tick'i takip et
+        self.wants_attach = True  # False: kullanıcı D ile ayrıldı
+        self.view_seq = self.reader.latest_seq()
+        self.last_frame = None  # Bağlantı kesikken ekranda kalan son kare
+
+    def _try_attach(self):
+        """Canlı görünüm dosyasına bir kez bağlanmayı dener; dosya henüz yoksa None döner (beklemez)."""
+        try:
+            reader = LiveStateReader(self.live_path)
+        except (FileNotFoundError, ValueError):
+            if not self.waiting_reported:
+                print(f"Waiting for a simulation with LIVE_VIEW=true to create '{self.live_path}'...")
+                self.waiting_reported = True
+            return None
+        self.waiting_reported = False
+        print(f"Attached to '{self.live_path}' ({reader.grid_width}x{reader.grid_height}, {reader.slots} ticks of history).")
+        return reader
+
+    def _reattach(self):
+        """run() döngüsünde her karede bir kez çağrılır; bağlanınca haritası farklıysa pencereyi yeniler."""
+        self.reader = self._try_attach()
+        if not self.reader:
+            return
+        if self.reader.initial_state != self.initial_state:
+            self.initial_state = self.reader.initial_state
+            self._init_display(self.initial_state, f"Live View: {self.live_path}")
+            self.last_frame = None
+        self.following = True
+
+    def _detach(self):
+        self.reader.close()
+        self.reader = None
+        print("Detached from live view.")
+
+    def run(self):
+        """Canlı izleme döngüsünü başlatır."""
+        running = True
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                if event.type == pygame.KEYDOWN:
+                    self._handle_live_key(event.key)
+
+            if self.reader and self.reader.is_replaced():
+                # Yeni bir simülasyon başladı: yeni dosyaya bağlan (bu karede ya da sonrakilerde)
+                self._detach()
+            if not self.reader and self.wants_attach:
+                self._reattach()
+
+            if self.reader:
+                latest = self.reader.latest_seq()
+                if self.following:
+                    self.view_seq = latest
+                self.view_seq = min(max(self.view_seq, self.reader.oldest_seq()), latest)
+                frame = self.reader.read(self.view_seq)
+                if frame:
+                    self.last_frame = frame
+
+            if self.last_frame:
+                self.draw_live_frame(*self.last_frame)
+            elif not self.reader:
+                self.screen.fill(COLOR_BG)
+                text = "WAITING FOR SIMULATION (D: cancel)" if self.wants_attach else "DETACHED (D: attach)"
+                self.screen.blit(self.font.render(text, True, (255, 255, 255)), (10, 10))
+                pygame.display.flip()
+
+            self.clock.tick(FPS)
+
+        if self.reader:
+            self.reader.close()
+        pygame.quit()
+        print("Live viewer closed.")
+
+    def _handle_live_key(self, key):
+        if key == pygame.K_d:
+            # Bağlanma run() döngüsünde denenir; beklerken D tekrar basılırsa vazgeçilir
+            if self.reader:
+                self._detach()
+            self.wants_attach = not self.wants_attach
+        elif not self.reader:
+            return
+        elif key == pygame.K_SPACE:
+            self.following = not self.following
+            print("Live view paused" if not self.following else "Following live")
+        elif key == pygame.K_LEFT:
+            self.following = False
+            self.view_seq -= 1
+        elif key == pygame.K_RIGHT:
+            self.view_seq += 1
+        elif key == pygame.K_END:
+            self.following = True
+
+    def draw_live_frame(self, tick_data, destroyed_se_ids):
+        """Ring buffer'dan okunan tek bir tick'i çizer."""
+        self._draw_static_map()
+        self._draw_actors(tick_data, destroyed_se_ids)
+
+        if not self.reader:
+            status = "WAITING FOR SIMULATION" if self.wants_attach else "DETACHED"
+        elif self.reader.is_finished() and self.following:
+            status = "FINISHED"
+        else:
+            status = "LIVE" if self.following else f"PAUSED ({self.reader.latest_seq() - self.view_seq} ticks behind)"
+        info_texts = [
+            f"TICK: {tick_data['tick']}",
+            f"STATUS: {status}",
+            f"Active Drones: {sum(1 for d in tick_data['drones'] if d['status'] != 'DESTROYED')}",
+            f"Missiles Left: {tick_data['missiles_left']}",
+            "-------------------",
+            "SPACE: Pause/Follow",
+            "LEFT/RIGHT: Step (history)",
+            "END: Jump to live",
+            "D: Detach/Attach"
+        ]
+        for i, text in enumerate(info_texts):
+            text_surf = self.font.render(text, True, (255, 255, 255))
+            self.screen.blit(text_surf, (10, 10 + i * 20))
+
+        pygame.display.flip()
+
+def main():
+    """Betiği komut satırından çalıştırmak için ana fonksiyon."""
+    live_path = sys.argv[1] if len(sys.argv) > 1 else LIVE_VIEW_PATH
+    try:
+        viewer = LiveViewer(live_path)
+    except KeyboardInterrupt:
+        print("\nAborted.")
+        sys.exit(1)
+    viewer.run()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+# FILE: llm_cache.py
+import hashlib
+import json
+import os
+
+CACHE_MODES = ('off', 'record', 'replay')
+NEAR_MISS_POLICIES = ('nearest', 'standby', 'error')
+
+class LLMCacheMiss(LookupError):
+    """Raised in replay mode when no recorded response fits and the near-miss policy is 'error'."""
+
+def request_key(system_prompt, user_content):
+    """
+    Hash of a request exactly as sent to the model. With the compact prompt format the user message
+    is delta-encoded against what the group was sent before, so the same world state can be a
+    different request; keying on the encoded text keeps one key per distinct prompt.
+    """
+    digest = hashlib.sha256()
+    digest.update(system_prompt.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(user_content.encode('utf-8'))
+    return digest.hexdigest()
+
+def prompt_key(system_prompt):
+    return hashlib.sha256(system_prompt.encode('utf-8')).hexdigest()[:16]
+
+class LLMResponseCache:
+    """
+    Disk-backed record/replay cache for strategist LLM responses.
+
+    Entries are appended to a JSON lines file, one request per line, so a recorded
+    session survives crashes and several runs can be recorded into the same file.
+
+    - record: exact hits are served from the cache (identical prompts are never paid
+      for twice); misses go to the API and the response is appended to the file.
+    - replay: nothing is sent over the network. Exact hits are served from the file;
+      for anything else the near-miss policy decides:
+        'nearest' - the response recorded for the same system prompt and drone group
+                    at the closest tick (ties go to the earlier recording),
+        'standby' - an empty plan,
+        'error'   - LLMCacheMiss is raised.
+    """
+    def __init__(self, path, mode='record', near_miss=NEAR_MISS_POLICIES[0]):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode '{mode}', expected one of {CACHE_MODES}")
+        if near_miss not in NEAR_MISS_POLICIES:
+            raise ValueError(f"Unknown near-miss policy '{near_miss}', expected one of {NEAR_MISS_POLICIES}")
+        self.path = path
+        self.mode = mode
+        self.near_miss = near_miss
+        self.entries = {}
+        # (prompt key, drone ids) -> [(tick, entry)] for near-miss lookups
+        self._by_group = {}
+        self.stats = {"hits": 0, "near_misses": 0, "misses": 0, "recorded": 0}
+        self._load()
+
+    @property
+    def enabled(self):
+        return self.mode != 'off'
+
+    @property
+    def offline(self):
+        return self.mode == 'replay'
+
+    def _load(self):
+        if not self.enabled or not os.path.exists(self.path):
+            if self.mode == 'replay':
+                print(f"LLM CACHE: Warning - replay file '{self.path}' not found, every request is a miss.")
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    self._index(json.loads(line))
+                except (json.JSONDecodeError, KeyError):
+                    # A run killed mid-write leaves a truncated last line; skip it
+                    print(f"LLM CACHE: Skipping unreadable entry at {self.path}:{line_number}")
+        print(f"LLM CACHE: Loaded {len(self.entries)} recorded responses from '{self.path}' ({self.mode} mode).")
+
+    def _index(self, entry):
+        if entry['key'] in self.entries:
+            return
+        self.entries[entry['key']] = entry
+        group = (entry['prompt_key'], tuple(entry['drone_ids']))
+        self._by_group.setdefault(group, []).append((entry['tick'], entry))
+
+    def lookup(self, key, system_prompt, world_state):
+        """
+        Returns the cached response for 'key' (see request_key), or None when the request has to go
+        to the API (record mode miss); in replay mode a response is always returned or LLMCacheMiss raised.
+        """
+        entry = self.entries.get(key)
+        if entry:
+            self.stats["hits"] += 1
+            return entry['response']
+        if not self.offline:
+            self.stats["misses"] += 1
+            return None
+
+        if self.near_miss == 'nearest':
+            candidates = self._by_group.get((prompt_key(system_prompt), self._drone_ids(world_state)))
+            if candidates:
+                tick = world_state.get('tick', 0)
+                _, nearest = min(candidates, key=lambda c: abs(c[0] - tick))
+                self.stats["near_misses"] += 1
+                return nearest['response']
+        self.stats["misses"] += 1
+        if self.near_miss == 'error':
+            raise LLMCacheMiss(f"No recorded response for request {key[:12]} at tick {world_state.get('tick')}")
+        return {"reasoning": "Replay: no recorded response, all units on standby.", "commands": []}
+
+    def record(self, key, system_prompt, world_state, response, latency):
+        """Appends a fresh API response to the cache file."""
+        entry = {
+            "key": key,
+            "prompt_key": prompt_key(system_prompt),
+            "tick": world_state.get('tick', 0),
+            "drone_ids": list(self._drone_ids(world_state)),
+            "latency": round(latency, 3),
+            "response": response,
+        }
+        self._index(entry)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self.stats["recorded"] += 1
+
+    @staticmethod
+    def _drone_ids(world_state):
+        return tuple(d['id'] for d in world_state.get('drones', []))
+
+    def summary(self):
+        s = self.stats
+        return (f"LLM CACHE ({self.mode}): {s['hits']} hits, {s['near_misses']} near misses, "
+                f"{s['misses']} misses, {s['recorded']} recorded")
@@ -0,0 +1,108 @@
+# FILE: llm_pipeline.py
+import asyncio
+import json
+import queue
+import threading
+import time
+from collections import deque
+import openai
+from config import API_KEY, LLM_BASE_URL, LLM_MAX_CONCURRENCY, LLM_REQUESTS_PER_MINUTE, LLM_TIMEOUT_SECONDS
+
+class _RateLimiter:
+    """Spaces request starts so that at most 'requests_per_minute' begin per minute."""
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_start = 0.0
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        wait = self._next_start - now
+        self._next_start = max(now, self._next_start) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+class AsyncLLMPipeline:
+    """
+    Runs LLM requests on a single asyncio event loop in a background thread.
+
+    All requests share one AsyncOpenAI client (and therefore one pooled HTTP
+    connection pool). Up to LLM_MAX_CONCURRENCY requests are in flight at once,
+    request starts are rate limited and every request has a timeout. Finished
+    results are put on a thread-safe queue that the simulation drains every
+    tick, so they are applied as soon as they arrive.
+    """
+    def __init__(self, api_key=API_KEY, max_concurrency=LLM_MAX_CONCURRENCY,
+                 requests_per_minute=LLM_REQUESTS_PER_MINUTE, timeout=LLM_TIMEOUT_SECONDS):
+        self.api_key = api_key
+        self.timeout = timeout
+        self._results = queue.SimpleQueue()
+        # Wall-clock latency of recent requests, for benchmarks and reports
+        self.latencies = deque(maxlen=10000)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-event-loop", daemon=True)
+        self._thread.start()
+        # Loop-bound objects are created on the loop thread
+        asyncio.run_coroutine_threadsafe(self._setup(max_concurrency, requests_per_minute), self._loop).result()
+
+    async def _setup(self, max_concurrency, requests_per_minute):
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._rate_limiter = _RateLimiter(requests_per_minute)
+        # Created on first use, so offline runs (mock/replay) need no API key
+        self.client = None
+
+    def submit(self, request_id, coroutine_factory, fallback):
+        """
+        Schedules 'coroutine_factory()' on the event loop. Its result (or 'fallback'
+        on error/timeout) is delivered through drain() as (request_id, result, latency).
+        Callable from any thread.
+        """
+        asyncio.run_coroutine_threadsafe(self._run(request_id, coroutine_factory, fallback), self._loop)
+
+    async def _run(self, request_id, coroutine_factory, fallback):
+        async with self._semaphore:
+            await self._rate_limiter.acquire()
+            start_time = time.time()
+            try:
+                result = await asyncio.wait_for(coroutine_factory(), self.timeout)
+            except asyncio.TimeoutError:
+                print(f"LLM request {request_id} timed out after {self.timeout}s.")
+                result = fallback
+            except Exception as e:
+                print(f"LLM request {request_id} failed: {e}")
+                result = fallback
+            latency = time.time() - start_time
+            self.latencies.append(latency)
+            self._results.put((request_id, result, latency))
+
+    async def chat_json(self, model, system_prompt, user_content):
+        """Sends one chat completion in JSON mode and returns the parsed object."""
+        if self.client is None:
+            self.client = openai.AsyncOpenAI(api_key=self.api_key, base_url=LLM_BASE_URL,
+                                             timeout=self.timeout, max_retries=1)
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_content}
+            ],
+            response_format={"type": "json_object"}
+        )
+        return json.loads(response.choices[0].message.content)
+
+    def drain(self):
+        """Returns all results that finished since the last call. Never blocks."""
+        finished = []
+        while True:
+            try:
+                finished.append(self._results.get_nowait())
+            except queue.Empty:
+                return finished
+
+    def has_results(self):
+        return not self._results.empty()
+
+    def close(self):
+        if self.client is not None:
+            asyncio.run_coroutine_threadsafe(self.client.close(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+# FILE: llm_stub_server.py
+"""
+Local OpenAI-compatible stand-in for the strategist LLM.
+
+Serves POST /v1/chat/completions with configurable latency, injected errors and
+timeouts, and pluggable response generators:
+  rule    - a stateless rule-based planner (explore, recall, fire at known SEs)
+  replay  - responses recorded with LLM_CACHE_MODE=record (nearest tick on a miss)
+  standby - always an empty plan
+
+Serve and point a simulation at it:
+    python llm_stub_server.py serve --port 8089 --latency lognormal:0.8,0.5 --error-rate 0.05
+    LLM_BASE_URL=http://127.0.0.1:8089/v1 API_KEY=stub python main.py
+
+Benchmark many concurrent simulations against an in-process server:
+    python llm_stub_server.py bench --sims 8 --ticks 300 --latency lognormal:0.8,0.5
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import GRID_WIDTH, GRID_HEIGHT, LLM_CACHE_PATH, DRONE_BATTERY_MAX
+from llm_cache import LLMResponseCache, request_key
+
+BASE_POSITION = {"x": 5, "y": 5}
+REGION = 10
+
+# --- Latency -------------------------------------------------------------
+
+def parse_latency(spec):
+    """
+    'fixed:S', 'uniform:MIN,MAX', 'normal:MEAN,STD' or 'lognormal:MEDIAN,SIGMA' (seconds).
+    Returns a function rng -> delay.
+    """
+    kind, _, args = spec.partition(':')
+    values = [float(v) for v in args.split(',')] if args else []
+    if kind == 'fixed':
+        return lambda rng: values[0]
+    if kind == 'uniform':
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == 'normal':
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == 'lognormal':
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    raise ValueError(f"Unknown latency distribution '{spec}'")
+
+# --- Response generators ---------------------------------------------------
+
+def _drone_number(drone_id):
+    digits = re.sub(r'\D', '', drone_id)
+    return int(digits) if digits else 0
+
+def parse_world_state(user_content):
+    """
+    Normalizes the strategist state (full or compact prompt format) to
+    (world_state dict or None, tick, drones, stationary enemy positions, locked targets, missiles left).
+    drones: (id, status, battery, x, y, has_target)
+    """
+    data = json.loads(user_content)
+    tick = data.get('tick', 0)
+    if isinstance(data.get('drones'), list):
+        drones = [(d['id'], d['status'], d['battery'], d['position']['x'], d['position']['y'], bool(d.get('target_position')))
+                  for d in data['drones']]
+        known_world = data.get('known_world', {})
+        ses = [(e['position']['x'], e['position']['y']) for e in known_world.get('known_stationary_enemies', [])]
+        locked = {(m['target_position']['x'], m['target_position']['y']) for m in data.get('missiles_in_flight', [])}
+        return data, tick, drones, ses, locked, data.get('resources', {}).get('missiles_left', 0)
+
+    drones = []
+    for row in data['drones']['rows']:
+        row = dict(zip(data['drones']['cols'], row))
+        drones.append((row['id'], row['status'], row['battery'], row['x'], row['y'], row['target_x'] is not None))
+    for drone_id, (tx, ty) in data.get('busy', {}).items():
+        drones.append((drone_id, 'ACTIVE', DRONE_BATTERY_MAX, tx, ty, True))
+    drones.extend((drone_id, 'DESTROYED', 0, 0, 0, False) for drone_id in data.get('lost', []))
+    drones.sort(key=lambda d: _drone_number(d[0]))
+    ses = [(row[1], row[2]) for row in data.get('stationary_enemies', {}).get('rows', [])]
+    locked = {(row[2], row[3]) for row in data.get('missiles_in_flight', {}).get('rows', [])}
+    # A compact state cannot be hashed like the original; replay matches it by tick and drone ids
+    pseudo_state = {"tick": tick, "drones": [{"id": d[0]} for d in drones]}
+    return pseudo_state, tick, drones, ses, locked, data.get('missiles_left', 0)
+
+class RuleGenerator:
+    """Stateless rule-based planner: explore region centres, recall low batteries, fire at known SEs."""
+    def __init__(self):
+        self.targets = [(min(rx + REGION // 2, GRID_WIDTH - 1), min(ry + REGION // 2, GRID_HEIGHT - 1))
+                        for rx in range(0, GRID_WIDTH, REGION) for ry in range(0, GRID_HEIGHT, REGION)
+                        if rx >= REGION or ry >= REGION]
+
+    def __call__(self, system_prompt, user_content):
+        _, tick, drones, ses, locked, missiles_left = parse_world_state(user_content)
+        commands, notes = [], []
+        for x, y in ses:
+            if missiles_left > 0 and (x, y) not in locked:
+                commands.append({"command_type": "FIRE_MISSILE", "target_position": {"x": x, "y": y}})
+                missiles_left -= 1
+                notes.append(f"fire at ({x},{y})")
+        for drone_id, status, battery, x, y, has_target in drones:
+            if status != 'ACTIVE' or has_target:
+                continue
+            if battery < DRONE_BATTERY_MAX * 0.25:
+                if (x, y) != (BASE_POSITION['x'], BASE_POSITION['y']):
+                    commands.append({"command_type": "SET_SCAN_MODE", "drone_id": drone_id, "scan_mode": "PASSIVE"})
+                    commands.append({"command_type": "MOVE_DRONE", "drone_id": drone_id, "target_position": dict(BASE_POSITION)})
+                    notes.append(f"recall {drone_id}")
+                continue
+            tx, ty = self.targets[(_drone_number(drone_id) * 7 + tick // 10) % len(self.targets)]
+            commands.append({"command_type": "SET_SCAN_MODE", "drone_id": drone_id, "scan_mode": "ACTIVE"})
+            commands.append({"command_type": "MOVE_DRONE", "drone_id": drone_id, "target_position": {"x": tx, "y": ty}})
+            notes.append(f"{drone_id} -> ({tx},{ty})")
+        return {"reasoning": "Stub rule planner: " + (", ".join(notes) or "no changes"), "commands": commands}
+
+class ReplayGenerator:
+    """Serves recorded responses from an LLM cache file."""
+    def __init__(self, path):
+        self.cache = LLMResponseCache(path, mode='replay', near_miss='nearest')
+        self._lock = threading.Lock()
+
+    def __call__(self, system_prompt, user_content):
+        world_state = parse_world_state(user_content)[0]
+        with self._lock:
+            response = self.cache.lookup(request_key(system_prompt, user_content), system_prompt, world_state)
+        return response
+
+def standby_generator(system_prompt, user_content):
+    return {"reasoning": "Stub: all units on standby.", "commands": []}
+
+def make_generator(name, replay_path=LLM_CACHE_PATH):
+    if name == 'rule':
+        return RuleGenerator()
+    if name == 'replay':
+        return ReplayGenerator(replay_path)
+    if name == 'standby':
+        return standby_generator
+    raise ValueError(f"Unknown generator '{name}'")
+
+# --- Server ----------------------------------------------------------------
+
+class StubLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, generator, latency='fixed:0', error_rate=0.0, timeout_rate=0.0,
+                 timeout_seconds=300.0, seed=None):
+        super().__init__(address, _Handler)
+        self.generator = generator
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_seconds = timeout_seconds
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "timeouts": 0, "latency_total": 0.0}
+        self.started_at = time.time()
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):  # clients hanging up early are expected
+            super().handle_error(request, client_address)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def draw_fault(self):
+        """Returns ('timeout' | 'error' | None, delay) for the next request."""
+        with self.lock:
+            self.stats["requests"] += 1
+            roll = self.rng.random()
+            delay = self.latency(self.rng)
+        if roll < self.timeout_rate:
+            return 'timeout', self.timeout_seconds
+        if roll < self.timeout_rate + self.error_rate:
+            return 'error', delay
+        return None, delay
+
+    def record(self, outcome, delay):
+        with self.lock:
+            self.stats[outcome] += 1
+            self.stats["latency_total"] += delay
+
+    def summary(self):
+        s = self.stats
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        answered = s["ok"] + s["errors"]
+        mean = s["latency_total"] / answered if answered else 0.0
+        return (f"STUB LLM: {s['requests']} requests ({s['requests'] / elapsed:.1f}/s), {s['ok']} ok, "
+                f"{s['errors']} errors, {s['timeouts']} timeouts, mean injected latency {mean:.2f}s")
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output readable
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        messages = request.get('messages', [])
+        system_prompt = next((m['content'] for m in messages if m['role'] == 'system'), '')
+        user_content = next((m['content'] for m in reversed(messages) if m['role'] == 'user'), '{}')
+
+        fault, delay = server.draw_fault()
+        time.sleep(delay)
+        if fault == 'timeout':
+            server.record('timeouts', 0.0)
+            self.close_connection = True
+            return
+        if fault == 'error':
+            server.record('errors', delay)
+            self._send_json(500, {"error": {"message": "Injected server error", "type": "server_error"}})
+            return
+
+        try:
+            content = json.dumps(server.generator(system_prompt, user_content), ensure_ascii=False)
+        except Exception as e:
+            server.record('errors', delay)
+            self._send_json(500, {"error": {"message": f"Generator failed: {e}", "type": "server_error"}})
+            return
+        server.record('ok', delay)
+        prompt_tokens = (len(system_prompt) + len(user_content)) // 4
+        completion_tokens = len(content) // 4
+        self._send_json(200, {
+            "id": f"chatcmpl-stub-{server.stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get('model', 'stub'),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+def start_server(host, port, generator, **options):
+    """Starts the stub server on a daemon thread and returns it."""
+    server = StubLLMServer((host, port), generator, **options)
+    threading.Thread(target=server.serve_forever, name="llm-stub-server", daemon=True).start()
+    return server
+
+# --- Benchmark ---------------------------------------------------------------
+
+def _percentile(values, q):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+def _run_simulation(job):
+    """Worker process: runs one paced simulation against the stub server and returns its metrics."""
+    index, seed, ticks, tick_seconds, log_dir = job
+    sys.stdout = open(os.devnull, 'w')  # the simulation is chatty
+    random.seed(seed)
+    from simulation_engine import SimulationEngine
+
+    decision_delays = []
+
+    class BenchEngine(SimulationEngine):
+        def _apply_commands(self, commands_json):
+            if 'requested_tick' in commands_json:
+                decision_delays.append(self.current_tick - commands_json['requested_tick'])
+            super()._apply_commands(commands_json)
+
+    engine = BenchEngine(log_file=os.path.join(log_dir, f"sim_{index:03d}.json"), headless=True)
+    engine._start_run()
+    start = time.perf_counter()
+    try:
+        while engine.current_tick < ticks and not engine.game_over:
+            tick_start = time.perf_counter()
+            engine.tick()
+            engine.check_game_over()
+            remaining = tick_seconds - (time.perf_counter() - tick_start)
+            if remaining > 0:
+                time.sleep(remaining)
+    finally:
+        elapsed = time.perf_counter() - start
+        engine._end_run()
+    engine.close()
+    return {
+        "sim": index, "seed": seed, "ticks": engine.current_tick, "seconds": elapsed,
+        "result": engine.game_over_message or "RUNNING",
+        "latencies": list(engine.central_strategist.llm.latencies),
+        "decision_delays": decision_delays,
+    }
+
+def run_benchmark(args):
+    server = start_server(args.host, args.port, make_generator(args.generator, args.replay_path),
+                          latency=args.latency, error_rate=args.error_rate, timeout_rate=args.timeout_rate,
+                          timeout_seconds=args.timeout_seconds, seed=args.seed)
+    print(f"Stub LLM server at {server.base_url} ({args.generator}, latency {args.latency}).")
+    log_dir = os.path.join(args.log_dir, time.strftime("%Y%m%d-%H%M%S"))
+    os.makedirs(log_dir, exist_ok=True)
+    # Spawned workers inherit this environment and import config afresh
+    os.environ.update({"LLM_REQUESTS_PER_MINUTE": "0"})
+    os.environ.update(kv.split('=', 1) for kv in args.env)
+    os.environ.update({
+        "API_KEY": "stub", "LLM_BASE_URL": server.base_url, "ENABLE_VISUALIZATION": "false",
+        "MOCK_LLM_RESPONSE": "false", "LLM_CACHE_MODE": "off", "LIVE_VIEW": "false",
+    })
+    jobs = [(i, args.seed + i, args.ticks, args.tick_seconds, log_dir) for i in range(args.sims)]
+
+    start = time.perf_counter()
+    with multiprocessing.get_context('spawn').Pool(args.sims) as pool:
+        results = pool.map(_run_simulation, jobs)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{'sim':>4} {'seed':>6} {'ticks':>6} {'ticks/s':>8} {'calls':>6} {'p50 s':>7} {'p95 s':>7} {'delay p50':>10}  result")
+    for r in results:
+        print(f"{r['sim']:>4} {r['seed']:>6} {r['ticks']:>6} {r['ticks'] / r['seconds']:>8.1f} {len(r['latencies']):>6} "
+              f"{_percentile(r['latencies'], 0.5):>7.2f} {_percentile(r['latencies'], 0.95):>7.2f} "
+              f"{_percentile(r['decision_delays'], 0.5):>10} {r['result']}")
+    latencies = [v for r in results for v in r['latencies']]
+    delays = [v for r in results for v in r['decision_delays']]
+    summary = {
+        "sims": args.sims, "wall_seconds": elapsed,
+        "total_ticks": sum(r['ticks'] for r in results),
+        "llm_calls": len(latencies),
+        "calls_per_second": len(latencies) / elapsed,
+        "latency_p50": _percentile(latencies, 0.5), "latency_p95": _percentile(latencies, 0.95),
+        "latency_p99": _percentile(latencies, 0.99),
+        "decision_delay_ticks_p50": _percentile(delays, 0.5), "decision_delay_ticks_p95": _percentile(delays, 0.95),
+        "server": dict(server.stats),
+    }
+    print(f"\nEnd-to-end LLM latency: p50 {summary['latency_p50']:.2f}s, p95 {summary['latency_p95']:.2f}s, "
+          f"p99 {summary['latency_p99']:.2f}s over {summary['llm_calls']} calls ({summary['calls_per_second']:.1f} calls/s)")
+    print(f"Decision delay (request -> commands applied): p50 {summary['decision_delay_ticks_p50']} ticks, "
+          f"p95 {summary['decision_delay_ticks_p95']} ticks")
+    print(server.summary())
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"summary": summary, "runs": results}, f, indent=2)
+        print(f"Results written to '{args.json}'.")
+    server.shutdown()
+
+# --- CLI ---------------------------------------------------------------------
+
+def _add_server_options(parser):
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089, help="0 picks a free port")
+    parser.add_argument("--generator", choices=["rule", "replay", "standby"], default="rule")
+    parser.add_argument("--replay-path", default=LLM_CACHE_PATH, help="Recording used by the replay generator")
+    parser.add_argument("--latency", default="lognormal:0.8,0.5",
+                        help="fixed:S | uniform:MIN,MAX | normal:MEAN,STD | lognormal:MEDIAN,SIGMA (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with HTTP 500")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Share of requests that never answer")
+    parser.add_argument("--timeout-seconds", type=float, default=300.0, help="How long a 'timeout' request hangs")
+    parser.add_argument("--seed", type=int, default=1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stand-in for the strategist LLM.")
+    sub = parser.add_subparsers(dest="mode", required=True)
+    serve = sub.add_parser("serve", help="Run the stub server until interrupted")
+    _add_server_options(serve)
+    bench = sub.add_parser("bench", help="Run concurrent simulations against an in-process stub server")
+    _add_server_options(bench)
+    bench.set_defaults(port=0)
+    bench.add_argument("--sims", type=int, default=4, help="Concurrent simulations (one process each)")
+    bench.add_argument("--ticks", type=int, default=300, help="Tick limit per simulation")
+    bench.add_argument("--tick-seconds", type=float, default=0.1, help="Wall time per tick (0 = unpaced)")
+    bench.add_argument("--log-dir", default=os.path.join(tempfile.gettempdir(), "llm_bench"), help="Per-simulation logs go to a timestamped folder here")
+    bench.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                       help="Extra settings for the simulations, e.g. --env HYBRID_PLANNING=true")
+    bench.add_argument("--json", help="Write per-run and summary metrics to this file")
+    args = parser.parse_args()
+
+    if args.mode == "bench":
+        run_benchmark(args)
+        return
+    server = StubLLMServer((args.host, args.port), make_generator(args.generator, args.replay_path),
+                           latency=args.latency, error_rate=args.error_rate, timeout_rate=args.timeout_rate,
+                           timeout_seconds=args.timeout_seconds, seed=args.seed)
+    print(f"Stub LLM server listening on {server.base_url} ({args.generator}, latency {args.latency}). Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print()
+    print(server.summary())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# FILE: log_analytics.py
+"""
+Headless run metrics from simulation logs (no pygame, no display).
+
+Streams a log once through TickLogReader (fast-forwarded stretches are expanded
+tick by tick) and computes:
+  - exploration coverage over time, reconstructed from the positions of scanning
+    drones and the scan radius (the same diamond as the replay, without line of sight),
+  - the drone survival curve and each drone's lifetime,
+  - the battery distribution over all active drone-ticks,
+  - hunt durations (a drone chasing a moving enemy) and how each hunt ended,
+  - missile flight times, impacts, hits and interceptions,
+  - time to completion (all enemies destroyed, or all drones lost).
+
+The pass is ReplayTimeline.build, so losses, missile outcomes and coverage follow
+the same rules as the replay, and the log's event index (drone losses, enemies
+destroyed, missile launches, impacts and interceptions) is written to the replay's
+'<log>.state' sidecar on the way; the replay then opens the log without a rebuild.
+
+    python log_analytics.py logs/simulation_log.json [more logs] [--every 50] [--json metrics.json]
+"""
+import argparse
+import json
+import sys
+from array import array
+from config import DRONE_SCAN_RADIUS, DRONE_BATTERY_MAX
+from log_reader import TickLogReader, LogFormatError
+from replay_state import ReplayTimeline
+
+BATTERY_BINS = 10
+MISSILE_FINISHED = ('SE_DESTROYED', 'MISSILE_IMPACT', 'MISSILE_INTERCEPTED')
+
+def _stats(values):
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+    return {"count": len(values), "mean": sum(values) / len(values), "min": values[0],
+            "median": values[len(values) // 2], "max": values[-1]}
+
+class LogAnalyzer:
+    """
+    Run metrics on top of replay_state.TickDerivation. feed() is the per-tick
+    callback of ReplayTimeline.build (record = index of the tick_data entry the
+    tick came from); metrics() returns everything as a JSON-compatible dict.
+    """
+    def __init__(self, every=10):
+        self.every = max(1, every)
+        self.derivation = None
+        self.coverage = []          # [tick, ratio] every 'every' ticks and at the last tick
+        self.survival = []          # [tick, drones left] at the start and whenever it changes
+        self.battery_bins = array('q', bytes(8 * BATTERY_BINS))
+        self.battery_sum = 0.0
+        self.battery_min = None
+        self.battery_at_loss = []
+        self.lost_at = {}           # drone id -> tick
+        self.hunts = []
+        self._hunting = {}          # drone id -> open hunt
+        self.missiles = []          # finished flights
+        self.first_tick = None
+        self.last_tick = None
+        self.completion = None
+        self._last_coverage_tick = None
+
+    def feed(self, state, record, events, derivation):
+        self.derivation = derivation
+        tick = state['tick']
+        if self.first_tick is None:
+            self.first_tick = tick
+        self.last_tick = tick
+
+        for kind, _, subject in events:
+            if kind == 'DRONE_LOST':
+                self.lost_at[subject['id']] = tick
+                self.battery_at_loss.append(subject['battery'])
+                self._end_hunt(subject['id'], tick, 'drone_lost')
+            elif kind == 'ENEMY_DESTROYED':
+                # A kamikaze hit destroys the hunting drone on the same tick
+                for hunt in self.hunts:
+                    if hunt['end'] == tick and hunt['outcome'] == 'drone_lost':
+                        hunt['outcome'] = 'kamikaze'
+            elif kind in MISSILE_FINISHED:
+                self.missiles.append(subject)
+
+        left = 0
+        for drone in state.get('drones', []):
+            if drone['status'] == 'DESTROYED':
+                continue
+            left += 1
+            if drone['status'] != 'ACTIVE':
+                continue
+            battery = drone['battery']
+            self.battery_sum += battery
+            self.battery_min = battery if self.battery_min is None else min(self.battery_min, battery)
+            self.battery_bins[min(BATTERY_BINS - 1, max(0, int(battery * BATTERY_BINS / DRONE_BATTERY_MAX)))] += 1
+            if (drone.get('current_command') or {}).get('is_hunting'):
+                if drone['id'] not in self._hunting:
+                    self._hunting[drone['id']] = {"drone": drone['id'], "start": tick, "end": None}
+            else:
+                self._end_hunt(drone['id'], tick, 'called_off')
+        if not self.survival or self.survival[-1][1] != left:
+            self.survival.append([tick, left])
+
+        if self.completion is None:
+            self._check_completion(tick)
+        if tick % self.every == 0:
+            self._sample_coverage(tick)
+
+    def _end_hunt(self, drone_id, tick, outcome):
+        hunt = self._hunting.pop(drone_id, None)
+        if hunt is not None:
+            hunt.update(end=tick, duration=tick - hunt['start'], outcome=outcome)
+            self.hunts.append(hunt)
+
+    def _check_completion(self, tick):
+        d = self.derivation
+        if (d.enemy_status and all(s == 'DESTROYED' for s in d.enemy_status.values())
+                and len(d.se_destroyed) == len(d.se_by_position)):
+            self.completion = {"result": "SUCCESS", "tick": tick}
+        elif d.drone_status and all(s == 'DESTROYED' for s in d.drone_status.values()):
+            self.completion = {"result": "FAILURE", "tick": tick}
+
+    def _sample_coverage(self, tick):
+        if self._last_coverage_tick != tick:
+            total = len(self.derivation.covered)
+            self.coverage.append([tick, round(len(self.derivation.coverage_order) / total, 4) if total else 0.0])
+            self._last_coverage_tick = tick
+
+    def metrics(self):
+        d = self.derivation
+        if self.last_tick is not None:
+            self._sample_coverage(self.last_tick)
+        final_coverage = self.coverage[-1][1] if self.coverage else 0.0
+        active_samples = sum(self.battery_bins)
+        step = DRONE_BATTERY_MAX / BATTERY_BINS
+        hunts = self.hunts + [dict(h, duration=self.last_tick - h['start'], outcome='ongoing') for h in self._hunting.values()]
+        missiles = self.missiles + [dict(m, outcome='in_flight') for m in (d.in_flight.values() if d else ())]
+        outcomes = {}
+        for item in hunts:
+            outcomes.setdefault("hunts", {}).setdefault(item['outcome'], 0)
+            outcomes["hunts"][item['outcome']] += 1
+        for item in missiles:
+            outcomes.setdefault("missiles", {}).setdefault(item['outcome'], 0)
+            outcomes["missiles"][item['outcome']] += 1
+        finished = [m for m in missiles if m['outcome'] != 'in_flight']
+        intercepted = outcomes.get("missiles", {}).get('intercepted', 0)
+        drone_ids = list(d.drone_status) if d else []
+        enemy_status = d.enemy_status if d else {}
+
+        return {
+            "ticks": {"first": self.first_tick, "last": self.last_tick},
+            "completion": self.completion or {"result": "UNFINISHED", "tick": self.last_tick},
+            "coverage": {
+                "scan_radius": d.scan_radius if d else None, "final": final_coverage,
+                "ticks_to": {f"{int(level * 100)}%": next((t for t, c in self.coverage if c >= level), None)
+                             for level in (0.25, 0.5, 0.75, 0.9)},
+                "series": self.coverage,
+            },
+            "survival": {
+                "curve": self.survival,
+                "lost": len(self.lost_at),
+                "lifetimes": {drone_id: self.lost_at.get(drone_id, self.last_tick) - self.first_tick
+                              for drone_id in drone_ids},
+            },
+            "battery": {
+                "samples": active_samples,
+                "mean": self.battery_sum / active_samples if active_samples else None,
+                "min": self.battery_min,
+                "histogram": [[round(i * step, 1), round((i + 1) * step, 1), count]
+                              for i, count in enumerate(self.battery_bins)],
+                "at_loss": _stats(self.battery_at_loss),
+            },
+            "hunts": {"durations": _stats([h['duration'] for h in hunts]),
+                      "outcomes": outcomes.get("hunts", {}), "list": hunts},
+            "missiles": {
+                "launched": len(missiles),
+                "outcomes": outcomes.get("missiles", {}),
+                "intercept_rate": intercepted / len(finished) if finished else None,
+                "flight_ticks": _stats([m['flight_ticks'] for m in finished]),
+                "list": missiles,
+            },
+            "enemies_destroyed": {"stationary": dict(d.se_destroyed) if d else {},
+                                  "moving": sum(1 for s in enemy_status.values() if s == 'DESTROYED')},
+        }
+
+def analyze(log_path, scan_radius=DRONE_SCAN_RADIUS, every=10, write_index=True):
+    """
+    Streams one log and returns (metrics, timeline). Unless disabled, the timeline (with the
+    event index) is saved as the replay's '<log>.state' sidecar; not with a non-default scan
+    radius, whose coverage the replay would not expect.
+    """
+    with TickLogReader(log_path) as reader:
+        analyzer = LogAnalyzer(every)
+        timeline = ReplayTimeline.build(reader, scan_radius, on_tick=analyzer.feed)
+        if write_index and scan_radius == DRONE_SCAN_RADIUS:
+            timeline.save(reader)
+    metrics = analyzer.metrics()
+    metrics["events"] = len(timeline.events)
+    return metrics, timeline
+
+def _fmt(stats, unit=""):
+    if not stats.get("count"):
+        return "none"
+    return (f"{stats['count']}, mean {stats['mean']:.1f}{unit}, median {stats['median']}{unit}, "
+            f"min {stats['min']}{unit}, max {stats['max']}{unit}")
+
+def print_report(log_path, metrics, points=12):
+    completion = metrics["completion"]
+    print(f"=== {log_path} ===")
+    print(f"Result: {completion['result']} at tick {completion['tick']} "
+          f"(ticks {metrics['ticks']['first']}-{metrics['ticks']['last']})")
+
+    coverage = metrics["coverage"]
+    reached = ", ".join(f"{level} at tick {tick}" for level, tick in coverage["ticks_to"].items() if tick is not None)
+    print(f"Coverage (scan radius {coverage['scan_radius']}): final {coverage['final']:.1%}" + (f"; {reached}" if reached else ""))
+    stride = max(1, -(-len(coverage["series"]) // points))
+    series = [f"{tick}:{ratio:.0%}" for tick, ratio in coverage["series"][::stride]]
+    if series:
+        print("  over time: " + "  ".join(series))
+
+    survival = metrics["survival"]
+    print(f"Survival: {survival['lost']} of {len(survival['lifetimes'])} drones lost; curve "
+          + "  ".join(f"{tick}:{active}" for tick, active in survival["curve"]))
+
+    battery = metrics["battery"]
+    if battery["samples"]:
+        print(f"Battery over {battery['samples']} active drone-ticks: mean {battery['mean']:.1f}, min {battery['min']}")
+        peak = max(count for _, _, count in battery["histogram"]) or 1
+        for low, high, count in battery["histogram"]:
+            print(f"  {low:>5.0f}-{high:<5.0f} {'#' * round(30 * count / peak):<30} {count / battery['samples']:.1%}")
+        print(f"  at loss: {_fmt(battery['at_loss'])}")
+
+    hunts = metrics["hunts"]
+    print(f"Hunts: {_fmt(hunts['durations'], ' ticks')}"
+          + (f"; outcomes {hunts['outcomes']}" if hunts["outcomes"] else ""))
+
+    missiles = metrics["missiles"]
+    rate = missiles["intercept_rate"]
+    print(f"Missiles: {missiles['launched']} launched, outcomes {missiles['outcomes'] or '{}'}"
+          + (f", intercept rate {rate:.0%}" if rate is not None else "")
+          + f"; flight {_fmt(missiles['flight_ticks'], ' ticks')}")
+    destroyed = metrics["enemies_destroyed"]
+    print(f"Enemies destroyed: {len(destroyed['stationary'])} stationary "
+          + (f"({', '.join(f'{k} at {v}' for k, v in destroyed['stationary'].items())}) " if destroyed["stationary"] else "")
+          + f"and {destroyed['moving']} moving; {metrics['events']} events indexed")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute run metrics from simulation logs without a display.")
+    parser.add_argument("logs", nargs="+", help="Simulation log files")
+    parser.add_argument("--scan-radius", type=int, default=DRONE_SCAN_RADIUS,
+                        help="Scan radius the runs used (default: DRONE_SCAN_RADIUS)")
+    parser.add_argument("--every", type=int, default=10, help="Coverage sample interval in ticks")
+    parser.add_argument("--json", help="Write all metrics (per log) to this JSON file")
+    parser.add_argument("--no-index", action="store_true", help="Do not write the '<log>.state' sidecar")
+    args = parser.parse_args()
+
+    results = {}
+    for log_path in args.logs:
+        try:
+            metrics, _ = analyze(log_path, args.scan_radius, args.every, write_index=not args.no_index)
+        except (OSError, LogFormatError) as e:
+            print(f"Error: {log_path}: {e}", file=sys.stderr)
+            continue
+        results[log_path] = metrics
+        print_report(log_path, metrics)
+        print()
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Metrics written to '{args.json}'.")
+    if len(results) < len(args.logs):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+# FILE: log_reader.py
+import json
+import mmap
+import os
+import re
+import struct
+from array import array
+from collections import OrderedDict
+from config import REPLAY_CACHE_SIZE
+
+class LogFormatError(ValueError):
+    """Raised when a simulation log cannot be indexed or decoded."""
+
+class TickLogReader:
+    """
+    Lazy, seekable reader for the JSON logs written by SimulationLogger.
+
+    Instead of parsing the whole file, it builds (or loads) an index of the byte
+    offsets of every entry in 'tick_data' and decodes ticks on demand. Recently
+    decoded ticks are kept in a small LRU cache around the playhead, so seeking
+    to any tick costs one seek + one small json.loads regardless of log size.
+    The index is stored next to the log ('<log>.idx') and reused while the log
+    file is unchanged.
+    """
+    INDEX_MAGIC = b'TIDX'
+    INDEX_VERSION = 1
+    _INDEX_HEADER = struct.Struct('<4sIqqq')  # magic, version, size, mtime_ns, count
+
+    # SimulationLogger writes with indent=2, so every tick entry starts like this.
+    # Finding it with mmap.find runs at memory speed even on multi-GB logs.
+    _TICK_ENTRY_MARKER = b'\n    {\n      "tick": '
+    # Generic JSON tokenizer used when the log is not in the logger's layout
+    _JSON_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}\[\]]')
+
+    def __init__(self, log_path, cache_size=REPLAY_CACHE_SIZE, use_index_file=True):
+        self.log_path = log_path
+        self.index_path = log_path + '.idx'
+        self.cache_size = max(1, cache_size)
+        self._cache = OrderedDict()
+        self._decoder = json.JSONDecoder()
+
+        self._file = open(log_path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise LogFormatError(f"Log file '{log_path}' is empty.")
+
+        self._tick_data_pos = self._mm.find(b'"tick_data"')
+        if self._tick_data_pos == -1:
+            self.close()
+            raise LogFormatError(f"'{log_path}' has no 'tick_data' section.")
+
+        self.initial_state = self._read_initial_state()
+
+        self._offsets = self._load_index() if use_index_file else None
+        if self._offsets is None:
+            self._offsets = self._build_index()
+            if use_index_file:
+                self._save_index()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        return self.get_tick(index)
+
+    def __iter__(self):
+        """Streams ticks in order without filling the LRU cache."""
+        for i in range(len(self)):
+            yield self._decode(i)
+
+    def get_tick(self, index):
+        """Returns the decoded tick at 'index' (negative indices count from the end)."""
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError(f"Tick index {index} out of range (0-{count - 1}).")
+
+        if index in self._cache:
+            self._cache.move_to_end(index)
+            return self._cache[index]
+
+        tick_data = self._decode(index)
+        self._cache[index] = tick_data
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return tick_data
+
+    def close(self):
+        self._cache.clear()
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _decode(self, index):
+        start, end = self._offsets[index], self._offsets[index + 1]
+        text = self._mm[start:end].decode('utf-8')
+        try:
+            tick_data, _ = self._decoder.raw_decode(text, len(text) - len(text.lstrip()))
+        except json.JSONDecodeError as e:
+            raise LogFormatError(f"Corrupted tick entry #{index} in '{self.log_path}': {e}")
+        return tick_data
+
+    def _read_initial_state(self):
+        """Decodes only the 'initial_state' section, which precedes 'tick_data'."""
+        key_pos = self._mm.find(b'"initial_state"', 0, self._tick_data_pos)
+        if key_pos == -1:
+            return {}
+        colon = self._mm.find(b':', key_pos)
+        text = self._mm[colon + 1:self._tick_data_pos].decode('utf-8').strip().rstrip(',')
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            raise LogFormatError(f"Could not parse 'initial_state' in '{self.log_path}': {e}")
+
+    def _build_index(self):
+        """Scans the log once and returns the start offsets of all ticks plus an end sentinel."""
+        array_start = self._mm.find(b'[', self._tick_data_pos)
+        array_end = self._mm.rfind(b']')
+        if array_start == -1 or array_end < array_start:
+            raise LogFormatError(f"'tick_data' in '{self.log_path}' is not a complete list.")
+
+        offsets = array('q')
+        pos = self._mm.find(self._TICK_ENTRY_MARKER, array_start, array_end)
+        while pos != -1:
+            offsets.append(pos + 1)
+            pos = self._mm.find(self._TICK_ENTRY_MARKER, pos + 1, array_end)
+
+        if not offsets and self._mm.find(b'{', array_start, array_end) != -1:
+            # Not the logger's pretty-printed layout (e.g. minified); tokenize instead
+            return self._build_index_generic(array_start)
+
+        offsets.append(array_end)
+        return offsets
+
+    def _build_index_generic(self, array_start):
+        offsets = array('q')
+        depth = 0
+        end = None
+        for match in self._JSON_TOKEN.finditer(self._mm, array_start):
+            token = match.group()
+            if token[0] == ord('"'):
+                continue
+            if token in (b'{', b'['):
+                if depth == 1:
+                    offsets.append(match.start())
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 1:
+                    end = match.end()
+                elif depth == 0:
+                    break
+        if depth != 0:
+            raise LogFormatError(f"'tick_data' in '{self.log_path}' is truncated.")
+        offsets.append(end if end is not None else array_start)
+        return offsets
+
+    def file_signature(self):
+        stat = os.stat(self.log_path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _load_index(self):
+        """Returns cached offsets if the sidecar index matches the current log file."""
+        try:
+            with open(self.index_path, 'rb') as f:
+                header = f.read(self._INDEX_HEADER.size)
+                if len(header) != self._INDEX_HEADER.size:
+                    return None
+                magic, version, size, mtime_ns, count = self._INDEX_HEADER.unpack(header)
+                if magic != self.INDEX_MAGIC or version != self.INDEX_VERSION:
+                    return None
+                if (size, mtime_ns) != self.file_signature():
+                    return None
+                offsets = array('q')
+                offsets.fromfile(f, count + 1)
+                return offsets
+        except (OSError, EOFError, struct.error):
+            return None
+
+    def _save_index(self):
+        size, mtime_ns = self.file_signature()
+        tmp_path = self.index_path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(self._INDEX_HEADER.pack(self.INDEX_MAGIC, self.INDEX_VERSION, size, mtime_ns, len(self)))
+                self._offsets.tofile(f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"Warning: could not write tick index '{self.index_path}': {e}")
@@ -7,7 +7,8 @@ avoid hidden air defense systems, and destroy targets using intelligent
 pathfinding and risk assessment.
 """
 
-from config import API_KEY, MOCK_LLM_RESPONSE, ENABLE_VISUALIZATION
+import random
+from config import API_KEY, MOCK_LLM_RESPONSE, ENABLE_VISUALIZATION, SIMULATION_SEED
 from simulation_engine import SimulationEngine
 
 if ENABLE_VISUALIZATION:
@@ -23,6 +24,9 @@ def main():
     print("🚁 Starting Strategist Drone Simulation...")
     print("=" * 50)
     
+    if SIMULATION_SEED is not None:
+        random.seed(SIMULATION_SEED)
+
     try:
         sim = SimulationEngine()
         sim.run()
@@ -0,0 +1,142 @@
+# FILE: memory_profiler.py
+import inspect
+import os
+import tracemalloc
+from config import MEMORY_PROFILE_FRAMES
+
+SUBSYSTEMS = ('grid', 'drones', 'strategist', 'logger', 'pathfinding', 'other')
+
+# Modules whose allocations are charged to a subsystem (matched by file name)
+SUBSYSTEM_FILES = {
+    'grid.py': 'grid',
+    'drone_agent.py': 'drones',
+    'central_strategist.py': 'strategist', 'known_map.py': 'strategist', 'intel_store.py': 'strategist',
+    'frontier_planner.py': 'strategist', 'prompt_encoding.py': 'strategist',
+    'planning_scheduler.py': 'strategist', 'llm_cache.py': 'strategist',
+    'simulation_logger.py': 'logger',
+}
+
+def _pathfinding_lines():
+    """(file name, first line, last line) of the pathfinding functions."""
+    from drone_agent import DroneAgent
+    from missile_system import MissileSystem
+    ranges = []
+    for function in (DroneAgent._bfs_pathfind_avoid_hss, MissileSystem._find_path_on_known_map):
+        lines, first = inspect.getsourcelines(function)
+        ranges.append((os.path.basename(inspect.getsourcefile(function)), first, first + len(lines) - 1))
+    return ranges
+
+class MemoryProfiler:
+    """
+    Attributes live Python memory to the simulation's subsystems with tracemalloc.
+
+    Every 'interval' ticks a snapshot is taken and each allocation is charged to
+    the subsystem of the innermost stack frame that belongs to one: the BFS
+    functions of drones and missiles count as 'pathfinding', otherwise the module
+    decides (see SUBSYSTEM_FILES). Memory is charged where it was allocated, not
+    where it is kept: a scan result built by a drone and stored in the strategist's
+    world model counts for 'drones'. Between samples the net growth per tick is
+    the allocation rate; memory freed again before the next sample is not seen.
+
+    Allocations made in library code (json, copy) are attributed through the
+    caller's frames, up to 'frames' deep; anything not reached counts as 'other'.
+    Tracing slows ticks down several times (more with deeper stacks) and each
+    sample costs seconds on long runs; it is meant for diagnosis runs.
+    """
+    def __init__(self, interval=50, frames=MEMORY_PROFILE_FRAMES):
+        self.interval = max(1, interval)
+        self.frames = frames
+        self.samples = []
+        self.next_sample = 0
+        self._pathfinding = _pathfinding_lines()
+        self._categories = {}  # traceback -> subsystem
+        self._last_snapshot = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        tracemalloc.reset_peak()
+
+    def stop(self):
+        tracemalloc.stop()
+
+    def sample(self, tick, force=False):
+        """Takes a snapshot if one is due at 'tick' (or 'force')."""
+        if not tracemalloc.is_tracing() or (tick < self.next_sample and not force):
+            return None
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+        usage = {name: {"size": 0, "blocks": 0} for name in SUBSYSTEMS}
+        for stat in snapshot.statistics('traceback'):
+            entry = usage[self._classify(stat.traceback)]
+            entry["size"] += stat.size
+            entry["blocks"] += stat.count
+        current, peak = tracemalloc.get_traced_memory()
+        record = {"tick": tick, "traced": current, "peak": peak, "subsystems": usage}
+        self.samples.append(record)
+        self._last_snapshot = snapshot
+        self.next_sample = tick + self.interval
+        return record
+
+    def _classify(self, traceback):
+        category = self._categories.get(traceback)
+        if category is None:
+            category = 'other'
+            for frame in traceback:  # most recent frame first
+                name = os.path.basename(frame.filename)
+                if any(name == file and first <= frame.lineno <= last for file, first, last in self._pathfinding):
+                    category = 'pathfinding'
+                    break
+                if name in SUBSYSTEM_FILES:
+                    category = SUBSYSTEM_FILES[name]
+                    break
+            self._categories[traceback] = category
+        return category
+
+    @property
+    def peak(self):
+        """Peak traced memory in bytes since start()."""
+        return tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else max(
+            (s["peak"] for s in self.samples), default=0)
+
+    def summary(self):
+        """Machine-readable totals: peak, last sample and net growth per tick by subsystem."""
+        if not self.samples:
+            return {"peak_bytes": self.peak, "samples": 0}
+        first, last = self.samples[0], self.samples[-1]
+        ticks = max(1, last["tick"] - first["tick"])
+        return {
+            "peak_bytes": max(s["peak"] for s in self.samples),
+            "samples": len(self.samples),
+            "final_tick": last["tick"],
+            "final_bytes": {name: last["subsystems"][name]["size"] for name in SUBSYSTEMS},
+            "growth_bytes_per_tick": {name: (last["subsystems"][name]["size"] - first["subsystems"][name]["size"]) / ticks
+                                      for name in SUBSYSTEMS},
+        }
+
+    def report(self, top_sites=5):
+        """Text report: live memory per subsystem at every sample, growth rates and top allocation sites."""
+        if not self.samples:
+            return "MEMORY PROFILE: no samples taken."
+        lines = [f"MEMORY PROFILE (tracemalloc, every {self.interval} ticks), live KiB by subsystem:",
+                 f"  {'tick':>6} {'total':>9} " + " ".join(f"{name:>11}" for name in SUBSYSTEMS)]
+        for sample in self.samples:
+            usage = sample["subsystems"]
+            lines.append(f"  {sample['tick']:>6} {sample['traced'] / 1024:>9.0f} "
+                         + " ".join(f"{usage[name]['size'] / 1024:>11.0f}" for name in SUBSYSTEMS))
+        last = self.samples[-1]
+        summary = self.summary()
+        lines.append("  net growth, KiB/tick: " + ", ".join(
+            f"{name} {rate / 1024:+.2f}" for name, rate in summary["growth_bytes_per_tick"].items()))
+        lines.append(f"  peak traced memory: {summary['peak_bytes'] / 2**20:.1f} MiB "
+                     f"(last sample {last['traced'] / 2**20:.1f} MiB at tick {last['tick']})")
+        if self._last_snapshot is not None and top_sites:
+            lines.append(f"  largest allocation sites at tick {last['tick']}:")
+            for stat in self._last_snapshot.statistics('lineno')[:top_sites]:
+                frame = stat.traceback[0]
+                lines.append(f"    {stat.size / 1024:>9.0f} KiB {stat.count:>8} blocks  "
+                             f"{os.path.basename(frame.filename)}:{frame.lineno}")
+        return "\n".join(lines)
@@ -0,0 +1,153 @@
+# FILE: planning_scheduler.py
+import math
+import time
+from config import *
+
+# Smoothing factor for the latency and tick duration averages
+EMA_ALPHA = 0.3
+
+class PlanningScheduler:
+    """
+    Deadline-aware hybrid planning around the CentralStrategist.
+
+    - Planning rounds are due every 'interval' ticks. The LLM request of a round is
+      started 'lead' ticks early, on the state predicted for the due tick, so the
+      answer lands around when it is needed.
+    - Each round has a deadline (due tick + PLAN_DEADLINE_TICKS). If the LLM has not
+      answered by then, the local frontier planner issues stopgap commands once.
+    - When the LLM plan lands, commands for drones that were destroyed, are hunting,
+      or were retargeted since the request started are discarded as stale, as are
+      missile launches at stationary enemies that are already gone.
+    - 'interval' and 'lead' follow the measured LLM latency in ticks (exponential
+      moving averages of call latency and wall time per tick), bounded by
+      PLAN_MIN_INTERVAL and PLAN_MAX_INTERVAL.
+    """
+    def __init__(self, engine):
+        self.engine = engine
+        self.strategist = engine.central_strategist
+        self.interval = LLM_CALL_FREQUENCY
+        self.lead = 0
+        self.next_due = 0
+        self.round = None
+        self.latency_ticks = None
+        self._tick_seconds = None
+        self._last_tick_time = None
+        self._last_tick = None
+        self.stats = {"rounds": 0, "stopgaps": 0, "stale_commands": 0}
+
+    def update(self, tick):
+        """Runs the planning work for this tick. Returns a plan to apply, or None."""
+        self._measure_tick_time(tick)
+        engine = self.engine
+        parts = []
+
+        if STRATEGIST_BACKEND == 'local':
+            if tick >= self.next_due:
+                engine.collect_reports()
+                parts.append(self.strategist.plan_next_moves(
+                    tick, engine.drones, engine.missile_system, engine.moving_enemies, engine.active_missiles))
+                self.next_due = tick + self.interval
+            return self._merge(parts)
+
+        ready = self.strategist.poll_ready_plans(tick)
+        if ready:
+            self._observe_latency()
+            parts.append(self._drop_stale(ready))
+            if not self.strategist.pending_requests:
+                self.round = None
+
+        if self.round and not self.round['stopgap'] and tick >= self.round['deadline']:
+            print(f"PLANNER: LLM plan due at tick {self.round['due']} is late, issuing stopgap commands.")
+            engine.collect_reports()
+            parts.append(self.strategist.local_plan(engine.drones, engine.missile_system, engine.active_missiles))
+            self.round['stopgap'] = True
+            self.stats["stopgaps"] += 1
+
+        if not self.round and tick >= self.next_due - self.lead:
+            self._start_round(tick)
+
+        return self._merge(parts)
+
+    def _start_round(self, tick):
+        engine = self.engine
+        due = max(tick, self.next_due)
+        engine.collect_reports()
+        self.round = {
+            "due": due,
+            "deadline": due + PLAN_DEADLINE_TICKS,
+            "stopgap": False,
+            # Targets at request time, to recognise drones retargeted while the LLM thinks
+            "targets": {d.id: d.target_position for d in engine.drones},
+        }
+        self.strategist.plan_next_moves(tick, engine.drones, engine.missile_system, engine.moving_enemies,
+                                        engine.active_missiles, lookahead=due - tick)
+        self.stats["rounds"] += 1
+        self.next_due = due + self.interval
+
+    def _drop_stale(self, plan):
+        drones = self.engine.registry.drones
+        targets = self.round['targets'] if self.round else {}
+        known_se = {(e['position']['x'], e['position']['y'])
+                    for e in self.strategist.world_model['known_stationary_enemies'].values()}
+        fresh = []
+        for cmd in plan.get('commands', []):
+            drone = drones.get(cmd.get('drone_id'))
+            if cmd.get('command_type') == 'FIRE_MISSILE':
+                target = cmd.get('target_position') or {}
+                stale = (target.get('x'), target.get('y')) not in known_se
+            elif drone is None:
+                stale = False
+            else:
+                retargeted = drone.target_position is not None and drone.target_position != targets.get(drone.id)
+                stale = drone.status != 'ACTIVE' or drone.current_command.get('is_hunting') or retargeted
+            if stale:
+                self.stats["stale_commands"] += 1
+            else:
+                fresh.append(cmd)
+        return dict(plan, commands=fresh)
+
+    def next_event_tick(self):
+        """Earliest tick on which update() has work that does not wait for an LLM answer (None: none)."""
+        if STRATEGIST_BACKEND == 'local':
+            return self.next_due
+        if self.round:
+            return None if self.round['stopgap'] else self.round['deadline']
+        return self.next_due - self.lead
+
+    def _measure_tick_time(self, tick):
+        now = time.perf_counter()
+        if self._last_tick_time is not None and tick > self._last_tick:
+            # Per tick, also across fast-forwarded stretches
+            elapsed = (now - self._last_tick_time) / (tick - self._last_tick)
+            self._tick_seconds = elapsed if self._tick_seconds is None else (
+                EMA_ALPHA * elapsed + (1 - EMA_ALPHA) * self._tick_seconds)
+        self._last_tick_time = now
+        self._last_tick = tick
+
+    def _observe_latency(self):
+        """Adapts the call interval and the speculative lead to the latest LLM latency."""
+        latency = self.strategist.last_llm_latency
+        if latency is None or not self._tick_seconds:
+            return
+        ticks = latency / self._tick_seconds
+        self.latency_ticks = ticks if self.latency_ticks is None else (
+            EMA_ALPHA * ticks + (1 - EMA_ALPHA) * self.latency_ticks)
+        expected = math.ceil(self.latency_ticks)
+        self.interval = min(max(expected + 1, PLAN_MIN_INTERVAL), PLAN_MAX_INTERVAL)
+        self.lead = min(expected, self.interval - 1)
+
+    @staticmethod
+    def _merge(parts):
+        parts = [p for p in parts if p]
+        if not parts:
+            return None
+        if len(parts) == 1:
+            return parts[0]
+        return {"reasoning": "\n".join(p.get('reasoning') or '' for p in parts),
+                "commands": [cmd for p in parts for cmd in p.get('commands', [])]}
+
+    def summary(self):
+        s = self.stats
+        latency = f"{self.latency_ticks:.1f}" if self.latency_ticks is not None else "n/a"
+        return (f"PLANNER: {s['rounds']} rounds, {s['stopgaps']} stopgaps, {s['stale_commands']} stale commands dropped, "
+                f"LLM latency ~{latency} ticks, interval {self.interval}, lead {self.lead}")
@@ -0,0 +1,131 @@
+# FILE: prompt_encoding.py
+import json
+from config import DRONE_BATTERY_MAX, LLM_CALL_FREQUENCY, PROMPT_TOKEN_BUDGET
+
+DRONE_COLUMNS = ["id", "status", "battery", "x", "y", "target_x", "target_y", "scan", "idle_ticks"]
+LOW_BATTERY = DRONE_BATTERY_MAX * 0.25
+# Moving enemies not seen for this many ticks are the first knowledge to be summarized
+STALE_SIGHTING_TICKS = LLM_CALL_FREQUENCY * 3
+
+def dumps_compact(obj):
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for JSON), good enough for budgeting."""
+    return len(text) // 4 + 1
+
+class PromptEncoder:
+    """
+    Compact, delta-aware serialization of the strategist world state.
+
+    - Minified JSON, tables ('cols' + 'rows') instead of one object per drone/enemy.
+    - Run constants (grid size, base, objective) go into the system prompt once.
+    - Drones still flying the mission they had at the previous plan of the same
+      group are reduced to their target in 'busy'; only drones whose situation
+      changed (idle, new status/target/scan mode, low battery) get a full row.
+      Drones already reported lost are reduced to their ids.
+    - If the estimated size exceeds the token budget, low-priority sections are
+      summarized step by step (lost drones, stale sightings, busy drones,
+      missiles in flight). Drone rows, known SEs and threat zones are never cut.
+    """
+    def __init__(self, token_budget=PROMPT_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        # group id -> {drone id: (status, target, scan mode)} as of the last request
+        self._last_sent = {}
+        self.last_token_estimate = 0
+
+    @staticmethod
+    def static_context(world_state):
+        """System prompt section with everything that never changes during a run."""
+        known_world = world_state['known_world']
+        return f"""
+# SABİT BİLGİLER (kompakt durum formatı)
+- Görev: {world_state['mission_objective']}
+- Harita boyutu: {dumps_compact(known_world['grid_size'])}, üs: {dumps_compact(known_world['base_location'])}
+- Durum tablolar halinde gelir: `cols` sütun adlarını, `rows` satırları verir.
+- `busy`: önceki plandaki görevine devam eden drone'lar ve hedefleri (id -> [x, y]). Yeni görev vermen gerekmez.
+- `lost`: daha önce kaybedilmiş drone'lar. `*_count` alanları özetlenmiş bölümlerdir.
+"""
+
+    def encode(self, group_id, world_state):
+        """Returns the minified user message for one planning request and remembers what was sent."""
+        last_sent = self._last_sent.get(group_id, {})
+        sent_now = {}
+        rows, busy, lost = [], {}, []
+        for d in world_state['drones']:
+            target = d.get('target_position')
+            mission = (d['status'], (target['x'], target['y']) if target else None, d.get('scan_mode'))
+            sent_now[d['id']] = mission
+            if d['status'] == 'DESTROYED':
+                if last_sent.get(d['id'], ('',))[0] == 'DESTROYED':
+                    lost.append(d['id'])
+                    continue
+            elif (d['status'] == 'ACTIVE' and target and d['battery'] >= LOW_BATTERY
+                  and last_sent.get(d['id']) == mission):
+                busy[d['id']] = [target['x'], target['y']]
+                continue
+            rows.append([d['id'], d['status'], int(d['battery']), d['position']['x'], d['position']['y'],
+                         mission[1][0] if target else None, mission[1][1] if target else None,
+                         (d.get('scan_mode') or 'PASSIVE')[0], d['ticks_since_last_command']])
+        self._last_sent[group_id] = sent_now
+
+        known_world = world_state['known_world']
+        state = {
+            "tick": world_state['tick'],
+            "missiles_left": world_state['resources']['missiles_left'],
+            "drones": {"cols": DRONE_COLUMNS, "rows": rows},
+            "busy": busy,
+            "lost": lost,
+            "missiles_in_flight": {"cols": ["x", "y", "target_x", "target_y", "eta"], "rows": [
+                [m['current_position']['x'], m['current_position']['y'],
+                 m['target_position']['x'], m['target_position']['y'], m['eta_ticks']]
+                for m in world_state['missiles_in_flight']]},
+            "explored": known_world['map_boundaries_explored'],
+            "known_obstacles_count": known_world['known_obstacles_count'],
+            "stationary_enemies": {"cols": ["id", "x", "y", "status"], "rows": [
+                [e['id'], e['position']['x'], e['position']['y'], e['status']]
+                for e in known_world['known_stationary_enemies']]},
+            "moving_enemies": {"cols": ["id", "x", "y", "last_seen"], "rows": [
+                [e['id'], e['position']['x'], e['position']['y'], e['last_seen_tick']]
+                for e in known_world['known_moving_enemies']]},
+            "threat_zones": {"cols": ["x", "y", "radius"], "rows": [
+                [z['hss_location']['x'], z['hss_location']['y'], z['radius']]
+                for z in known_world['potential_threat_zones'] if 'hss_location' in z]},
+        }
+        if 'assigned_sector' in world_state:
+            state['assigned_sector'] = world_state['assigned_sector']
+
+        text = dumps_compact(state)
+        if self.token_budget > 0:
+            text = self._fit_budget(state, text)
+        self.last_token_estimate = estimate_tokens(text)
+        return text
+
+    def _fit_budget(self, state, text):
+        """Summarizes low-priority sections, least important first, until the state fits the budget."""
+        for reduce in (self._summarize_lost, self._drop_stale_sightings, self._summarize_busy, self._summarize_missiles):
+            if estimate_tokens(text) <= self.token_budget:
+                break
+            reduce(state)
+            text = dumps_compact(state)
+        return text
+
+    @staticmethod
+    def _summarize_lost(state):
+        state['lost_count'] = len(state.pop('lost'))
+
+    @staticmethod
+    def _drop_stale_sightings(state):
+        table = state['moving_enemies']
+        fresh = [row for row in table['rows'] if state['tick'] - row[3] <= STALE_SIGHTING_TICKS]
+        if len(fresh) < len(table['rows']):
+            state['stale_moving_enemies_count'] = len(table['rows']) - len(fresh)
+            table['rows'] = fresh
+
+    @staticmethod
+    def _summarize_busy(state):
+        state['busy_count'] = len(state.pop('busy'))
+
+    @staticmethod
+    def _summarize_missiles(state):
+        state['missiles_in_flight_count'] = len(state.pop('missiles_in_flight')['rows'])
@@ -0,0 +1,72 @@
+# FILE: render_layers.py
+import pygame
+from config import *
+
+class MapLayerCache:
+    """
+    Pre-rendered background layer with everything that does not move:
+    background colour, HSS ranges, obstacles, stationary enemies and the base.
+    Shared by the live Visualizer and the ReplayEngine. The layer is redrawn only
+    when the caller's change key differs from the one it was built with.
+    """
+    def __init__(self, grid_width, grid_height, cell_size=CELL_SIZE):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.cell_size = cell_size
+        self.surface = pygame.Surface((grid_width * cell_size, grid_height * cell_size))
+        self._key = None
+
+    def cell_rect(self, x, y):
+        """Screen rectangle of a grid cell (y grows upwards on the map)."""
+        return pygame.Rect(x * self.cell_size, (self.grid_height - 1 - y) * self.cell_size, self.cell_size, self.cell_size)
+
+    def is_current(self, key):
+        return key == self._key
+
+    def render(self, key, obstacles, base_bounds=None, hss_zones=(), stationary_enemies=(), hss_on_top=False):
+        """
+        Returns the layer, redrawing it if 'key' changed.
+        obstacles/stationary_enemies: (x, y) pairs, hss_zones: (x, y, radius) triples,
+        base_bounds: dict with min_x/max_x/min_y/max_y as written by SimulationLogger.
+        HSS ranges go under the map (live view) or, with hss_on_top, over obstacles and base (replay).
+        """
+        if self.is_current(key):
+            return self.surface
+        self._key = key
+
+        cs = self.cell_size
+        self.surface.fill(COLOR_BG)
+
+        if not hss_on_top:
+            self._draw_hss_zones(hss_zones)
+
+        for x, y in obstacles:
+            pygame.draw.rect(self.surface, COLOR_OBSTACLE, self.cell_rect(x, y))
+
+        for x, y in stationary_enemies:
+            rect = self.cell_rect(x, y)
+            pygame.draw.line(self.surface, COLOR_STATIONARY_ENEMY, (rect.left, rect.top), (rect.right, rect.bottom), 2)
+            pygame.draw.line(self.surface, COLOR_STATIONARY_ENEMY, (rect.left, rect.bottom), (rect.right, rect.top), 2)
+
+        # Üs bölgesi tek bir yarı saydam dikdörtgen olarak
+        if base_bounds:
+            top_left = self.cell_rect(base_bounds['min_x'], base_bounds['max_y'])
+            base_w = (base_bounds['max_x'] - base_bounds['min_x'] + 1) * cs
+            base_h = (base_bounds['max_y'] - base_bounds['min_y'] + 1) * cs
+            s = pygame.Surface((base_w, base_h), pygame.SRCALPHA)
+            s.fill(COLOR_BASE)
+            self.surface.blit(s, top_left.topleft)
+
+        if hss_on_top:
+            self._draw_hss_zones(hss_zones)
+        return self.surface
+
+    def _draw_hss_zones(self, hss_zones):
+        # HSS menzilleri
+        cs = self.cell_size
+        for x, y, radius in hss_zones:
+            pr = radius * cs
+            rect = self.cell_rect(x, y)
+            s = pygame.Surface((pr * 2, pr * 2), pygame.SRCALPHA)
+            pygame.draw.circle(s, COLOR_HSS_RANGE, (pr, pr), pr)
+            self.surface.blit(s, (rect.centerx - pr, rect.centery - pr))
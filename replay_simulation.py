@@ -1,65 +1,87 @@
 #!/usr/bin/env python3
 # FILE: replay_simulation.py
 import pygame
-import json
 import sys
 import time
 from config import * # Renkler, FPS ve CELL_SIZE gibi ayarlar için
+from log_reader import TickLogReader, LogFormatError
+from replay_state import ReplayTimeline
+from render_layers import MapLayerCache
 
 class ReplayEngine:
     """
     simulation_log.json dosyasını okuyarak simülasyonu görsel olarak yeniden oynatır.
     Herhangi bir oyun mantığı veya hesaplama içermez; sadece kaydedilmiş veriyi çizer.
+    Tick'ler TickLogReader ile talep üzerine okunur, böylece büyük loglar da anında açılır.
     """
     def __init__(self, log_path):
         print("Initializing Replay Engine...")
         self.log_path = log_path
-        self.log_data = self._load_log_data()
+        self.log_reader = self._load_log_data()
         
-        # Log dosyasından temel bilgileri al
-        initial_state = self.log_data['initial_state']
-        grid_size = initial_state['grid_size']
-        self.grid_width = grid_size['width']
-        self.grid_height = grid_size['height']
+        self._init_display(self.log_reader.initial_state, f"Replaying Simulation: {self.log_path}")
+        
+        # Türetilmiş durum (imha edilen SE'ler, kapsama, kayıp drone'lar) tek geçişte hesaplanır,
+        # böylece herhangi bir tick'e ileri veya geri doğru durumla atlanabilir.
+        self.timeline = ReplayTimeline.load(self.log_reader)
+        self.coverage_surface = pygame.Surface(self.screen.get_size(), pygame.SRCALPHA)
+        self.coverage_index = -1
+
+        # Oynatma durumu
+        self.paused = False
+        self.playback_speed = REPLAY_SPEED  # tick/saniye
+        self.tick_input = ""  # Tick'e atlamak için girilen rakamlar
+
+    def _init_display(self, initial_state, caption):
+        """Pygame penceresini açar ve statik harita bilgilerini yükler."""
+        self._load_static_map(initial_state)
         
         # Pygame'i başlat
         pygame.init()
         screen_width = self.grid_width * CELL_SIZE
         screen_height = self.grid_height * CELL_SIZE
         self.screen = pygame.display.set_mode((screen_width, screen_height))
-        pygame.display.set_caption(f"Replaying Simulation: {self.log_path}")
+        pygame.display.set_caption(caption)
         self.font = pygame.font.SysFont('Arial', 14, bold=True)
         self.clock = pygame.time.Clock()
 
-        # Statik harita elemanlarını yükle
+    def _load_static_map(self, initial_state):
+        """Statik harita elemanlarını yükler (pencere gerektirmez)."""
+        grid_size = initial_state['grid_size']
+        self.grid_width = grid_size['width']
+        self.grid_height = grid_size['height']
         self.obstacles = initial_state.get('obstacles', [])
         self.base_bounds = initial_state.get('base_bounds', {})
         self.hss_systems = initial_state.get('hss_systems', [])
         self.initial_stationary_enemies = initial_state.get('stationary_enemies', [])
-        
-        # Replay sırasında durumu takip etmek için
-        self.destroyed_se_ids = set() # İmha edilen sabit düşmanları takip et
+        self.map_layer = MapLayerCache(self.grid_width, self.grid_height)
 
     def _load_log_data(self):
-        """Log dosyasını okur ve JSON verisini döndürür."""
+        """Log dosyasının tick indeksini açar; tick'ler ihtiyaç oldukça çözülür."""
         try:
-            with open(self.log_path, 'r', encoding='utf-8') as f:
-                print(f"Successfully loaded '{self.log_path}'.")
-                return json.load(f)
+            log_reader = TickLogReader(self.log_path)
+            print(f"Successfully indexed '{self.log_path}' ({len(log_reader)} log entries).")
+            return log_reader
         except FileNotFoundError:
             print(f"ERROR: Log file not found at '{self.log_path}'")
             sys.exit(1)
-        except json.JSONDecodeError:
-            print(f"ERROR: Could not parse JSON from '{self.log_path}'. The file might be corrupted or incomplete.")
+        except LogFormatError as e:
+            print(f"ERROR: Could not parse JSON from '{self.log_path}'. The file might be corrupted or incomplete. ({e})")
             sys.exit(1)
 
     def run(self):
         """Yeniden oynatma döngüsünü başlatır."""
         running = True
-        paused = False
-        current_tick_index = 0
-        tick_data_list = self.log_data['tick_data']
-        max_tick_index = len(tick_data_list) - 1
+        max_tick_index = len(self.timeline) - 1
+        if max_tick_index < 0:
+            print("Log contains no ticks. Nothing to replay.")
+            pygame.quit()
+            return
+
+        # Oynatma hızı FPS'den bağımsızdır: oynatma kafası gerçek zamana göre ilerler,
+        # hız FPS'yi aşarsa aradaki tick'ler hiç çözülmeden atlanır.
+        playhead = 0.0
+        last_time = time.time()
 
         while running:
             # Pygame olaylarını işle (kapatma, duraklatma, vb.)
@@ -67,89 +89,123 @@ class ReplayEngine:
                 if event.type == pygame.QUIT:
                     running = False
                 if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_SPACE:
-                        paused = not paused
-                        print("Replay Paused" if paused else "Replay Resumed")
-                    if event.key == pygame.K_RIGHT:
-                        current_tick_index = min(current_tick_index + 1, max_tick_index)
-                    if event.key == pygame.K_LEFT:
-                        current_tick_index = max(current_tick_index - 1, 0)
-            
-            # Ekrana çizim yap
-            current_tick_data = tick_data_list[current_tick_index]
-            self.draw_frame(current_tick_data)
-            
-            # Duraklatılmadıysa bir sonraki tick'e geç
-            if not paused:
-                if current_tick_index < max_tick_index:
-                    current_tick_index += 1
-                else:
+                    new_index = self._handle_key(event, int(playhead), max_tick_index)
+                    if new_index is not None:
+                        playhead = float(new_index)
+
+            now = time.time()
+            if not self.paused:
+                playhead += self.playback_speed * (now - last_time)
+                if playhead >= max_tick_index:
                     # Simülasyon sonuna gelindiğinde duraklat
-                    if not paused:
-                        paused = True
-                        print("End of simulation reached. Paused.")
+                    playhead = float(max_tick_index)
+                    self.paused = True
+                    print("End of simulation reached. Paused.")
+            last_time = now
 
-            # FPS'yi ayarla
+            # Ekrana çizim yap
+            self.draw_frame(int(playhead))
+
+            # Ekran yenileme hızını ayarla
             self.clock.tick(FPS)
         
         pygame.quit()
+        self.log_reader.close()
         print("Replay finished.")
 
-    def draw_frame(self, tick_data):
+    def _handle_key(self, event, tick_index, max_tick_index):
+        """Klavye kontrollerini işler. Oynatma kafası değişecekse yeni tick indeksini döndürür."""
+        key = event.key
+        if key == pygame.K_SPACE:
+            self.paused = not self.paused
+            print("Replay Paused" if self.paused else "Replay Resumed")
+        elif key == pygame.K_RIGHT:
+            return min(tick_index + 1, max_tick_index)
+        elif key == pygame.K_LEFT:
+            return max(tick_index - 1, 0)
+        elif key == pygame.K_UP:
+            self.playback_speed = min(self.playback_speed * 2, REPLAY_MAX_SPEED)
+            print(f"Playback speed: {self.playback_speed:g} ticks/s")
+        elif key == pygame.K_DOWN:
+            self.playback_speed = max(self.playback_speed / 2, 0.25)
+            print(f"Playback speed: {self.playback_speed:g} ticks/s")
+        elif key == pygame.K_HOME:
+            return 0
+        elif key == pygame.K_END:
+            return max_tick_index
+        elif key in (pygame.K_n, pygame.K_PAGEDOWN):
+            event_info = self.timeline.next_event(tick_index)
+            if event_info:
+                print(f"Jump to event @ tick {event_info[1]}: {event_info[3]}")
+                return event_info[0]
+        elif key in (pygame.K_p, pygame.K_PAGEUP):
+            event_info = self.timeline.previous_event(tick_index)
+            if event_info:
+                print(f"Jump to event @ tick {event_info[1]}: {event_info[3]}")
+                return event_info[0]
+        elif event.unicode.isdigit():
+            self.tick_input += event.unicode
+        elif key == pygame.K_BACKSPACE:
+            self.tick_input = self.tick_input[:-1]
+        elif key in (pygame.K_RETURN, pygame.K_KP_ENTER) and self.tick_input:
+            target_tick = int(self.tick_input)
+            self.tick_input = ""
+            return self.timeline.index_of_tick(target_tick)
+        return None
+
+    def draw_frame(self, tick_index):
         """Tek bir tick'e ait veriyi kullanarak ekranı çizer."""
-        self.screen.fill(COLOR_BG)
-        
-        # Statik elemanları çiz
+        self.render_frame(tick_index)
+        pygame.display.flip()
+
+    def render_frame(self, tick_index):
+        """Tick'i self.screen yüzeyine çizer; pencere olmadan da (ör. dışa aktarım) kullanılabilir."""
+        tick_data = self.timeline.tick_state(self.log_reader, tick_index)
+        # Statik elemanları çiz (arka plan dahil)
         self._draw_static_map()
+
+        # Keşfedilen alan (zaman çizelgesinden, o tick'e kadar)
+        self._update_coverage_overlay(tick_index)
+        self.screen.blit(self.coverage_surface, (0, 0))
         
         # O tick'teki dinamik aktörleri çiz
-        self._draw_actors(tick_data)
+        # İmha edilen sabit düşmanlar oynatma yönünden bağımsız olarak zaman çizelgesinden gelir
+        self._draw_actors(tick_data, self.timeline.destroyed_stationary_enemies(tick_index))
         
         # Bilgi panelini çiz
-        self._draw_info(tick_data)
-        
-        pygame.display.flip()
+        self._draw_info(tick_index, tick_data)
+
+    def _update_coverage_overlay(self, tick_index):
+        """Kapsama katmanını sadece son çizilen tick ile arasındaki farkı boyayarak günceller."""
+        if tick_index == self.coverage_index:
+            return
+        if tick_index > self.coverage_index:
+            cells, color = self.timeline.covered_cells(self.coverage_index, tick_index), COLOR_KNOWN_WORLD
+        else:
+            cells, color = self.timeline.covered_cells(tick_index, self.coverage_index), (0, 0, 0, 0)
+        for cell in cells:
+            x, y = divmod(cell, self.grid_height)
+            self.coverage_surface.fill(color, self.map_layer.cell_rect(x, y))
+        self.coverage_index = tick_index
 
     def _draw_static_map(self):
-        """Haritanın değişmeyen kısımlarını çizer: duvarlar, üs, HSS bölgeleri."""
-        # Duvarlar
-        for obs in self.obstacles:
-            rect = pygame.Rect(obs['x'] * CELL_SIZE, (self.grid_height - 1 - obs['y']) * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-            pygame.draw.rect(self.screen, COLOR_OBSTACLE, rect)
-            
-        # Üs Bölgesi
-        if self.base_bounds:
-            min_x, max_x = self.base_bounds['min_x'], self.base_bounds['max_x']
-            min_y, max_y = self.base_bounds['min_y'], self.base_bounds['max_y']
-            base_w = (max_x - min_x + 1) * CELL_SIZE
-            base_h = (max_y - min_y + 1) * CELL_SIZE
-            rect = pygame.Rect(min_x * CELL_SIZE, (self.grid_height - 1 - max_y) * CELL_SIZE, base_w, base_h)
-            s = pygame.Surface((base_w, base_h), pygame.SRCALPHA)
-            s.fill(COLOR_BASE)
-            self.screen.blit(s, rect.topleft)
-            
-        # HSS Menzilleri
-        for hss in self.hss_systems:
-            pos, radius = hss['position'], hss['radius']
-            px, py = pos['x'] * CELL_SIZE + CELL_SIZE // 2, (self.grid_height - 1 - pos['y']) * CELL_SIZE + CELL_SIZE // 2
-            pr = radius * CELL_SIZE
-            s = pygame.Surface((pr * 2, pr * 2), pygame.SRCALPHA)
-            pygame.draw.circle(s, COLOR_HSS_RANGE, (pr, pr), pr)
-            self.screen.blit(s, (px - pr, py - pr))
-
-    def _draw_actors(self, tick_data):
-        """Belirli bir tick'teki drone, düşman ve füzeleri çizer."""
-        # Sabit Düşmanların durumunu kontrol et
-        # Bir füze hedefine ulaştıysa, o düşmanı imha edilmiş olarak işaretle
-        for missile in tick_data.get('missiles', []):
-            if missile['status'] == 'DETONATED':
-                for se in self.initial_stationary_enemies:
-                    if se['position'] == missile['target_position']:
-                        self.destroyed_se_ids.add(se['id'])
+        """Haritanın değişmeyen kısımlarını (duvarlar, üs, HSS bölgeleri) önbellekteki katmandan çizer."""
+        # Replay'de harita hiç değişmez, katman sadece ilk karede oluşturulur
+        if not self.map_layer.is_current('static'):
+            self.map_layer.render(
+                'static',
+                [(obs['x'], obs['y']) for obs in self.obstacles],
+                self.base_bounds,
+                [(hss['position']['x'], hss['position']['y'], hss['radius']) for hss in self.hss_systems],
+                hss_on_top=True
+            )
+        self.screen.blit(self.map_layer.surface, (0, 0))
 
+    def _draw_actors(self, tick_data, destroyed_se_ids):
+        """Belirli bir tick'teki drone, düşman ve füzeleri çizer."""
         # Sabit Düşmanlar
         for se in self.initial_stationary_enemies:
-            if se['id'] not in self.destroyed_se_ids:
+            if se['id'] not in destroyed_se_ids:
                 pos = se['position']
                 rect = pygame.Rect(pos['x'] * CELL_SIZE, (self.grid_height - 1 - pos['y']) * CELL_SIZE, CELL_SIZE, CELL_SIZE)
                 pygame.draw.line(self.screen, COLOR_STATIONARY_ENEMY, (rect.left, rect.top), (rect.right, rect.bottom), 2)
@@ -176,18 +232,26 @@ class ReplayEngine:
             center = (pos['x'] * CELL_SIZE + CELL_SIZE // 2, (self.grid_height - 1 - pos['y']) * CELL_SIZE + CELL_SIZE // 2)
             pygame.draw.circle(self.screen, COLOR_MISSILE, center, CELL_SIZE // 2 - 1)
 
-    def _draw_info(self, tick_data):
+    def _draw_info(self, tick_index, tick_data):
         """Ekranın köşesine anlık bilgileri yazar."""
         tick = tick_data['tick']
         num_active_drones = sum(1 for d in tick_data.get('drones', []) if d['status'] != 'DESTROYED')
+        next_event = self.timeline.next_event(tick_index)
         
         info_texts = [
-            f"TICK: {tick}",
-            f"STATUS: {'PAUSED' if self.clock.get_fps() > 0 and tick_data == self.log_data['tick_data'][-1] else 'PLAYING'}",
-            f"Active Drones: {num_active_drones}",
+            f"TICK: {tick}" + (f"  -> {self.tick_input}_" if self.tick_input else ""),
+            f"STATUS: {'PAUSED' if self.paused else 'PLAYING'} ({self.playback_speed:g} ticks/s)",
+            f"Active Drones: {num_active_drones} (lost: {self.timeline.drones_lost[tick_index]})",
+            f"SE Destroyed: {len(self.timeline.destroyed_stationary_enemies(tick_index))}/{len(self.initial_stationary_enemies)}",
+            f"Coverage: {self.timeline.coverage_ratio(tick_index):.1%}",
+            f"Next Event: {f'T{next_event[1]} {next_event[2]}' if next_event else '-'}",
             "-------------------",
             "SPACE: Pause/Resume",
-            "LEFT/RIGHT: Step"
+            "LEFT/RIGHT: Step",
+            "UP/DOWN: Speed x2 / x0.5",
+            "N/P: Next/Prev Event",
+            "0-9 + ENTER: Jump to Tick",
+            "HOME/END: Start/End"
         ]
         
         for i, text in enumerate(info_texts):
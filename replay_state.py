@@ -0,0 +1,268 @@
+# FILE: replay_state.py
+import json
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from config import DRONE_SCAN_RADIUS, MISSILE_SPEED
+from simulation_logger import SimulationLogger
+
+class TickDerivation:
+    """
+    Derives, one tick state at a time, what a log only implies: drone losses,
+    destroyed moving enemies, missile launches, impacts and interceptions, and
+    the explored area. ReplayTimeline and log_analytics.LogAnalyzer both read
+    logs through it.
+
+    Coverage uses the positions of scanning drones and the scan radius (same
+    diamond as Grid.get_visible_tiles, without the line-of-sight check); cells are
+    appended to coverage_order in the order they were first covered.
+    """
+    def __init__(self, initial_state, scan_radius=DRONE_SCAN_RADIUS):
+        grid_size = initial_state.get('grid_size', {})
+        self.width, self.height = grid_size.get('width', 0), grid_size.get('height', 0)
+        self.scan_radius = scan_radius
+        self.se_by_position = {(se['position']['x'], se['position']['y']): se['id']
+                               for se in initial_state.get('stationary_enemies', [])}
+        self.covered = bytearray(self.width * self.height)
+        self.coverage_order = array('l')  # cell ids (x * height + y) in first-covered order
+        self.drones_lost = 0              # destroyed drones at the last tick fed
+        self.drone_status = {}
+        self.enemy_status = {}
+        self.se_destroyed = {}            # stationary enemy id -> tick of impact
+        self._scan_position = {}
+        self.in_flight = {}               # target -> flight of the missiles still in the air
+        self._remaining = {}              # target -> path length at the last tick
+
+    def feed(self, tick_data):
+        """
+        Consumes the next tick state and returns its events as (kind, description, subject)
+        in log order. The subject is the drone or enemy dict, or for missiles the flight dict
+        {"target", "launched", "path_length", "end", "flight_ticks", "outcome", "destroyed"}.
+        """
+        tick = tick_data['tick']
+        events = []
+
+        lost = 0
+        for drone in tick_data.get('drones', []):
+            if drone['status'] == 'DESTROYED':
+                lost += 1
+                if self.drone_status.get(drone['id'], 'DESTROYED') != 'DESTROYED':
+                    events.append(('DRONE_LOST', f"{drone['id']} lost at ({drone['position']['x']},{drone['position']['y']})", drone))
+            self.drone_status[drone['id']] = drone['status']
+
+            if drone['status'] != 'ACTIVE' or not self.is_scanning(drone):
+                continue
+            position = (drone['position']['x'], drone['position']['y'])
+            if self._scan_position.get(drone['id']) != position:
+                self._scan_position[drone['id']] = position
+                self._cover(*position)
+        self.drones_lost = lost
+
+        for enemy in tick_data.get('moving_enemies', []):
+            if enemy['status'] == 'DESTROYED' and self.enemy_status.get(enemy['id'], 'DESTROYED') != 'DESTROYED':
+                events.append(('ENEMY_DESTROYED', f"{enemy['id']} destroyed", enemy))
+            self.enemy_status[enemy['id']] = enemy['status']
+
+        # Missiles: the engine drops detonated missiles before logging, so an impact shows up
+        # as a missile that vanished with at most one tick of path left; otherwise an HSS got it.
+        seen = set()
+        for missile in tick_data.get('missiles', []):
+            target = (missile['target_position']['x'], missile['target_position']['y'])
+            if missile['status'] == 'DETONATED':
+                flight = self.in_flight.pop(target, None) or self._flight(target, tick, missile)
+                events.append(self._finish(flight, tick, impact=True))
+                continue
+            seen.add(target)
+            if target not in self.in_flight:
+                self.in_flight[target] = self._flight(target, tick, missile)
+                events.append(('MISSILE_LAUNCHED', f"Missile launched at {target}", self.in_flight[target]))
+            self._remaining[target] = missile['path_length']
+        for target in [t for t in self.in_flight if t not in seen]:
+            flight = self.in_flight.pop(target)
+            events.append(self._finish(flight, tick, impact=self._remaining[target] <= MISSILE_SPEED))
+        return events
+
+    @staticmethod
+    def is_scanning(drone):
+        command_type = (drone.get('current_command') or {}).get('command_type')
+        return drone.get('scan_mode') == 'ACTIVE' or command_type == 'SCAN_AREA'
+
+    def _cover(self, px, py):
+        """Marks the scan diamond around (px, py), one grid column at a time."""
+        r, height, covered = self.scan_radius, self.height, self.covered
+        for x in range(max(0, px - r), min(self.width, px + r + 1)):
+            half = r - abs(x - px)
+            start, end = x * height + max(0, py - half), x * height + min(height - 1, py + half) + 1
+            if 0 not in covered[start:end]:
+                continue
+            for cell in range(start, end):
+                if not covered[cell]:
+                    covered[cell] = 1
+                    self.coverage_order.append(cell)
+
+    @staticmethod
+    def _flight(target, tick, missile):
+        return {"target": list(target), "launched": tick, "path_length": missile['path_length'], "end": None}
+
+    def _finish(self, flight, tick, impact):
+        target = tuple(flight['target'])
+        self._remaining.pop(target, None)
+        flight.update(end=tick, flight_ticks=tick - flight['launched'])
+        se_id = self.se_by_position.get(target)
+        if not impact:
+            flight['outcome'] = 'intercepted'
+            return ('MISSILE_INTERCEPTED', f"Missile to {target} intercepted", flight)
+        if se_id and se_id not in self.se_destroyed:
+            self.se_destroyed[se_id] = tick
+            flight.update(outcome='hit', destroyed=se_id)
+            return ('SE_DESTROYED', f"{se_id} destroyed by missile at {target}", flight)
+        flight['outcome'] = 'missed'
+        return ('MISSILE_IMPACT', f"Missile detonated at {target}", flight)
+
+class ReplayTimeline:
+    """
+    Derived replay state for every tick of a log, computed in a single pass.
+
+    The log only stores actor snapshots, so state that accumulates over time
+    (destroyed stationary enemies, explored area, lost drones) and the list of
+    notable events are derived here once. Afterwards the state at any tick index
+    is available without replaying the ticks before it, which makes seeking in
+    both directions correct and cheap.
+
+    Tick indices count ticks, not log entries: a fast-forwarded stretch (one
+    run-length entry) is expanded into its ticks, and tick_state() returns the
+    state of any tick from the entry it is stored in.
+
+    Events and coverage come from TickDerivation; the explored area at tick
+    index i is coverage_order[:coverage_count[i]].
+    """
+    STATE_VERSION = 3
+
+    def __init__(self, grid_width, grid_height):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.tick_numbers = array('q')    # tick number at each tick index
+        self.record_index = array('q')    # tick_data entry each tick index is stored in
+        self.drones_lost = array('l')     # destroyed drones at each tick index
+        self.coverage_count = array('l')  # covered cells at each tick index
+        self.coverage_order = array('l')  # cell ids (x * height + y) in first-covered order
+        self.se_destroyed_at = {}         # stationary enemy id -> tick index of impact
+        self.events = []                  # (tick index, tick, kind, description), sorted
+
+    @classmethod
+    def load(cls, log_reader):
+        """Returns the timeline for a log, reusing the '<log>.state' sidecar when it is current."""
+        state_path = log_reader.log_path + '.state'
+        signature = list(log_reader.file_signature())
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('version') == cls.STATE_VERSION and cached.get('signature') == signature:
+                return cls._from_dict(cached)
+        except (OSError, ValueError):
+            pass
+
+        timeline = cls.build(log_reader)
+        timeline.save(log_reader)
+        return timeline
+
+    def save(self, log_reader):
+        """Writes the '<log>.state' sidecar (derived state and event index) for load() and other tools."""
+        state_path = log_reader.log_path + '.state'
+        try:
+            data = self._to_dict()
+            data['signature'] = list(log_reader.file_signature())
+            with open(state_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(state_path + '.tmp', state_path)
+        except OSError as e:
+            print(f"Warning: could not write replay state '{state_path}': {e}")
+
+    @classmethod
+    def build(cls, log_reader, scan_radius=DRONE_SCAN_RADIUS, on_tick=None):
+        """
+        Streams every tick once and records the derived state. 'on_tick(tick_data, record,
+        events, derivation)' is called after every tick, so other per-tick consumers share the pass.
+        """
+        derivation = TickDerivation(log_reader.initial_state, scan_radius)
+        timeline = cls(derivation.width, derivation.height)
+        timeline.coverage_order = derivation.coverage_order
+
+        expanded = ((record, tick_data) for record, entry in enumerate(log_reader)
+                    for tick_data in SimulationLogger.expand_record(entry))
+        for index, (record, tick_data) in enumerate(expanded):
+            tick = tick_data['tick']
+            events = derivation.feed(tick_data)
+            timeline.tick_numbers.append(tick)
+            timeline.record_index.append(record)
+            timeline.drones_lost.append(derivation.drones_lost)
+            timeline.coverage_count.append(len(derivation.coverage_order))
+            for kind, description, subject in events:
+                if kind == 'SE_DESTROYED':
+                    timeline.se_destroyed_at[subject['destroyed']] = index
+                timeline._add_event(index, tick, kind, description)
+            if on_tick:
+                on_tick(tick_data, record, events, derivation)
+        return timeline
+
+    def _add_event(self, index, tick, kind, description):
+        self.events.append((index, tick, kind, description))
+
+    # --- Queries (independent of how many ticks precede the index) ---
+
+    def __len__(self):
+        return len(self.tick_numbers)
+
+    def tick_state(self, log_reader, index):
+        """The logged state at tick index 'index' (expanded from a fast-forward entry if needed)."""
+        entry = log_reader.get_tick(self.record_index[index])
+        return SimulationLogger.state_at(entry, self.tick_numbers[index])
+
+    def destroyed_stationary_enemies(self, index):
+        return {se_id for se_id, destroyed_index in self.se_destroyed_at.items() if destroyed_index <= index}
+
+    def covered_cells(self, start_index, end_index):
+        """Cell ids that became covered after start_index, up to and including end_index."""
+        start = self.coverage_count[start_index] if start_index >= 0 else 0
+        return self.coverage_order[start:self.coverage_count[end_index]]
+
+    def coverage_ratio(self, index):
+        total = self.grid_width * self.grid_height
+        return self.coverage_count[index] / total if total else 0.0
+
+    def index_of_tick(self, tick):
+        """Log index of the first entry at or after the given tick number."""
+        return min(bisect_left(self.tick_numbers, tick), len(self.tick_numbers) - 1)
+
+    def next_event(self, index):
+        position = bisect_right(self.events, (index, float('inf')))
+        return self.events[position] if position < len(self.events) else None
+
+    def previous_event(self, index):
+        position = bisect_left(self.events, (index,)) - 1
+        return self.events[position] if position >= 0 else None
+
+    def _to_dict(self):
+        return {
+            "version": self.STATE_VERSION,
+            "grid_size": [self.grid_width, self.grid_height],
+            "tick_numbers": self.tick_numbers.tolist(),
+            "record_index": self.record_index.tolist(),
+            "drones_lost": self.drones_lost.tolist(),
+            "coverage_count": self.coverage_count.tolist(),
+            "coverage_order": self.coverage_order.tolist(),
+            "se_destroyed_at": self.se_destroyed_at,
+            "events": self.events,
+        }
+
+    @classmethod
+    def _from_dict(cls, data):
+        timeline = cls(*data['grid_size'])
+        timeline.tick_numbers = array('q', data['tick_numbers'])
+        timeline.record_index = array('q', data['record_index'])
+        timeline.drones_lost = array('l', data['drones_lost'])
+        timeline.coverage_count = array('l', data['coverage_count'])
+        timeline.coverage_order = array('l', data['coverage_order'])
+        timeline.se_destroyed_at = data['se_destroyed_at']
+        timeline.events = [tuple(event) for event in data['events']]
+        return timeline
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# FILE: results_store.py
+"""
+SQLite store for experiment results.
+
+With RESULTS_DB set, every run appends one row to 'runs' (its settings, seed,
+experiment label and outcome) and its per-tick metrics (coverage, active drones,
+battery mean/min, missiles left), downsampled to every RESULTS_METRICS_INTERVAL
+ticks, to 'tick_metrics'. The database is in WAL mode, so many simulations can
+write to it at once while it is being queried, and the config columns are
+indexed, so comparisons over thousands of runs are single SQL queries instead of
+re-parsing every JSON log.
+
+    RESULTS_DB=logs/results.db RESULTS_EXPERIMENT=fleet SIMULATION_SEED=7 NUM_DRONES=20 python main.py
+    python results_store.py summary --by num_drones,num_hss [--where experiment=fleet]
+    python results_store.py curve --by num_drones [--metric coverage] [--every 50]
+    python results_store.py runs [--where result=FAILURE --where num_hss>=4] [--limit 20]
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+import config
+from config import RESULTS_DB
+
+# runs column -> setting in config.py; each gets an index
+CONFIG_COLUMNS = {
+    "grid_width": "GRID_WIDTH", "grid_height": "GRID_HEIGHT", "num_drones": "NUM_DRONES",
+    "num_stationary_enemies": "NUM_STATIONARY_ENEMIES", "num_moving_enemies": "NUM_MOVING_ENEMIES",
+    "num_hss": "NUM_HSS", "drone_scan_radius": "DRONE_SCAN_RADIUS", "llm_call_frequency": "LLM_CALL_FREQUENCY",
+    "initial_missiles": "INITIAL_MISSILES", "strategist_backend": "STRATEGIST_BACKEND", "llm_model": "LLM_MODEL",
+}
+OUTCOME_COLUMNS = ("result", "ticks", "coverage", "active_drones", "drones_lost", "enemies_left",
+                   "missiles_left", "wall_seconds")
+METRIC_COLUMNS = ("coverage", "active_drones", "battery_mean", "battery_min", "missiles_left")
+# Settings left out of the stored config snapshot
+SECRET_SETTINGS = ("API_KEY",)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    experiment TEXT, seed INTEGER, started_at TEXT, log_file TEXT,
+    {", ".join(f"{column} {'TEXT' if column in ('strategist_backend', 'llm_model') else 'INTEGER'}" for column in CONFIG_COLUMNS)},
+    result TEXT, ticks INTEGER, coverage REAL, active_drones INTEGER, drones_lost INTEGER,
+    enemies_left INTEGER, missiles_left INTEGER, wall_seconds REAL,
+    config TEXT
+);
+CREATE TABLE IF NOT EXISTS tick_metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    tick INTEGER NOT NULL,
+    coverage REAL, active_drones INTEGER, battery_mean REAL, battery_min REAL, missiles_left INTEGER,
+    PRIMARY KEY (run_id, tick)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS runs_experiment ON runs (experiment);
+CREATE INDEX IF NOT EXISTS runs_result ON runs (result);
+""" + "".join(f"CREATE INDEX IF NOT EXISTS runs_{column} ON runs ({column});\n" for column in CONFIG_COLUMNS)
+
+def settings_snapshot():
+    """All scalar settings from config.py (secrets excluded), as stored in runs.config."""
+    return {name: value for name, value in vars(config).items()
+            if name.isupper() and name not in SECRET_SETTINGS and isinstance(value, (bool, int, float, str))}
+
+class RunRecorder:
+    """Collects one run's settings, downsampled metrics and outcome while the engine runs."""
+    def __init__(self, interval, experiment="", seed=None):
+        self.interval = max(1, interval)
+        self.experiment = experiment
+        self.seed = seed
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self._start = time.time()
+        self.metrics = []
+        self.next_tick = 0
+
+    def sample(self, engine, force=False):
+        """Records the metrics at the engine's current tick if a sample is due."""
+        tick = engine.current_tick
+        if tick < self.next_tick and not force:
+            return
+        if self.metrics and self.metrics[-1][0] == tick:
+            return
+        batteries = [d.battery for d in engine.drones if d.status == 'ACTIVE']
+        self.metrics.append((
+            tick, round(engine.central_strategist.known_map.coverage_ratio(), 4),
+            len(batteries), round(sum(batteries) / len(batteries), 2) if batteries else None,
+            round(min(batteries), 2) if batteries else None, engine.missile_system.missile_count))
+        self.next_tick = tick - tick % self.interval + self.interval
+
+    def truncate(self, tick):
+        """Drops the samples taken after 'tick' (when the engine is restored to a snapshot)."""
+        while self.metrics and self.metrics[-1][0] > tick:
+            self.metrics.pop()
+        self.next_tick = tick + 1
+
+    def finish(self, engine):
+        """The run's row for ResultsStore.add_runs (takes a final metrics sample)."""
+        self.sample(engine, force=True)
+        registry = engine.registry
+        message = engine.game_over_message
+        run = {name: getattr(config, setting) for name, setting in CONFIG_COLUMNS.items()}
+        run.update({
+            "experiment": self.experiment or None, "seed": self.seed, "started_at": self.started_at,
+            "log_file": engine.logger.filename,
+            "result": message.split(":")[0] if message else "UNFINISHED",
+            "ticks": engine.current_tick,
+            "coverage": round(engine.central_strategist.known_map.coverage_ratio(), 4),
+            "active_drones": registry.active_drone_count,
+            "drones_lost": len(engine.drones) - registry.active_drone_count,
+            "enemies_left": registry.live_stationary_enemy_count + registry.active_moving_enemy_count,
+            "missiles_left": engine.missile_system.missile_count,
+            "wall_seconds": round(time.time() - self._start, 3),
+            "config": json.dumps(settings_snapshot(), sort_keys=True),
+            "metrics": self.metrics,
+        })
+        return run
+
+class ResultsStore:
+    """
+    The results database. add_runs() inserts any number of runs (with their
+    metrics) in one transaction; the connection waits up to 'timeout' seconds
+    for other writers.
+    """
+    RUN_COLUMNS = ("experiment", "seed", "started_at", "log_file", *CONFIG_COLUMNS, *OUTCOME_COLUMNS, "config")
+
+    def __init__(self, path=RESULTS_DB, timeout=30.0):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=timeout)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def add_runs(self, runs):
+        """Inserts runs (dicts from RunRecorder.finish) and returns their ids."""
+        insert_run = (f"INSERT INTO runs ({', '.join(self.RUN_COLUMNS)}) "
+                      f"VALUES ({', '.join('?' * len(self.RUN_COLUMNS))})")
+        insert_metrics = (f"INSERT OR REPLACE INTO tick_metrics (run_id, tick, {', '.join(METRIC_COLUMNS)}) "
+                          f"VALUES ({', '.join('?' * (len(METRIC_COLUMNS) + 2))})")
+        ids = []
+        with self.connection:
+            for run in runs:
+                cursor = self.connection.execute(insert_run, [run.get(column) for column in self.RUN_COLUMNS])
+                run_id = cursor.lastrowid
+                self.connection.executemany(insert_metrics, ((run_id, *row) for row in run.get("metrics", ())))
+                ids.append(run_id)
+        return ids
+
+    def query(self, sql, params=()):
+        cursor = self.connection.execute(sql, params)
+        return [column[0] for column in cursor.description], cursor.fetchall()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# --- Query CLI ---------------------------------------------------------------
+
+_CONDITION = re.compile(r'^\s*(\w+)\s*(>=|<=|!=|=|>|<)\s*(.*?)\s*$')
+FILTER_COLUMNS = ("id", "experiment", "seed", *CONFIG_COLUMNS, *OUTCOME_COLUMNS)
+
+def _value(text):
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+def where_clause(conditions, prefix="r."):
+    """'num_hss>=4'-style conditions as an SQL WHERE clause and its parameters."""
+    clauses, params = [], []
+    for condition in conditions or ():
+        match = _CONDITION.match(condition)
+        if not match or match.group(1) not in FILTER_COLUMNS:
+            raise ValueError(f"Bad condition '{condition}' (use column=value, column>=value, ...; "
+                             f"columns: {', '.join(FILTER_COLUMNS)})")
+        column, operator, value = match.groups()
+        clauses.append(f"{prefix}{column} {operator} ?")
+        params.append(_value(value))
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+def _group_columns(by):
+    columns = [c.strip() for c in by.split(",") if c.strip()] if by else []
+    for column in columns:
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"Cannot group by '{column}' (columns: {', '.join(FILTER_COLUMNS)})")
+    return columns
+
+def print_table(columns, rows):
+    cells = [[("" if v is None else f"{v:.3f}" if isinstance(v, float) else str(v)) for v in row] for row in rows]
+    widths = [max([len(c)] + [len(row[i]) for row in cells]) for i, c in enumerate(columns)]
+    print("  ".join(c.rjust(w) for c, w in zip(columns, widths)))
+    for row in cells:
+        print("  ".join(v.rjust(w) for v, w in zip(row, widths)))
+    print(f"({len(rows)} rows)")
+
+def summary(store, by, conditions):
+    groups = _group_columns(by)
+    where, params = where_clause(conditions)
+    keys = ", ".join(f"r.{c}" for c in groups)
+    sql = (f"SELECT {keys + ', ' if keys else ''}COUNT(*) AS runs, "
+           f"AVG(r.result = 'SUCCESS') AS success_rate, AVG(r.ticks) AS mean_ticks, "
+           f"AVG(CASE WHEN r.result = 'SUCCESS' THEN r.ticks END) AS ticks_to_success, "
+           f"AVG(r.coverage) AS mean_coverage, AVG(r.drones_lost) AS drones_lost, "
+           f"AVG(r.initial_missiles - r.missiles_left) AS missiles_used, AVG(r.wall_seconds) AS wall_seconds "
+           f"FROM runs r{where}" + (f" GROUP BY {keys} ORDER BY {keys}" if keys else ""))
+    return store.query(sql, params)
+
+def curve(store, by, metric, every, conditions):
+    """Mean of 'metric' over the runs still going at every 'every'-th tick, per group."""
+    if metric not in METRIC_COLUMNS:
+        raise ValueError(f"Unknown metric '{metric}' (metrics: {', '.join(METRIC_COLUMNS)})")
+    groups = _group_columns(by)
+    where, params = where_clause(conditions)
+    keys = ", ".join(f"r.{c}" for c in groups)
+    condition = f"m.tick % {int(every)} = 0"
+    where = f"{where} AND {condition}" if where else f" WHERE {condition}"
+    sql = (f"SELECT {keys + ', ' if keys else ''}m.tick, COUNT(*) AS runs, AVG(m.{metric}) AS mean_{metric}, "
+           f"MIN(m.{metric}) AS min_{metric}, MAX(m.{metric}) AS max_{metric} "
+           f"FROM runs r JOIN tick_metrics m ON m.run_id = r.id{where} "
+           f"GROUP BY {keys + ', ' if keys else ''}m.tick ORDER BY {keys + ', ' if keys else ''}m.tick")
+    return store.query(sql, params)
+
+def list_runs(store, conditions, limit):
+    where, params = where_clause(conditions)
+    columns = ("id", "experiment", "seed", *CONFIG_COLUMNS, "result", "ticks", "coverage", "drones_lost", "missiles_left")
+    sql = f"SELECT {', '.join('r.' + c for c in columns)} FROM runs r{where} ORDER BY r.id DESC LIMIT ?"
+    return store.query(sql, params + [limit])
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the SQLite results store.")
+    parser.add_argument("--db", default=RESULTS_DB or "logs/results.db", help="Results database (default: RESULTS_DB)")
+    sub = parser.add_subparsers(dest="mode", required=True)
+    summary_parser = sub.add_parser("summary", help="Outcome statistics grouped by config columns")
+    summary_parser.add_argument("--by", default="", help="Comma-separated columns, e.g. num_drones,num_hss")
+    curve_parser = sub.add_parser("curve", help="Mean per-tick metric over time, grouped by config columns")
+    curve_parser.add_argument("--by", default="", help="Comma-separated columns")
+    curve_parser.add_argument("--metric", default="coverage", choices=METRIC_COLUMNS)
+    curve_parser.add_argument("--every", type=int, default=50, help="Tick step (a multiple of RESULTS_METRICS_INTERVAL)")
+    runs_parser = sub.add_parser("runs", help="List stored runs, newest first")
+    runs_parser.add_argument("--limit", type=int, default=20)
+    sql_parser = sub.add_parser("sql", help="Run an SQL query")
+    sql_parser.add_argument("query")
+    for command in (summary_parser, curve_parser, runs_parser):
+        command.add_argument("--where", action="append", metavar="CONDITION",
+                             help="Filter such as num_hss=4 or ticks>=300 (repeatable)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        parser.error(f"no results database at '{args.db}' (runs store into it when RESULTS_DB is set)")
+    start = time.perf_counter()
+    with ResultsStore(args.db) as store:
+        try:
+            if args.mode == "summary":
+                columns, rows = summary(store, args.by, args.where)
+            elif args.mode == "curve":
+                columns, rows = curve(store, args.by, args.metric, args.every, args.where)
+            elif args.mode == "runs":
+                columns, rows = list_runs(store, args.where, args.limit)
+            else:
+                columns, rows = store.query(args.query)
+        except (ValueError, sqlite3.Error) as e:
+            parser.error(str(e))
+    print_table(columns, rows)
+    print(f"Query took {time.perf_counter() - start:.3f}s.")
+
+if __name__ == '__main__':
+    main()
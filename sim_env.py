@@ -0,0 +1,250 @@
+# FILE: sim_env.py
+import os
+import random
+from array import array
+from contextlib import nullcontext, redirect_stdout
+from config import *
+from simulation_engine import SimulationEngine
+
+# Columns of the per-drone and per-enemy observation rows. Unknown/absent values are -1.
+DRONE_FEATURES = ('x', 'y', 'battery', 'active', 'target_x', 'target_y', 'hunting', 'active_scan')
+# Stationary enemies (SE-1..) come first, then moving enemies (ME-1..). Positions are what
+# the strategist knows, not ground truth; 'ticks_since_seen' is 0 for stationary enemies.
+ENEMY_FEATURES = ('x', 'y', 'known', 'moving', 'ticks_since_seen')
+STATE_FEATURES = ('tick', 'missiles_left', 'missiles_in_flight', 'coverage', 'active_drones')
+
+# Reward per step: newly known tiles, enemies destroyed and drones lost since the last step
+REWARD_PER_TILE = 0.01
+REWARD_PER_ENEMY = 10.0
+REWARD_PER_DRONE_LOST = -5.0
+
+def observation_shapes(num_envs=None):
+    """
+    Shape of each observation array. 'known_map' holds KnownMap type codes and 'threats'
+    is 1 inside known HSS kill zones; both are x-major (index x * height + y) bytes.
+    The float arrays are typecode 'f', so numpy.frombuffer(obs[k], numpy.float32 or
+    numpy.uint8).reshape(shape) views them without a copy.
+    """
+    shapes = {
+        "drones": (NUM_DRONES, len(DRONE_FEATURES)),
+        "enemies": (NUM_STATIONARY_ENEMIES + NUM_MOVING_ENEMIES, len(ENEMY_FEATURES)),
+        "known_map": (GRID_WIDTH, GRID_HEIGHT),
+        "threats": (GRID_WIDTH, GRID_HEIGHT),
+        "state": (len(STATE_FEATURES),),
+    }
+    if num_envs is not None:
+        shapes = {key: (num_envs,) + shape for key, shape in shapes.items()}
+    return shapes
+
+def _allocate(num_envs):
+    """Zeroed observation buffers for 'num_envs' environments."""
+    buffers = {}
+    for key, shape in observation_shapes(num_envs).items():
+        size = 1
+        for dim in shape:
+            size *= dim
+        buffers[key] = bytearray(size) if key in ("known_map", "threats") else array('f', bytes(4 * size))
+    return buffers
+
+class SimulationEnv:
+    """
+    Step-by-step control of one simulation, for learned or search-based controllers.
+
+    reset(seed) builds a new headless engine whose map, enemies and dice rolls all
+    come from 'seed' on a private RNG stream, so environments are reproducible and
+    independent of each other. step(commands) applies a list of strategist-format
+    commands (MOVE_DRONE, SCAN_AREA, STANDBY, SET_SCAN_MODE, FIRE_MISSILE) and
+    advances 'ticks_per_step' ticks. The strategist does not plan; drones still
+    report to it every LLM_CALL_FREQUENCY ticks, which is what builds the known map.
+
+    Returns (observation, reward, done, info) as in the classic gym API, without
+    depending on gym. Engine output is discarded unless 'verbose' is set, and
+    nothing is logged unless 'log_file' is given.
+    """
+    def __init__(self, ticks_per_step=1, max_ticks=None, log_file=None, verbose=False):
+        self.ticks_per_step = ticks_per_step
+        self.max_ticks = max_ticks
+        self.log_file = log_file
+        self.verbose = verbose
+        self.engine = None
+        self._buffers = None
+        # Known kill zones, painted incrementally (the intel store's zone list is append-only)
+        self._threats = bytearray(GRID_WIDTH * GRID_HEIGHT)
+        self._threat_zones_drawn = 0
+
+    def reset(self, seed=None):
+        """Starts a new episode and returns its first observation."""
+        self.close()
+        outer = random.getstate()
+        random.seed(seed)
+        try:
+            with self._output():
+                engine = SimulationEngine(log_file=self.log_file, headless=True)
+            engine.rng_state = random.getstate()
+        finally:
+            random.setstate(outer)
+        engine.external_control = True
+        engine.logger.log_initial_state(engine.grid)
+        engine.logger.log_tick_state(0, engine.drones, engine.moving_enemies, engine.active_missiles)
+        self.engine = engine
+        self._threats = bytearray(GRID_WIDTH * GRID_HEIGHT)
+        self._threat_zones_drawn = 0
+        self._buffers = _allocate(1)
+        self._last_counts = self._counts()
+        return self.observation()
+
+    def step(self, commands=None):
+        """Applies 'commands' and advances the simulation; returns (observation, reward, done, info)."""
+        engine = self.engine
+        if engine is None or engine.game_over:
+            raise RuntimeError("Episode is over; call reset() first.")
+        with self._output():
+            if commands:
+                with engine._own_rng():
+                    engine._apply_commands({"commands": commands, "reasoning": "external controller"})
+            for _ in range(self.ticks_per_step):
+                engine.tick()
+                engine.check_game_over()
+                if engine.game_over:
+                    break
+
+        known, enemies, drones = self._counts()
+        last_known, last_enemies, last_drones = self._last_counts
+        self._last_counts = (known, enemies, drones)
+        terms = {
+            "tiles": (known - last_known) * REWARD_PER_TILE,
+            "enemies": (last_enemies - enemies) * REWARD_PER_ENEMY,
+            "drones": (last_drones - drones) * REWARD_PER_DRONE_LOST,
+        }
+        truncated = self.max_ticks is not None and engine.current_tick >= self.max_ticks and not engine.game_over
+        info = {"tick": engine.current_tick, "reward_terms": terms, "truncated": truncated,
+                "game_over_message": engine.game_over_message}
+        return self.observation(), sum(terms.values()), engine.game_over or truncated, info
+
+    def observation(self):
+        """The current observation: a dict of flat arrays, see observation_shapes()."""
+        self.observe_into(self._buffers, 0)
+        return {key: buffer[:] for key, buffer in self._buffers.items()}
+
+    def observe_into(self, buffers, index):
+        """Writes the current observation into row 'index' of batched buffers (from _allocate)."""
+        engine = self.engine
+        strategist = engine.central_strategist
+        world_model = strategist.world_model
+        tick = engine.current_tick
+
+        drones = buffers["drones"]
+        offset = index * NUM_DRONES * len(DRONE_FEATURES)
+        for drone in engine.drones:
+            target = drone.target_position
+            active = drone.status == 'ACTIVE'
+            drones[offset:offset + len(DRONE_FEATURES)] = array('f', (
+                drone.position['x'], drone.position['y'], drone.battery, active,
+                target['x'] if target else -1, target['y'] if target else -1,
+                bool(drone.current_command.get('is_hunting')), drone.scan_mode == 'ACTIVE'))
+            offset += len(DRONE_FEATURES)
+
+        enemies = buffers["enemies"]
+        offset = index * (NUM_STATIONARY_ENEMIES + NUM_MOVING_ENEMIES) * len(ENEMY_FEATURES)
+        rows = [(world_model['known_stationary_enemies'].get(f"SE-{i + 1}"), 0) for i in range(NUM_STATIONARY_ENEMIES)]
+        rows += [(world_model['known_moving_enemies'].get(f"ME-{i + 1}"), 1) for i in range(NUM_MOVING_ENEMIES)]
+        for known, moving in rows:
+            if known:
+                age = tick - known['last_seen_tick'] if moving else 0
+                row = (known['position']['x'], known['position']['y'], 1, moving, age)
+            else:
+                row = (-1, -1, 0, moving, -1)
+            enemies[offset:offset + len(ENEMY_FEATURES)] = array('f', row)
+            offset += len(ENEMY_FEATURES)
+
+        known_map = strategist.known_map
+        size = known_map.width * known_map.height
+        buffers["known_map"][index * size:(index + 1) * size] = known_map.types
+        self._draw_threats()
+        buffers["threats"][index * size:(index + 1) * size] = self._threats
+
+        state = buffers["state"]
+        offset = index * len(STATE_FEATURES)
+        state[offset:offset + len(STATE_FEATURES)] = array('f', (
+            tick, engine.missile_system.missile_count, engine.registry.missiles_in_flight,
+            known_map.coverage_ratio(), engine.registry.active_drone_count))
+
+    def close(self):
+        """Stops the current engine's LLM event loop thread."""
+        if self.engine is not None:
+            self.engine.close()
+            self.engine = None
+
+    def _draw_threats(self):
+        zones = self.engine.central_strategist.intel.threat_zones
+        for zone in zones[self._threat_zones_drawn:]:
+            cx, cy, r = zone['hss_location']['x'], zone['hss_location']['y'], zone['radius']
+            for x in range(max(0, cx - r), min(GRID_WIDTH, cx + r + 1)):
+                for y in range(max(0, cy - r), min(GRID_HEIGHT, cy + r + 1)):
+                    if (x - cx) ** 2 + (y - cy) ** 2 <= r * r:
+                        self._threats[x * GRID_HEIGHT + y] = 1
+        self._threat_zones_drawn = len(zones)
+
+    def _counts(self):
+        registry = self.engine.registry
+        return (self.engine.central_strategist.known_map.known_count,
+                registry.live_stationary_enemy_count + registry.active_moving_enemy_count,
+                registry.active_drone_count)
+
+    def _output(self):
+        global _devnull
+        if self.verbose:
+            return nullcontext()
+        if _devnull is None:
+            _devnull = open(os.devnull, 'w')
+        return redirect_stdout(_devnull)
+
+class VectorSimulationEnv:
+    """
+    Steps 'num_envs' independent SimulationEnvs in lockstep and returns batched
+    observations: the same keys as SimulationEnv with a leading environment axis
+    (see observation_shapes(num_envs)), plus 'rewards' (array 'f') and 'dones'
+    (bytearray). The batch buffers are allocated once and rewritten every step;
+    copy them if they must outlive the next call.
+
+    An environment whose episode ends is reset right away (its row then holds the
+    new episode's first observation) and the finished episode's info is passed
+    along under info['final_info']. Seeded resets give environment i the seed
+    seed + i and later episodes the following seeds, so a batch run is reproducible.
+    """
+    def __init__(self, num_envs, **env_options):
+        self.envs = [SimulationEnv(**env_options) for _ in range(num_envs)]
+        self.num_envs = num_envs
+        self.buffers = _allocate(num_envs)
+        self.rewards = array('f', bytes(4 * num_envs))
+        self.dones = bytearray(num_envs)
+        self._next_seed = None
+
+    def reset(self, seed=None):
+        for i, env in enumerate(self.envs):
+            env.reset(None if seed is None else seed + i)
+            env.observe_into(self.buffers, i)
+        self._next_seed = None if seed is None else seed + self.num_envs
+        return self.buffers
+
+    def step(self, commands_batch=None):
+        """'commands_batch' holds one command list (or None) per environment; returns (observations, rewards, dones, infos)."""
+        infos = []
+        for i, env in enumerate(self.envs):
+            _, reward, done, info = env.step(commands_batch[i] if commands_batch else None)
+            if done:
+                info = {"final_info": info, "tick": 0}
+                env.reset(self._next_seed)
+                if self._next_seed is not None:
+                    self._next_seed += 1
+            env.observe_into(self.buffers, i)
+            self.rewards[i] = reward
+            self.dones[i] = done
+            infos.append(info)
+        return self.buffers, self.rewards, self.dones, infos
+
+    def close(self):
+        for env in self.envs:
+            env.close()
+
+_devnull = None
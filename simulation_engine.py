@@ -1,5 +1,9 @@
 # FILE: simulation_engine.py
+import os
+import random
+import threading
 import time
+from contextlib import contextmanager
 from config import *
 from grid import Grid
 from drone_agent import DroneAgent
@@ -8,33 +12,62 @@ from central_strategist import CentralStrategist
 from visualizer import Visualizer
 from enemy import MovingEnemy
 from simulation_logger import SimulationLogger
+from live_view import LiveStateWriter
+from planning_scheduler import PlanningScheduler
+from entity_registry import EntityRegistry
+from actor_scheduler import ActorScheduler
+from memory_profiler import MemoryProfiler
+from results_store import ResultsStore, RunRecorder
+import engine_snapshot
 
 if ENABLE_VISUALIZATION:
     import pygame
 
 class SimulationEngine:
     """Manages the main simulation loop and all interacting components."""
-    def __init__(self):
-        # ... (init metodunun geri kalanı aynı kalacak) ...
-        self.grid = Grid(GRID_WIDTH, GRID_HEIGHT)
-        self.drones = [DroneAgent(f"D-{i+1}", self.grid) for i in range(NUM_DRONES)]
-        self.missile_system = MissileSystem(self.grid)
+    def __init__(self, log_file=LOG_FILE, headless=False, generate_map=True):
+        # headless: no window and no live view, e.g. for forked branches
+        # generate_map=False skips the random map when a checkpoint is restored right away
+        # Started first so the grid's tiles are traced too
+        self.memory_profiler = MemoryProfiler(MEMORY_PROFILE_INTERVAL) if MEMORY_PROFILE else None
+        if self.memory_profiler:
+            self.memory_profiler.start()
+        self.grid = Grid(GRID_WIDTH, GRID_HEIGHT, generate=generate_map)
         self.central_strategist = CentralStrategist(self.grid)
+        self.drones = [DroneAgent(f"D-{i+1}", self.grid, self.central_strategist.intel) for i in range(NUM_DRONES)]
+        self.missile_system = MissileSystem(self.grid)
         self.moving_enemies = [MovingEnemy(f"ME-{i+1}", self.grid) for i in range(NUM_MOVING_ENEMIES)]
-        self.active_missiles = []
+        self.registry = EntityRegistry(self.grid, self.drones, self.moving_enemies)
+        # Missiles in flight; the registry owns the list and indexes it by target
+        self.active_missiles = self.registry.missiles
+        self.scheduler = ActorScheduler(self.registry, self.drones, self.moving_enemies)
         self.current_tick = 0
         self.game_over = False
         self.game_over_message = ""
-        self.logger = SimulationLogger()
+        self.fast_forward_stats = {"stretches": 0, "ticks": 0}
+        # Private RNG stream (forked engines); None means the global 'random' state is used
+        self.rng_state = None
+        # True when commands come from outside (sim_env.SimulationEnv.step) instead of the strategist
+        self.external_control = False
+        self.logger = SimulationLogger(log_file)
+        # Ayarlar, sonuç ve seyreltilmiş metrikler koşu sonunda RESULTS_DB'ye yazılır
+        self.results = RunRecorder(RESULTS_METRICS_INTERVAL, RESULTS_EXPERIMENT, SIMULATION_SEED) if RESULTS_DB else None
+        self.planner = PlanningScheduler(self) if HYBRID_PLANNING else None
+        self.live_view = None
+        if LIVE_VIEW and not headless:
+            self.live_view = LiveStateWriter(self.grid, self.drones, self.moving_enemies, LIVE_VIEW_PATH)
         self.visualizer = None
-        if ENABLE_VISUALIZATION:
+        self.closed = False
+        if ENABLE_VISUALIZATION and not headless:
             self.visualizer = Visualizer(self)
 
     def run(self):
         """Starts the main simulation loop."""
-        self.logger.log_initial_state(self.grid)
-        self.logger.log_tick_state(0, self.drones, self.moving_enemies, self.active_missiles)
-        self._distribute_commands()
+        self._start_run()
+
+        if self.visualizer and DECOUPLED_RENDERING:
+            self._run_decoupled()
+            return
         
         try:
             while not self.game_over:
@@ -46,86 +79,321 @@ class SimulationEngine:
                         if event.type == pygame.QUIT:
                             self.game_over = True
                 self.check_game_over()
+                if FAST_FORWARD and not self.game_over:
+                    self.fast_forward()
                 elapsed = time.time() - start_time
                 sleep_time = (1.0 / FPS) - elapsed
                 if sleep_time > 0 and ENABLE_VISUALIZATION: time.sleep(sleep_time)
         finally:
-            print(f"\n--- SIMULATION ENDED: {self.game_over_message} ---")
+            self._end_run()
+
+    def _start_run(self):
+        """Logs the initial state and tick 0 and asks for the first plan (before the first tick)."""
+        self.logger.log_initial_state(self.grid)
+        self.logger.log_tick_state(0, self.drones, self.moving_enemies, self.active_missiles)
+        self._publish_live_view()
+        if self.memory_profiler:
+            self.memory_profiler.sample(0)
+        if self.results:
+            self.results.sample(self)
+        if self.planner:
+            self._run_planner()
+        else:
+            self._distribute_commands()
+
+    def _end_run(self):
+        print(f"\n--- SIMULATION ENDED: {self.game_over_message} ---")
+        if self.live_view:
+            self.live_view.close()
+            self.live_view = None
+        seen = sum(d.scan_stats["seen"] for d in self.drones)
+        if seen:
+            reported = sum(d.scan_stats["reported"] for d in self.drones)
+            print(f"SCAN REPORTS ({REPORT_DEDUP} dedup): {reported}/{seen} scanned tiles reported ({1 - reported / seen:.1%} fewer)")
+        if self.fast_forward_stats["stretches"]:
+            ff = self.fast_forward_stats
+            print(f"FAST-FORWARD: {ff['ticks']} of {self.current_tick} ticks skipped in {ff['stretches']} stretches")
+        if self.planner:
+            print(self.planner.summary())
+        if self.central_strategist.llm_cache.enabled:
+            print(self.central_strategist.llm_cache.summary())
+        if self.memory_profiler:
+            self.memory_profiler.sample(self.current_tick, force=True)
+            print(self.memory_profiler.report())
+        if self.results:
+            self._store_results()
+
+    def close(self):
+        """Stops the strategist's LLM event loop thread (and the live view). Safe to call more than once."""
+        if self.live_view:
+            self.live_view.close()
+            self.live_view = None
+        if not self.closed:
+            self.central_strategist.llm.close()
+            self.closed = True
+
+    def _store_results(self):
+        try:
+            with ResultsStore(RESULTS_DB) as store:
+                run_id, = store.add_runs([self.results.finish(self)])
+            print(f"RESULTS: run #{run_id} stored in '{RESULTS_DB}'.")
+        except Exception as e:
+            print(f"Error storing results in '{RESULTS_DB}': {e}")
+
+    def _run_decoupled(self):
+        """
+        Runs the tick loop on a worker thread at full speed while the main thread
+        renders the latest published snapshot at FPS. A slow display can no longer
+        throttle the simulation.
+        """
+        def simulation_loop():
+            try:
+                while not self.game_over:
+                    self.tick()
+                    self.visualizer.snapshots.publish(self)
+                    self.check_game_over()
+                    if FAST_FORWARD and not self.game_over:
+                        self.fast_forward()
+                        self.visualizer.snapshots.publish(self)
+            finally:
+                self._end_run()
+
+        self.visualizer.snapshots.publish(self)
+        sim_thread = threading.Thread(target=simulation_loop, name="simulation-loop", daemon=True)
+        sim_thread.start()
+        if not self.visualizer.run_render_loop(sim_thread.is_alive):
+            # Window closed: let the simulation thread finish its current tick and stop
+            self.game_over = True
+        sim_thread.join()
 
 
     def tick(self):
         """Advances the simulation by one step."""
+        with self._own_rng():
+            self._tick()
+
+    def _tick(self):
         self.current_tick += 1
         print(f"\n===== TICK: {self.current_tick} =====")
 
-        # 1. Düşmanlar hareket eder
-        for enemy in self.moving_enemies: enemy.update(self.current_tick)
+        # 1. Düşmanlar hareket eder (sadece hareket sırası gelenler)
+        self.scheduler.move_enemies(self.current_tick)
         
         # DEĞİŞTİRİLDİ: Füze güncelleme mantığı yeni bir metoda taşındı
         self._update_missiles_and_threats()
 
-        # 3. Dronelar hareket eder ve görevlerini yapar
-        for drone in self.drones: drone.update(self.current_tick)
+        # 3. Dronelar hareket eder ve görevlerini yapar (sadece işi olanlar)
+        self.scheduler.update_drones(self.current_tick)
         
         # 4. Anlık avlanma ve çarpışma kontrolleri
         self.check_and_initiate_hunts()
         self.check_kamikaze_attacks()
         self.check_hss_threats()       # Bu metot drone'ları kontrol eder, füzeleri değil
         
-        if self.current_tick % LLM_CALL_FREQUENCY == 1:
-            reports = [d.report_to_center(self.moving_enemies) for d in self.drones]
-            self.central_strategist.collect_reports(reports, self.current_tick)
+        if self.external_control:
+            # Komutları dış denetleyici verir; raporlar yine de her LLM_CALL_FREQUENCY tick'te toplanır
+            if self.current_tick % LLM_CALL_FREQUENCY == 1:
+                self.collect_reports()
+        elif self.planner:
+            self._run_planner()
+        elif self.current_tick % LLM_CALL_FREQUENCY == 1:
+            self.collect_reports()
             self._distribute_commands()
+        else:
+            # Plans are applied as soon as they arrive, not only at the next report boundary
+            ready_plan = self.central_strategist.poll_ready_plans(self.current_tick)
+            if ready_plan:
+                self._apply_commands(ready_plan)
 
         self.logger.log_tick_state(self.current_tick, self.drones, self.moving_enemies, self.active_missiles)
+        self._publish_live_view()
+        if self.memory_profiler:
+            self.memory_profiler.sample(self.current_tick)
+        if self.results:
+            self.results.sample(self)
+
+    def fast_forward(self):
+        """
+        Runs a quiet stretch without full ticks. The stretch starts when no drone
+        has work besides recharging, no missile is in flight and no plan is waiting
+        or being computed by the strategist, and it ends before the next tick with something to do: a report boundary or
+        planner deadline, a plan arriving, or an enemy move that could bring an enemy
+        within scan range of a drone. Inside it only the due enemy moves and recharges
+        are applied, so with a deterministic strategist (local, mock or cache replay)
+        the outcome is identical to running the ticks in full; a live LLM's answers
+        arrive on wall-clock time either way. The stretch is logged as one run-length record.
+        """
+        strategist = self.central_strategist
+        if (self.active_missiles or not self.scheduler.only_recharging()
+                or strategist.has_ready_plans() or strategist.llm_in_progress):
+            return
+        with self._own_rng():
+            self._fast_forward()
+
+    def _fast_forward(self):
+        first = self.current_tick + 1
+        last = min(self._next_event_tick() - 1, self.current_tick + FAST_FORWARD_MAX_TICKS)
+        first_state, changes = None, []
+
+        for tick in range(first, last + 1):
+            strategist = self.central_strategist
+            if strategist.has_ready_plans() or strategist.llm_in_progress or not self._enemy_moves_are_quiet(tick):
+                break
+            moved = self.scheduler.move_enemies(tick)
+            recharged = self.scheduler.update_drones(tick)
+            self.current_tick = tick
+            if first_state is None:
+                first_state = self.logger.describe_tick(tick, self.drones, self.moving_enemies, self.active_missiles)
+                continue
+            changes.extend([tick, e.id, {"position": e.position.copy()}] for e in moved)
+            changes.extend([tick, d.id, {"battery": round(d.battery, 2)}] for d in recharged)
+
+        if first_state is None:
+            return
+        print(f"\n===== FAST-FORWARD: TICKS {first}-{self.current_tick} =====")
+        self.logger.log_fast_forward(first_state, self.current_tick, changes)
+        self._publish_live_view()
+        if self.memory_profiler:
+            self.memory_profiler.sample(self.current_tick)
+        if self.results:
+            self.results.sample(self)
+        self.fast_forward_stats["stretches"] += 1
+        self.fast_forward_stats["ticks"] += self.current_tick - first + 1
+
+    @contextmanager
+    def _own_rng(self):
+        """Runs the block on this engine's private RNG stream, if it has one."""
+        if self.rng_state is None:
+            yield
+            return
+        outer = random.getstate()
+        random.setstate(self.rng_state)
+        try:
+            yield
+        finally:
+            self.rng_state = random.getstate()
+            random.setstate(outer)
+
+    # --- Checkpoints ---
+
+    def checkpoint(self):
+        """Returns the complete simulation state as a compact binary snapshot."""
+        with self._own_rng():
+            return engine_snapshot.capture(self)
+
+    def restore(self, data):
+        """Rewinds (or advances) this engine to a snapshot of a run with the same drones and enemies."""
+        tick, rng = engine_snapshot.restore(self, data)
+        if self.rng_state is not None:
+            self.rng_state = rng
+        else:
+            random.setstate(rng)
+        self.logger.truncate(tick)
+        if self.results:
+            self.results.truncate(tick)
+        if self.visualizer:
+            self.visualizer.reset_view()
+        self._publish_live_view()
+        print(f"ENGINE: Restored snapshot of tick {tick}.")
+
+    @classmethod
+    def from_checkpoint(cls, data, log_file=LOG_FILE, private_rng=False):
+        """
+        Builds a new headless engine in the state of a snapshot. With 'private_rng' the
+        engine draws from its own RNG stream and leaves the global one untouched, so
+        several engines can run side by side in one process.
+        """
+        outer = random.getstate()
+        engine = cls(log_file=log_file, headless=True, generate_map=False)
+        if private_rng:
+            engine.rng_state = outer  # placeholder until restore installs the snapshot's stream
+            random.setstate(outer)
+        engine.restore(data)
+        engine.logger.log_initial_state(engine.grid)
+        engine.logger.log_tick_state(engine.current_tick, engine.drones, engine.moving_enemies, engine.active_missiles)
+        return engine
+
+    def fork(self, branches, log_dir=None):
+        """
+        Returns 'branches' independent headless copies of this engine at the current
+        tick, each on its own RNG stream (e.g. to compare strategist policies from the
+        same situation). This engine continues unaffected. Every branch has its own LLM
+        event loop thread: close() each branch when done with it.
+        """
+        data = self.checkpoint()
+        log_dir = log_dir or os.path.dirname(self.logger.filename or LOG_FILE)
+        return [SimulationEngine.from_checkpoint(data, os.path.join(log_dir, f"branch_t{self.current_tick}_{i + 1}.json"),
+                                                 private_rng=True)
+                for i in range(branches)]
+
+    def _next_event_tick(self):
+        """The next tick on which the strategist side has work that cannot be skipped."""
+        if self.planner:
+            event = self.planner.next_event_tick()
+            return event if event is not None else float('inf')
+        # Report boundaries are the ticks with current_tick % LLM_CALL_FREQUENCY == 1
+        following = self.current_tick + 1
+        return following + (1 - following) % LLM_CALL_FREQUENCY
+
+    def _enemy_moves_are_quiet(self, tick):
+        """False if an enemy moving on 'tick' could end up within scan range of (or on) an active drone."""
+        due = self.scheduler.enemy_moves.peek(tick)
+        if not due:
+            return True
+        # An enemy moves one tile, so anything further than radius + 1 stays out of range
+        limit_sq = (DRONE_SCAN_RADIUS + 1) ** 2
+        for enemy in due:
+            if enemy.status != 'ACTIVE':
+                continue
+            for drone in self.registry.active_drones.values():
+                if (drone.position['x'] - enemy.position['x'])**2 + (drone.position['y'] - enemy.position['y'])**2 <= limit_sq:
+                    return False
+        return True
+
+    def collect_reports(self):
+        """Drones report to the strategist, which integrates the reports into its world model."""
+        reports = [d.report_to_center(self.moving_enemies) for d in self.drones]
+        self.central_strategist.collect_reports(reports, self.current_tick)
+        # Reporting costs battery, which can start a recharge or drain a drone
+        self.scheduler.wake_all()
+
+    def _run_planner(self):
+        plan = self.planner.update(self.current_tick)
+        if plan:
+            self._apply_commands(plan)
+
+    def _publish_live_view(self):
+        """Writes the current tick into the shared live view ring buffer, if enabled."""
+        if self.live_view:
+            self.live_view.write_tick(self.current_tick, self.drones, self.moving_enemies,
+                                      self.active_missiles, self.missile_system.missile_count)
 
     # YENİ: Füze hareketini ve HSS tehdidini yöneten özel metot
     def _update_missiles_and_threats(self):
         """
-        Updates all active missiles. Moves them, checks for HSS interceptions,
-        and handles target impacts.
+        Updates all active missiles. Moves them, and resolves those whose
+        interception or impact the scheduler has due on this tick.
         """
-        all_hss_tiles = [tile for row in self.grid.tiles for tile in row if tile.type == 'HSS']
-
-        for missile in self.active_missiles[:]:
+        for missile in self.active_missiles:
             missile.update()
 
-            # Füze hala havadayken HSS tarafından vurulup vurulmadığını kontrol et
-            if missile.status == 'IN_FLIGHT':
-                for hss_tile in all_hss_tiles:
-                    hss_pos = {'x': hss_tile.x, 'y': hss_tile.y}
-                    radius_sq = hss_tile.properties['kill_zone_radius'] ** 2
-                    dist_sq = (missile.current_position['x'] - hss_pos['x'])**2 + (missile.current_position['y'] - hss_pos['y'])**2
-                    
-                    if dist_sq <= radius_sq:
-                        print(f"!!! MISSILE INTERCEPTED! Missile flying to {missile.target_position} was destroyed by HSS at {hss_pos} !!!")
-                        missile.status = 'DETONATED' # Füzenin durumunu patladı olarak ayarla
-                        break # Füze imha oldu, diğer HSS'leri kontrol etmeye gerek yok
-            
-            # Füzenin durumu 'DETONATED' ise (hedefe ulaştığı veya vurulduğu için)
-            if missile.status == 'DETONATED':
-                # Sadece hedefine başarıyla ulaşmışsa hasar ver
-                is_at_target = missile.current_position == missile.target_position
-                
-                # Füzenin yolu bittiğinde de hedefe ulaşmış sayılır (hız > 1 durumları için)
-                is_path_empty = not missile.path 
+        for missile, hss_tile in self.scheduler.missile_events_due(self.current_tick):
+            if hss_tile is not None:
+                hss_pos = {'x': hss_tile.x, 'y': hss_tile.y}
+                print(f"!!! MISSILE INTERCEPTED! Missile flying to {missile.target_position} was destroyed by HSS at {hss_pos} !!!")
+                missile.status = 'DETONATED' # Füzenin durumunu patladı olarak ayarla
+            elif missile.current_position == missile.target_position:
+                # Konumu hedefe eşitse, füze HSS tarafından vurulmadan hedefine ulaştı
+                self.handle_missile_impact(missile)
 
-                if is_at_target or is_path_empty:
-                    # Eğer konumu hedefe eşitse, bu HSS tarafından vurulmadığı anlamına gelir.
-                    # HSS tarafından vurulsaydı, konumu hedefle eşleşmezdi.
-                    if missile.current_position == missile.target_position:
-                         self.handle_missile_impact(missile)
-
-                # Her iki durumda da (hedefe varma veya imha edilme) füzeyi listeden kaldır
-                self.active_missiles.remove(missile)
+            # Her iki durumda da (hedefe varma veya imha edilme) füzeyi listeden kaldır
+            self.registry.missile_finished(missile)
 
     # ... (kodun geri kalanı aynı kalacak) ...
     def check_and_initiate_hunts(self):
         """Checks if any drone spots a moving enemy and initiates a hunt."""
-        active_enemies = [e for e in self.moving_enemies if e.status == 'ACTIVE']
-        for drone in self.drones:
-            if drone.status != 'ACTIVE': continue
-            
+        active_enemies = list(self.registry.active_moving_enemies.values())
+        for drone in self.registry.active_drones.values():
             if not drone.current_command.get('is_hunting'):
                 for enemy in active_enemies:
                     dist_sq = (drone.position['x'] - enemy.position['x'])**2 + (drone.position['y'] - enemy.position['y'])**2
@@ -137,6 +405,7 @@ class SimulationEngine:
                             "is_hunting": True
                         }
                         drone.set_command(hunt_command)
+                        self.scheduler.wake(drone)
                         break
 
             elif drone.current_command.get('is_hunting'):
@@ -153,6 +422,7 @@ class SimulationEngine:
                     if closest_enemy:
                         drone.target_position = closest_enemy.position.copy()
                         drone.path = []
+                        self.scheduler.wake(drone)
 
     def _distribute_commands(self):
         commands_json = self.central_strategist.plan_next_moves(
@@ -163,37 +433,39 @@ class SimulationEngine:
             if commands_json is None:
                 print(f"\n--- TICK {self.current_tick} | Strategist is thinking... (LLM processing) ---")
             return
+        self._apply_commands(commands_json)
+
+    def _apply_commands(self, commands_json):
+        """Hands a strategist plan to the drones and the missile system."""
         print(f"\n--- TICK {self.current_tick} | Strategist Reasoning ---\n{commands_json.get('reasoning')}\n")
 
-        threat_zones = self.central_strategist.world_model['potential_threat_zones']
-        known_tiles = self.central_strategist.world_model['known_tiles']
+        # Drones read shared intelligence through the versioned store; commands only carry the version
+        intel_version = self.central_strategist.intel.version
 
         for command in commands_json['commands']:
             cmd_type = command.get('command_type')
             drone_id = command.get('drone_id')
             if cmd_type in ['MOVE_DRONE', 'SCAN_AREA', 'STANDBY', 'SET_SCAN_MODE']:
-                for drone in self.drones:
-                    if drone.id == drone_id and drone.status == 'ACTIVE':
-                        enhanced_command = command.copy()
-                        enhanced_command['threat_zones'] = threat_zones
-                        enhanced_command['known_tiles'] = known_tiles
-                        drone.set_command(enhanced_command)
-                        break
-                        
+                drone = self.registry.active_drones.get(drone_id)
+                if drone:
+                    enhanced_command = command.copy()
+                    enhanced_command['intel_version'] = intel_version
+                    drone.set_command(enhanced_command)
+                    self.scheduler.wake(drone)
+
+
             elif cmd_type == 'FIRE_MISSILE':
                 target_pos = command.get('target_position')
                 if not target_pos: continue
                 
-                is_target_already_locked = False
-                for missile in self.active_missiles:
-                    if missile.target_position['x'] == target_pos['x'] and missile.target_position['y'] == target_pos['y']:
-                        is_target_already_locked = True
-                        print(f"ENGINE: Missile launch to {target_pos} aborted. A missile is already in flight to this target.")
-                        break
-                
-                if not is_target_already_locked:
-                    missile = self.missile_system.fire(target_pos, self.central_strategist.world_model['known_tiles'])
-                    if missile: self.active_missiles.append(missile)
+                if self.registry.is_target_locked(target_pos['x'], target_pos['y']):
+                    print(f"ENGINE: Missile launch to {target_pos} aborted. A missile is already in flight to this target.")
+                    continue
+
+                missile = self.missile_system.fire(target_pos, self.central_strategist.world_model['known_tiles'])
+                if missile:
+                    self.registry.missile_launched(missile)
+                    self.scheduler.schedule_missile(missile, self.current_tick)
 
     def handle_missile_impact(self, missile):
         x, y = missile.target_position['x'], missile.target_position['y']
@@ -202,47 +474,44 @@ class SimulationEngine:
             enemy_id = tile.properties['enemy_id']
             print(f"IMPACT! Missile destroyed {enemy_id} at ({x}, {y})!")
             tile.type = 'EMPTY'
+            self.registry.stationary_enemy_destroyed(enemy_id)
             if enemy_id in self.central_strategist.world_model['known_stationary_enemies']:
                 del self.central_strategist.world_model['known_stationary_enemies'][enemy_id]
         else:
             print(f"IMPACT! Missile detonated at ({x}, {y}) but hit nothing.")
 
     def check_kamikaze_attacks(self):
-        for drone in self.drones:
-            if drone.status != 'ACTIVE': continue
-            for enemy in self.moving_enemies:
-                if enemy.status != 'ACTIVE': continue
+        registry = self.registry
+        for drone in list(registry.active_drones.values()):
+            for enemy in list(registry.active_moving_enemies.values()):
                 if drone.position == enemy.position:
                     print(f"!!! KAMIKAZE ATTACK! {drone.id} destroyed {enemy.id} at {drone.position} !!!")
                     drone.status = 'DESTROYED'
                     enemy.status = 'DESTROYED'
+                    registry.drone_destroyed(drone)
+                    registry.moving_enemy_destroyed(enemy)
                     if enemy.id in self.central_strategist.world_model['known_moving_enemies']:
                         del self.central_strategist.world_model['known_moving_enemies'][enemy.id]
 
     def check_hss_threats(self):
-        for drone in self.drones:
-            if drone.status == 'ACTIVE':
-                for x in range(self.grid.width):
-                    for y in range(self.grid.height):
-                        hss_tile = self.grid.get_tile(x, y)
-                        if hss_tile and hss_tile.type == 'HSS':
-                            dist_sq = (drone.position['x'] - x)**2 + (drone.position['y'] - y)**2
-                            if dist_sq <= hss_tile.properties['kill_zone_radius']**2:
-                                print(f"!!! {drone.id} destroyed by HSS at ({x},{y}) !!!")
-                                drone.status = 'DESTROYED'
-                                self.central_strategist.add_threat_zone(drone.position)
-                                break
-                    if drone.status == 'DESTROYED': break
+        for drone in list(self.registry.active_drones.values()):
+            for hss_tile in self.registry.hss_sites:
+                x, y = hss_tile.x, hss_tile.y
+                dist_sq = (drone.position['x'] - x)**2 + (drone.position['y'] - y)**2
+                if dist_sq <= hss_tile.properties['kill_zone_radius']**2:
+                    print(f"!!! {drone.id} destroyed by HSS at ({x},{y}) !!!")
+                    drone.status = 'DESTROYED'
+                    self.registry.drone_destroyed(drone)
+                    self.central_strategist.add_threat_zone(drone.position)
+                    break
 
     def check_game_over(self):
-        active_stationary = sum(1 for r in self.grid.tiles for t in r if t.type == 'STATIONARY_ENEMY')
-        active_moving = sum(1 for e in self.moving_enemies if e.status == 'ACTIVE')
-        if active_stationary == 0 and active_moving == 0:
+        registry = self.registry
+        if registry.live_stationary_enemy_count == 0 and registry.active_moving_enemy_count == 0:
             self.game_over = True
             self.game_over_message = "SUCCESS: All enemies destroyed!"
             return
 
-        active_drones = sum(1 for d in self.drones if d.status != 'DESTROYED')
-        if active_drones == 0:
+        if registry.active_drone_count == 0:
             self.game_over = True
             self.game_over_message = "FAILURE: All drones lost."
\ No newline at end of file
@@ -1,18 +1,22 @@
 # FILE: simulation_logger.py
+import copy
 import json
-from config import GRID_WIDTH, GRID_HEIGHT
+from config import GRID_WIDTH, GRID_HEIGHT, LOG_FILE
 
 class SimulationLogger:
     """
     Handles logging the entire state of the simulation to a JSON file.
-    The log file is updated dynamically after every tick.
+    The log file is updated dynamically after every tick. With filename=None
+    nothing is kept or written (e.g. for environments stepped by a controller).
     """
-    def __init__(self, filename="logs/simulation_log.json"):
+    def __init__(self, filename=LOG_FILE):
         self.filename = filename
         self.log_data = {
             "initial_state": {},
             "tick_data": []
         }
+        if filename is None:
+            return
         # Ensure logs directory exists
         import os
         os.makedirs(os.path.dirname(self.filename), exist_ok=True)
@@ -25,6 +29,8 @@ class SimulationLogger:
         Bu iç metot, mevcut log verisini dosyaya yazar.
         Artık her veri eklendiğinde çağrılır.
         """
+        if self.filename is None:
+            return
         try:
             with open(self.filename, 'w', encoding='utf-8') as f:
                 json.dump(self.log_data, f, indent=2)
@@ -38,6 +44,15 @@ class SimulationLogger:
         Logs the static elements of the map once at the beginning of the simulation.
         Includes grid size, obstacles, base boundaries, stationary enemies, and HSS locations.
         """
+        if self.filename is None:
+            return
+        self.log_data["initial_state"] = self.describe_initial_state(grid)
+        self._save_to_file()
+        print("Initial map state logged and saved.")
+
+    @staticmethod
+    def describe_initial_state(grid):
+        """Returns the static map description in the 'initial_state' log format."""
         base_min_x, base_max_x = GRID_WIDTH, -1
         base_min_y, base_max_y = GRID_HEIGHT, -1
 
@@ -77,14 +92,79 @@ class SimulationLogger:
                 "min_y": base_min_y, "max_y": base_max_y
             }
 
-        self.log_data["initial_state"] = initial_state
-        self._save_to_file()
-        print("Initial map state logged and saved.")
+        return initial_state
 
     def log_tick_state(self, tick, drones, moving_enemies, active_missiles):
         """
         Logs the state of all dynamic actors for a given tick and saves to file.
         """
+        if self.filename is None:
+            return
+        self.log_data["tick_data"].append(self.describe_tick(tick, drones, moving_enemies, active_missiles))
+        self._save_to_file()
+
+    def log_fast_forward(self, first_state, last_tick, changes):
+        """
+        Logs a fast-forwarded stretch as one run-length record: the full state of its
+        first tick, the last tick it covers ("until") and the per-tick actor changes
+        after the first tick as [tick, actor_id, {field: value}]. expand_record()
+        turns it back into per-tick states.
+        """
+        record = dict(first_state, until=last_tick, changes=changes)
+        self.log_data["tick_data"].append(record)
+        self._save_to_file()
+
+    def truncate(self, tick):
+        """Drops everything logged after 'tick' (when a run is rewound to a snapshot)."""
+        records = self.log_data["tick_data"]
+        kept = len(records)
+        while kept and records[kept - 1]['tick'] > tick:
+            kept -= 1
+        last = records[kept - 1] if kept else None
+        if kept == len(records) and not (last and last.get('until', tick) > tick):
+            return
+        del records[kept:]
+        if last and last.get('until', tick) > tick:
+            last['until'] = tick
+            last['changes'] = [c for c in last['changes'] if c[0] <= tick]
+        self._save_to_file()
+
+    @staticmethod
+    def expand_record(record):
+        """Yields the per-tick states a tick_data entry stands for (one, or a fast-forwarded stretch)."""
+        if 'until' not in record:
+            yield record
+            return
+        yield from SimulationLogger._expand(record, record['until'])
+
+    @staticmethod
+    def state_at(record, tick):
+        """The state at 'tick' within a tick_data entry, without expanding the ticks after it."""
+        if 'until' not in record:
+            return record
+        state = None
+        for state in SimulationLogger._expand(record, tick, copies=False):
+            pass
+        return state
+
+    @staticmethod
+    def _expand(record, last_tick, copies=True):
+        # Deep copy: the changes are applied to the copy, never to the logged record
+        state = copy.deepcopy({k: v for k, v in record.items() if k not in ('until', 'changes')})
+        actors = {a['id']: a for key in ('drones', 'moving_enemies') for a in state.get(key, [])}
+        changes = record.get('changes', [])
+        i = 0
+        for tick in range(record['tick'], last_tick + 1):
+            while i < len(changes) and changes[i][0] == tick:
+                _, actor_id, fields = changes[i]
+                actors[actor_id].update(fields)
+                i += 1
+            state['tick'] = tick
+            yield copy.deepcopy(state) if copies else state
+
+    @staticmethod
+    def describe_tick(tick, drones, moving_enemies, active_missiles):
+        """Returns the state of all dynamic actors in the 'tick_data' log format."""
         tick_state = {
             "tick": tick,
             "drones": [],
@@ -98,6 +178,7 @@ class SimulationLogger:
             loggable_command = drone.current_command.copy()
             loggable_command.pop('known_tiles', None)  # tuple key içeren sözlüğü kaldır
             loggable_command.pop('threat_zones', None) # Büyük listeyi kaldır
+            loggable_command.pop('intel_version', None)
 
             tick_state["drones"].append({
                 "id": drone.id, "position": drone.position.copy(),
@@ -117,9 +198,7 @@ class SimulationLogger:
                 "target_position": missile.target_position.copy(),
                 "status": missile.status, "path_length": len(missile.path)
             })
-            
-        self.log_data["tick_data"].append(tick_state)
-        self._save_to_file()
+        return tick_state
 
     def close(self):
         """This method is no longer necessary as logging is dynamic."""
@@ -3,8 +3,20 @@ from config import *
 
 if ENABLE_VISUALIZATION:
     import pygame
+    from render_layers import MapLayerCache
+    from world_snapshot import SnapshotBuffer
 
 class Visualizer:
+    """
+    Live pygame view of a running simulation.
+
+    Every frame is drawn from an immutable WorldSnapshot, either captured right
+    before drawing (draw) or published by a simulation thread (run_render_loop).
+    Static map elements are pre-rendered into a cached layer, the strategist's
+    known world is blended into a background surface as new tiles are reported,
+    and only the rectangles touched by moving actors and the info panel are
+    redrawn each frame.
+    """
     def __init__(self, engine):
         if not ENABLE_VISUALIZATION: return
         # Initialize pygame without audio to avoid ALSA errors
@@ -16,98 +28,151 @@ class Visualizer:
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         self.font = pygame.font.SysFont('Arial', 12, bold=True)
         self.engine = engine
+        self.snapshots = SnapshotBuffer()
 
-    def draw(self):
-        if not ENABLE_VISUALIZATION: return
-        self.screen.fill(COLOR_BG)
-        self.draw_grid_and_threats()
-        self.draw_known_world()
-        self.draw_missiles()
-        self.draw_moving_enemies()
-        self.draw_drones()
-        self.draw_info()
-        pygame.display.flip()
-
-    def draw_grid_and_threats(self):
-        # Draw known HSS danger zones
-        for zone in self.engine.central_strategist.world_model['potential_threat_zones']:
-            if 'hss_location' in zone:
-                hss_x, hss_y, r = zone['hss_location']['x'], zone['hss_location']['y'], zone['radius']
-                px, py = hss_x * CELL_SIZE + CELL_SIZE // 2, (GRID_HEIGHT - 1 - hss_y) * CELL_SIZE + CELL_SIZE // 2
-                pr = r * CELL_SIZE
-                s = pygame.Surface((pr * 2, pr * 2), pygame.SRCALPHA)
-                pygame.draw.circle(s, COLOR_HSS_RANGE, (pr, pr), pr)
-                self.screen.blit(s, (px - pr, py - pr))
-
-        # Draw tiles
+        # Static map data is collected once; only stationary enemies and threat zones can change
+        self.obstacles = []
+        base_x, base_y = [], []
         for x in range(GRID_WIDTH):
             for y in range(GRID_HEIGHT):
-                rect = pygame.Rect(x * CELL_SIZE, (GRID_HEIGHT - 1 - y) * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                tile = self.engine.grid.get_tile(x, y)
+                tile = engine.grid.get_tile(x, y)
                 if tile.type == 'OBSTACLE':
-                    pygame.draw.rect(self.screen, COLOR_OBSTACLE, rect)
-                elif tile.type == 'STATIONARY_ENEMY':
-                    center_pixel_x = rect.centerx
-                    center_pixel_y = rect.centery
-                    pygame.draw.line(self.screen, COLOR_STATIONARY_ENEMY, (rect.left, rect.top), (rect.right, rect.bottom), 2)
-                    pygame.draw.line(self.screen, COLOR_STATIONARY_ENEMY, (rect.left, rect.bottom), (rect.right, rect.top), 2)
+                    self.obstacles.append((x, y))
                 elif tile.type == 'BASE':
-                    s = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
-                    s.fill(COLOR_BASE)
-                    self.screen.blit(s, rect.topleft)
-
-    def draw_known_world(self):
-        s = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
-        s.fill(COLOR_KNOWN_WORLD)
-        for x, y in self.engine.central_strategist.world_model['known_tiles']:
-            rect = pygame.Rect(x * CELL_SIZE, (GRID_HEIGHT - 1 - y) * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-            self.screen.blit(s, rect.topleft)
-
-    def draw_drones(self):
-        for drone in self.engine.drones:
-            x, y = drone.position['x'], drone.position['y']
+                    base_x.append(x)
+                    base_y.append(y)
+        self.base_bounds = {"min_x": min(base_x), "max_x": max(base_x),
+                            "min_y": min(base_y), "max_y": max(base_y)} if base_x else None
+
+        self.map_layer = MapLayerCache(GRID_WIDTH, GRID_HEIGHT)
+        self.background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))  # map layer + known world
+        self.known_tile_surface = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
+        self.known_tile_surface.fill(COLOR_KNOWN_WORLD)
+        self._known_tiles_drawn = 0
+        self._needs_full_redraw = True
+        self._dirty_rects = []  # Areas drawn over the background in the previous frame
+
+    def reset_view(self):
+        """Forgets everything drawn so far, e.g. after the engine was restored to a snapshot."""
+        self.snapshots = SnapshotBuffer()
+        self.map_layer = MapLayerCache(GRID_WIDTH, GRID_HEIGHT)
+        self._known_tiles_drawn = 0
+        self._needs_full_redraw = True
+        self._dirty_rects = []
+
+    def draw(self):
+        """Draws the engine's current state (called from the simulation loop)."""
+        if not ENABLE_VISUALIZATION: return
+        self.draw_snapshot(self.snapshots.capture(self.engine))
+
+    def run_render_loop(self, is_simulation_running):
+        """
+        Draws the latest published snapshot at FPS until the simulation stops or the
+        window is closed. Runs on the main thread while the engine ticks on another one.
+        Returns False if the user closed the window.
+        """
+        clock = pygame.time.Clock()
+        drawn_sequence = -1
+        while True:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return False
+            simulation_running = is_simulation_running()
+            sequence, snapshot = self.snapshots.latest()
+            if snapshot is not None and sequence != drawn_sequence:
+                self.draw_snapshot(snapshot)
+                drawn_sequence = sequence
+            if not simulation_running:
+                return True
+            clock.tick(FPS)
+
+    def draw_snapshot(self, snapshot):
+        self.draw_grid_and_threats(snapshot)
+        new_known_rects = self.draw_known_world(snapshot)
+
+        if self._needs_full_redraw:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            # Erase last frame's actors and expose newly known tiles
+            for rect in self._dirty_rects + new_known_rects:
+                self.screen.blit(self.background, rect, rect)
+
+        drawn_rects = (self.draw_missiles(snapshot) + self.draw_moving_enemies(snapshot)
+                       + self.draw_drones(snapshot) + self.draw_info(snapshot))
+
+        if self._needs_full_redraw:
+            pygame.display.flip()
+            self._needs_full_redraw = False
+        else:
+            pygame.display.update(self._dirty_rects + new_known_rects + drawn_rects)
+        self._dirty_rects = drawn_rects
+
+    def draw_grid_and_threats(self, snapshot):
+        """Rebuilds the background if stationary enemies or known HSS zones changed."""
+        layer_key = (snapshot.stationary_enemies, snapshot.threat_zones)
+        if self.map_layer.is_current(layer_key):
+            return
+
+        layer = self.map_layer.render(layer_key, self.obstacles, self.base_bounds, snapshot.threat_zones, snapshot.stationary_enemies)
+        self.background.blit(layer, (0, 0))
+        # Known world has to be blended again on top of the new layer
+        self._known_tiles_drawn = 0
+        self._needs_full_redraw = True
+
+    def draw_known_world(self, snapshot):
+        """Blends only the tiles reported since the last drawn snapshot into the background."""
+        new_rects = []
+        for x, y in self.snapshots.known_tiles_order[self._known_tiles_drawn:snapshot.known_tiles_count]:
+            rect = self.map_layer.cell_rect(x, y)
+            self.background.blit(self.known_tile_surface, rect.topleft)
+            new_rects.append(rect)
+        self._known_tiles_drawn = snapshot.known_tiles_count
+        return new_rects
+
+    def draw_drones(self, snapshot):
+        rects = []
+        for x, y, is_destroyed in snapshot.drones:
             center = (x * CELL_SIZE + CELL_SIZE // 2, (GRID_HEIGHT - 1 - y) * CELL_SIZE + CELL_SIZE // 2)
-            color = COLOR_DRONE if drone.status != 'DESTROYED' else COLOR_DRONE_DESTROYED
-            pygame.draw.circle(self.screen, color, center, CELL_SIZE // 2)
-
-    def draw_moving_enemies(self):
-        for enemy in self.engine.moving_enemies:
-            if enemy.status == 'ACTIVE':
-                x, y = enemy.position['x'], enemy.position['y']
-                center = (x * CELL_SIZE + CELL_SIZE // 2, (GRID_HEIGHT - 1 - y) * CELL_SIZE + CELL_SIZE // 2)
-                points = [(center[0], center[1] - CELL_SIZE // 2), (center[0] - CELL_SIZE // 2, center[1] + CELL_SIZE // 2), (center[0] + CELL_SIZE // 2, center[1] + CELL_SIZE // 2)]
-                pygame.draw.polygon(self.screen, COLOR_MOVING_ENEMY, points)
-
-    def draw_missiles(self):
-        for missile in self.engine.active_missiles:
+            color = COLOR_DRONE if not is_destroyed else COLOR_DRONE_DESTROYED
+            rects.append(pygame.draw.circle(self.screen, color, center, CELL_SIZE // 2))
+        return rects
+
+    def draw_moving_enemies(self, snapshot):
+        rects = []
+        for x, y in snapshot.moving_enemies:
+            center = (x * CELL_SIZE + CELL_SIZE // 2, (GRID_HEIGHT - 1 - y) * CELL_SIZE + CELL_SIZE // 2)
+            points = [(center[0], center[1] - CELL_SIZE // 2), (center[0] - CELL_SIZE // 2, center[1] + CELL_SIZE // 2), (center[0] + CELL_SIZE // 2, center[1] + CELL_SIZE // 2)]
+            rects.append(pygame.draw.polygon(self.screen, COLOR_MOVING_ENEMY, points))
+        return rects
+
+    def draw_missiles(self, snapshot):
+        rects = []
+        for path_points in snapshot.missiles:
             # Draw missile path
-            path_points = [missile.current_position] + missile.path
             if len(path_points) > 1:
-                pixel_points = [(p['x'] * CELL_SIZE + CELL_SIZE // 2, (GRID_HEIGHT - 1 - p['y']) * CELL_SIZE + CELL_SIZE // 2) for p in path_points]
-                pygame.draw.lines(self.screen, COLOR_MISSILE_PATH, False, pixel_points, 1)
+                pixel_points = [(x * CELL_SIZE + CELL_SIZE // 2, (GRID_HEIGHT - 1 - y) * CELL_SIZE + CELL_SIZE // 2) for x, y in path_points]
+                rects.append(pygame.draw.lines(self.screen, COLOR_MISSILE_PATH, False, pixel_points, 1))
             # Draw missile
-            x, y = missile.current_position['x'], missile.current_position['y']
+            x, y = path_points[0]
             center = (x * CELL_SIZE + CELL_SIZE // 2, (GRID_HEIGHT - 1 - y) * CELL_SIZE + CELL_SIZE // 2)
-            pygame.draw.circle(self.screen, COLOR_MISSILE, center, CELL_SIZE // 2 - 1)
-    
-    def draw_info(self):
-        active_stationary = sum(1 for r in self.engine.grid.tiles for t in r if t.type == 'STATIONARY_ENEMY')
-        active_moving = sum(1 for e in self.engine.moving_enemies if e.status == 'ACTIVE')
-        
+            rects.append(pygame.draw.circle(self.screen, COLOR_MISSILE, center, CELL_SIZE // 2 - 1))
+        return rects
+
+    def draw_info(self, snapshot):
         # Check if LLM is processing
-        llm_status = ""
-        if hasattr(self.engine.central_strategist, 'llm_in_progress') and self.engine.central_strategist.llm_in_progress:
-            llm_status = " (AI Thinking...)"
-        
+        llm_status = " (AI Thinking...)" if snapshot.llm_in_progress else ""
+
         info_texts = [
-            f"Tick: {self.engine.current_tick}{llm_status}",
-            f"Missiles Left: {self.engine.missile_system.missile_count}",
-            f"Active Drones: {sum(1 for d in self.engine.drones if d.status != 'DESTROYED')}/{NUM_DRONES}",
-            f"Stationary Enemies: {active_stationary}/{NUM_STATIONARY_ENEMIES}",
-            f"Moving Enemies: {active_moving}/{NUM_MOVING_ENEMIES}",
+            f"Tick: {snapshot.tick}{llm_status}",
+            f"Missiles Left: {snapshot.missiles_left}",
+            f"Active Drones: {snapshot.active_drones}/{NUM_DRONES}",
+            f"Stationary Enemies: {len(snapshot.stationary_enemies)}/{NUM_STATIONARY_ENEMIES}",
+            f"Moving Enemies: {len(snapshot.moving_enemies)}/{NUM_MOVING_ENEMIES}",
         ]
+        rects = []
         for i, text in enumerate(info_texts):
             # Use different color for the tick line when LLM is processing
             color = (255, 255, 0) if i == 0 and llm_status else (255, 255, 255)
             text_surf = self.font.render(text, True, color)
-            self.screen.blit(text_surf, (5, 5 + i * 15))
\ No newline at end of file
+            rects.append(self.screen.blit(text_surf, (5, 5 + i * 15)))
+        return rects
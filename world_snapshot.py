@@ -0,0 +1,68 @@
+# FILE: world_snapshot.py
+import threading
+from collections import namedtuple
+from itertools import islice
+
+# Immutable view of everything the renderer needs for one tick.
+# drones: (x, y, is_destroyed), active_drones: count, moving_enemies: (x, y) of active enemies,
+# missiles: tuple of path points starting at the current position,
+# stationary_enemies: (x, y) of live ones, threat_zones: (x, y, radius).
+WorldSnapshot = namedtuple('WorldSnapshot', [
+    'tick', 'drones', 'active_drones', 'moving_enemies', 'missiles', 'stationary_enemies',
+    'threat_zones', 'known_tiles_count', 'missiles_left', 'llm_in_progress'
+])
+
+class SnapshotBuffer:
+    """
+    Double buffer between the simulation loop and a renderer running on another thread.
+
+    The simulation thread captures an immutable WorldSnapshot after each tick and
+    publishes it with a single reference swap; the renderer picks up whatever is
+    latest at its own frame rate and never touches live simulation objects.
+    Strategist knowledge is exposed through 'known_tiles_order', an append-only
+    list of known positions, so readers only need a count from the snapshot.
+    """
+    def __init__(self):
+        self.known_tiles_order = []
+        self._lock = threading.Lock()
+        self._latest = None
+        self._sequence = 0
+
+    def capture(self, engine):
+        """Builds a snapshot of the engine's current state. Must run on the simulation thread."""
+        world_model = engine.central_strategist.world_model
+        registry = engine.registry
+        known_tiles = world_model['known_tiles']
+        # known_tiles only grows and keeps insertion order, so new tiles are at the end
+        if len(known_tiles) > len(self.known_tiles_order):
+            self.known_tiles_order.extend(islice(known_tiles, len(self.known_tiles_order), None))
+
+        return WorldSnapshot(
+            tick=engine.current_tick,
+            drones=tuple((d.position['x'], d.position['y'], d.status == 'DESTROYED') for d in engine.drones),
+            active_drones=registry.active_drone_count,
+            moving_enemies=tuple((e.position['x'], e.position['y']) for e in registry.active_moving_enemies.values()),
+            missiles=tuple(
+                tuple((p['x'], p['y']) for p in [m.current_position] + m.path) for m in engine.active_missiles
+            ),
+            stationary_enemies=tuple((t.x, t.y) for t in registry.stationary_enemies.values()),
+            threat_zones=tuple(
+                (z['hss_location']['x'], z['hss_location']['y'], z['radius'])
+                for z in world_model['potential_threat_zones'] if 'hss_location' in z
+            ),
+            known_tiles_count=len(self.known_tiles_order),
+            missiles_left=engine.missile_system.missile_count,
+            llm_in_progress=getattr(engine.central_strategist, 'llm_in_progress', False)
+        )
+
+    def publish(self, engine):
+        """Captures the engine state and makes it the latest snapshot."""
+        snapshot = self.capture(engine)
+        with self._lock:
+            self._latest = snapshot
+            self._sequence += 1
+
+    def latest(self):
+        """Returns (sequence, snapshot); the sequence changes whenever a new snapshot is published."""
+        with self._lock:
+            return self._sequence, self._latest